@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""End-to-end latency of Project.extract for GitHub and GitLab
+repositories, against the local API stand-in of fake_api.py.
+
+Runs a single-repository scenario, repeated to get latency percentiles,
+and a batch scenario extracting N distinct repositories, optionally on a
+thread pool. Reports requests per repository, wall time and p50/p95/p99
+latency per repository.
+
+Usage: python benchmarks/api_latency.py --repos 50 --latency 50 --jitter 10
+"""
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import os
+from pathlib import Path
+import sys
+import time
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fake_api import FakeApiServer  # noqa: E402
+from harness import percentiles, write_report  # noqa: E402
+
+from gimie import logger  # noqa: E402
+from gimie.project import Project  # noqa: E402
+
+
+def extract(server: FakeApiServer, provider: str, repo: str) -> float:
+    """Extract one repository and return the elapsed time."""
+    start = time.perf_counter()
+    Project(
+        f"{server.url}/{repo}",
+        git_provider=provider,
+        base_url=server.url if provider == "gitlab" else None,
+    ).extract()
+    return time.perf_counter() - start
+
+
+def scenario(
+    server: FakeApiServer,
+    provider: str,
+    repos: List[str],
+    workers: int,
+) -> dict:
+    server.reset()
+    start = time.perf_counter()
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            latencies = list(
+                executor.map(lambda r: extract(server, provider, r), repos)
+            )
+    else:
+        latencies = [extract(server, provider, repo) for repo in repos]
+    wall = time.perf_counter() - start
+    return {
+        "n_repos": len(repos),
+        "workers": workers,
+        "wall_s": wall,
+        "repos_per_s": len(repos) / wall,
+        "requests_per_repo": server.requests / len(repos),
+        "requests": dict(sorted(server.by_key.items())),
+        "latency": percentiles(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--providers", nargs="+", default=["github", "gitlab"])
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=20,
+        help="Runs of the single-repository scenario.",
+    )
+    parser.add_argument(
+        "--repos", type=int, default=20, help="Size of the batch scenario."
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Repositories extracted concurrently in the batch scenario.",
+    )
+    parser.add_argument(
+        "--latency", type=float, default=20.0, help="Latency in ms."
+    )
+    parser.add_argument(
+        "--jitter", type=float, default=5.0, help="Jitter in ms."
+    )
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    # Synthetic files trigger warnings, e.g. for missing CFF identifiers
+    logger.setLevel("ERROR")
+    # Tokens are not checked by the stand-in
+    os.environ.setdefault("GITHUB_TOKEN", "benchmark")
+    os.environ.setdefault("GITLAB_TOKEN", "benchmark")
+    results = []
+    with FakeApiServer(
+        latency=args.latency / 1e3, jitter=args.jitter / 1e3
+    ) as server:
+        os.environ["GITHUB_API_URL"] = server.url
+        for provider in args.providers:
+            # Load parser models outside of timings
+            extract(server, provider, "warmup/repo")
+            single = scenario(
+                server, provider, ["bench/repo"] * args.repeat, workers=1
+            )
+            batch = scenario(
+                server,
+                provider,
+                [f"bench/repo{i}" for i in range(args.repos)],
+                workers=args.workers,
+            )
+            results.append(
+                {
+                    "provider": provider,
+                    "latency_ms": args.latency,
+                    "jitter_ms": args.jitter,
+                    "single": single,
+                    "batch": batch,
+                }
+            )
+    write_report("api_latency", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Generators of synthetic license-like corpora for benchmarks.
+
+Documents are drawn from a small number of "families" sharing most of
+their text, as real license variants do (e.g. BSD-2-Clause and
+BSD-3-Clause), with a Zipf-distributed common vocabulary and a few
+document-specific terms.
+"""
+
+import random
+from typing import List
+
+SYLLABLES = [
+    "li", "cen", "se", "war", "ran", "ty", "dis", "tri", "bu", "tion",
+    "soft", "ware", "per", "mis", "sion", "right", "co", "py", "holder",
+    "source", "bin", "ary", "form", "mod", "i", "fy", "grant", "ed",
+]  # fmt: skip
+
+
+def make_vocabulary(size: int, seed: int = 0) -> List[str]:
+    """Return size distinct pseudo-words."""
+    rng = random.Random(seed)
+    words: List[str] = []
+    seen = set()
+    while len(words) < size:
+        word = "".join(rng.choices(SYLLABLES, k=rng.randint(1, 4)))
+        if word not in seen:
+            seen.add(word)
+            words.append(word)
+    return words
+
+
+def generate_corpus(
+    n_docs: int,
+    doc_length: int = 400,
+    n_families: int = 50,
+    vocab_size: int = 5000,
+    seed: int = 0,
+) -> List[str]:
+    """Generate n_docs license-like documents.
+
+    Parameters
+    ----------
+    n_docs:
+        Number of documents.
+    doc_length:
+        Number of words in each document.
+    n_families:
+        Number of base texts the documents are derived from.
+    vocab_size:
+        Size of the shared vocabulary.
+    seed:
+        Random seed, for reproducible corpora.
+    """
+    rng = random.Random(seed)
+    vocab = make_vocabulary(vocab_size, seed)
+    weights = [1 / (rank + 1) for rank in range(vocab_size)]
+    families = [
+        rng.choices(vocab, weights=weights, k=doc_length)
+        for _ in range(min(n_families, max(n_docs, 1)))
+    ]
+    docs = []
+    for idx in range(n_docs):
+        words = list(families[idx % len(families)])
+        # Each variant rewrites a few clauses with its own terms
+        for _ in range(max(1, doc_length // 20)):
+            pos = rng.randrange(doc_length)
+            words[pos] = f"{rng.choice(vocab)}{idx}"
+        docs.append(" ".join(words))
+    return docs
+
+
+def perturb(doc: str, rate: float = 0.05, seed: int = 0) -> str:
+    """Return a copy of doc where a fraction of words are replaced, and
+    with a copyright line prepended, as in real license files."""
+    rng = random.Random(seed)
+    words = doc.split(" ")
+    for _ in range(int(len(words) * rate)):
+        words[rng.randrange(len(words))] = "placeholder"
+    return f"Copyright (c) {2000 + seed % 25} Someone\n" + " ".join(words)
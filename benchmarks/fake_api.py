@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""Local stand-in for the GitHub and GitLab APIs, for offline benchmarks.
+
+The server answers the GraphQL, REST and raw file requests made by gimie's
+extractors with synthetic responses, derived from the requested repository
+name, or with recorded responses loaded from a JSON file. Each request can
+be delayed by a fixed latency plus random jitter, and GitHub-style rate
+limit headers are sent.
+
+Point gimie at it with:
+
+- GitHub: ``GITHUB_API_URL=<server url>`` and repository URLs
+  ``<server url>/<owner>/<name>`` with the github provider.
+- GitLab: repository URLs ``<server url>/<group>/<name>`` with the gitlab
+  provider and ``<server url>`` as base URL.
+
+Usage: python benchmarks/fake_api.py --port 8080 --latency 50 --jitter 10
+
+Recordings map request keys to response bodies. Keys are
+``graphql:<operation>`` (``repo``, ``users``, ``project_query``,
+``head`` or ``heads``),
+``GET contributors`` or ``<METHOD> <path>``, e.g.
+``GET /repos/foo/bar/contributors``.
+"""
+
+import argparse
+import hashlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+from pathlib import Path
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+ROOT = Path(__file__).parent.parent
+# Files served from the root of every fake repository
+REPO_FILES = ["LICENSE", "CITATION.cff", "publiccode.yml", "README.md"]
+OPERATION = re.compile(r"query\s+(\w+)")
+CONTRIBUTORS = re.compile(r"/repos/([^/]+)/([^/]+)/contributors")
+RAW = re.compile(r"/.+?(?:/-)?/raw/[^/]+/(.+)")
+DATE = "2023-01-01T00:00:00Z"
+
+
+class FakeApiServer:
+    """Threaded HTTP server standing in for the GitHub and GitLab APIs.
+
+    Parameters
+    ----------
+    port:
+        Port to listen on. 0 picks a free port.
+    latency:
+        Delay added to each response, in seconds.
+    jitter:
+        Maximum random deviation from latency, in seconds.
+    rate_limit:
+        Number of requests allowed before responses fail with a rate limit
+        error. None disables the limit.
+    recordings:
+        Recorded response bodies by request key, used instead of synthetic
+        responses.
+    n_contributors:
+        Number of contributors of each synthetic repository.
+    seed:
+        Random seed of the jitter.
+    """
+
+    def __init__(
+        self,
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        rate_limit: Optional[int] = None,
+        recordings: Optional[Dict[str, Any]] = None,
+        n_contributors: int = 5,
+        seed: int = 0,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.recordings = recordings or {}
+        self.n_contributors = n_contributors
+        self.files = {
+            name: (ROOT / name).read_bytes()
+            for name in REPO_FILES
+            if (ROOT / name).exists()
+        }
+        self.heads: Dict[str, str] = {}
+        self.requests = 0
+        self.by_key: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), _handler(self))
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeApiServer":
+        self._thread = threading.Thread(
+            target=self.httpd.serve_forever, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "FakeApiServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reset(self):
+        """Reset request counters and the rate limit."""
+        with self._lock:
+            self.requests = 0
+            self.by_key.clear()
+
+    def _count(self, key: str) -> Tuple[int, float]:
+        """Record a request and return the number of requests so far and
+        the delay to apply."""
+        with self._lock:
+            self.requests += 1
+            self.by_key[key] = self.by_key.get(key, 0) + 1
+            delay = self.latency + self._rng.uniform(-self.jitter, self.jitter)
+            return self.requests, max(0.0, delay)
+
+    def request_key(
+        self, method: str, path: str, body: Optional[Dict[str, Any]]
+    ) -> str:
+        """Key identifying the kind of a request, used for recordings and
+        request counts."""
+        if body is not None and "query" in body:
+            match = OPERATION.search(body["query"])
+            return f"graphql:{match.group(1) if match else 'unknown'}"
+        if RAW.fullmatch(path):
+            return f"{method} raw"
+        if CONTRIBUTORS.fullmatch(path):
+            return f"{method} contributors"
+        return f"{method} {path}"
+
+    def respond(
+        self,
+        method: str,
+        key: str,
+        path: str,
+        body: Optional[Dict[str, Any]],
+    ) -> Tuple[int, Any]:
+        """Return the status and body (JSON or bytes) of a request."""
+        if key in self.recordings:
+            return 200, self.recordings[key]
+        if f"{method} {path}" in self.recordings:
+            return 200, self.recordings[f"{method} {path}"]
+        variables = (body or {}).get("variables") or {}
+        if key == "graphql:repo":
+            return 200, self.github_repo(variables["owner"], variables["name"])
+        if key == "graphql:users":
+            return 200, {
+                "data": {
+                    "nodes": [self.github_user(i) for i in variables["ids"]]
+                }
+            }
+        if key == "graphql:project_query":
+            return 200, self.gitlab_project(variables["path"])
+        if key == "graphql:head":
+            return 200, self.head_response(variables)
+        if key == "graphql:heads":
+            return 200, self.heads_response(variables)
+        if path in ("/user", "/api/v4/user"):
+            return 200, {"login": "bench", "username": "bench"}
+        match = CONTRIBUTORS.fullmatch(path)
+        if match:
+            owner, name = match.groups()
+            return 200, [
+                {"node_id": f"{owner}-{name}-{i}"}
+                for i in range(self.n_contributors)
+            ]
+        match = RAW.fullmatch(path)
+        if match and match.group(1) in self.files:
+            return 200, self.files[match.group(1)]
+        return 404, {"message": "Not Found"}
+
+    def github_repo(self, owner: str, name: str) -> Dict[str, Any]:
+        url = f"{self.url}/{owner}/{name}"
+        return {
+            "data": {
+                "repository": {
+                    "url": url,
+                    "parent": None,
+                    "createdAt": DATE,
+                    "updatedAt": DATE,
+                    "description": f"Synthetic repository {owner}/{name}",
+                    "latestRelease": {"publishedAt": DATE, "name": "v1.0.0"},
+                    "defaultBranchRef": {"name": "main"},
+                    "object": {
+                        "entries": [{"name": f, "path": f} for f in self.files]
+                    },
+                    "mentionableUsers": {"nodes": []},
+                    "name": name,
+                    "owner": self.github_user(owner),
+                    "primaryLanguage": {"name": "Python"},
+                    "repositoryTopics": {
+                        "nodes": [{"topic": {"name": "benchmark"}}]
+                    },
+                }
+            }
+        }
+
+    def head(self, path: str) -> str:
+        """Commit id of the HEAD of a repository. Repositories can be
+        updated by setting heads[path]."""
+        return self.heads.get(path) or hashlib.sha1(path.encode()).hexdigest()
+
+    def head_response(self, variables: Dict[str, Any]) -> Dict[str, Any]:
+        if "path" in variables:
+            oid = self.head(variables["path"])
+            tree = {"lastCommit": {"sha": oid}}
+            return {"data": {"project": {"repository": {"tree": tree}}}}
+        oid = self.head(f"{variables['owner']}/{variables['name']}")
+        ref = {"target": {"oid": oid}}
+        return {"data": {"repository": {"defaultBranchRef": ref}}}
+
+    def heads_response(self, variables: Dict[str, Any]) -> Dict[str, Any]:
+        """Batched HEAD lookups, as sent by gimie.changes."""
+        if "paths" in variables:
+            nodes = [
+                {
+                    "fullPath": path,
+                    "lastActivityAt": DATE,
+                    "repository": {
+                        "tree": {"lastCommit": {"sha": self.head(path)}}
+                    },
+                }
+                for path in variables["paths"]
+            ]
+            return {"data": {"projects": {"nodes": nodes}}}
+        data: Dict[str, Any] = {"rateLimit": {"cost": 1}}
+        for name in variables:
+            if name.startswith("o"):
+                i = name[1:]
+                path = f"{variables[name]}/{variables['n' + i]}"
+                data[f"r{i}"] = {
+                    "pushedAt": DATE,
+                    "defaultBranchRef": {"target": {"oid": self.head(path)}},
+                }
+        return {"data": data}
+
+    def github_user(self, login: str) -> Dict[str, Any]:
+        return {
+            "avatarUrl": f"{self.url}/avatars/{login}",
+            "company": "SDSC",
+            "login": login,
+            "name": login.title(),
+            "url": f"{self.url}/{login}",
+            "organizations": {
+                "nodes": [
+                    {
+                        "avatarUrl": f"{self.url}/avatars/org",
+                        "description": "Synthetic organization",
+                        "login": "org",
+                        "name": "Organization",
+                        "url": f"{self.url}/org",
+                    }
+                ]
+            },
+        }
+
+    def gitlab_project(self, path: str) -> Dict[str, Any]:
+        group, _, name = path.rpartition("/")
+        users = [
+            {
+                "id": f"gid://gitlab/User/{i}",
+                "name": f"User {i}",
+                "username": f"user{i}",
+                "publicEmail": None,
+                "webUrl": f"{self.url}/user{i}",
+            }
+            for i in range(self.n_contributors)
+        ]
+        return {
+            "data": {
+                "project": {
+                    "name": name,
+                    "id": "gid://gitlab/Project/1",
+                    "description": f"Synthetic repository {path}",
+                    "createdAt": DATE,
+                    "lastActivityAt": DATE,
+                    "group": {
+                        "id": "gid://gitlab/Group/1",
+                        "name": group,
+                        "description": "Synthetic group",
+                        "avatarUrl": None,
+                        "webUrl": f"{self.url}/{group}",
+                    },
+                    "languages": [{"name": "Python", "share": 100.0}],
+                    "topics": ["benchmark"],
+                    "projectMembers": {
+                        "edges": [
+                            {
+                                "node": {
+                                    "id": f"gid://gitlab/Member/{i}",
+                                    "accessLevel": {
+                                        "stringValue": (
+                                            "OWNER" if i == 0 else "DEVELOPER"
+                                        )
+                                    },
+                                    "user": user,
+                                }
+                            }
+                            for i, user in enumerate(users)
+                        ]
+                    },
+                    "mergeRequests": {
+                        "edges": [{"node": {"author": u}} for u in users]
+                    },
+                    "repository": {
+                        "rootRef": "main",
+                        "tree": {
+                            "blobs": {
+                                "nodes": [
+                                    {
+                                        "name": f,
+                                        "webUrl": f"{self.url}/{path}/-/blob/main/{f}",
+                                    }
+                                    for f in self.files
+                                ]
+                            }
+                        },
+                    },
+                    "releases": {
+                        "edges": [
+                            {"node": {"name": "v1.0.0", "releasedAt": DATE}}
+                        ]
+                    },
+                }
+            }
+        }
+
+
+def _handler(server: FakeApiServer):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            self._reply("GET", None)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            self._reply("POST", json.loads(self.rfile.read(length) or b"{}"))
+
+        def _reply(self, method: str, body: Optional[Dict[str, Any]]):
+            path = re.sub("/+", "/", self.path.split("?")[0])
+            key = server.request_key(method, path, body)
+            count, delay = server._count(key)
+            time.sleep(delay)
+            limit = server.rate_limit
+            if limit is not None and count > limit:
+                status, payload = 403, {"message": "API rate limit exceeded"}
+            else:
+                status, payload = server.respond(method, key, path, body)
+            data = (
+                payload
+                if isinstance(payload, bytes)
+                else json.dumps(payload).encode()
+            )
+            self.send_response(status)
+            self.send_header(
+                "Content-Type",
+                (
+                    "application/octet-stream"
+                    if isinstance(payload, bytes)
+                    else "application/json"
+                ),
+            )
+            self.send_header("Content-Length", str(len(data)))
+            if limit is not None:
+                self.send_header("X-RateLimit-Limit", str(limit))
+                self.send_header(
+                    "X-RateLimit-Remaining", str(max(0, limit - count))
+                )
+                self.send_header("X-RateLimit-Used", str(min(count, limit)))
+                self.send_header(
+                    "X-RateLimit-Reset", str(int(time.time()) + 3600)
+                )
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Latency in ms."
+    )
+    parser.add_argument(
+        "--jitter", type=float, default=0.0, help="Jitter in ms."
+    )
+    parser.add_argument("--rate-limit", type=int, default=None)
+    parser.add_argument(
+        "--recordings",
+        type=Path,
+        default=None,
+        help="JSON file of recorded responses by request key.",
+    )
+    args = parser.parse_args()
+    recordings = (
+        json.loads(args.recordings.read_text()) if args.recordings else None
+    )
+    server = FakeApiServer(
+        port=args.port,
+        latency=args.latency / 1e3,
+        jitter=args.jitter / 1e3,
+        rate_limit=args.rate_limit,
+        recordings=recordings,
+    )
+    print(f"Serving fake GitHub/GitLab APIs on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
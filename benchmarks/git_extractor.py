@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""Scaling of GitExtractor with the size of the history.
+
+Synthetic repositories are generated with git fast-import (see
+synthetic_git.py) and reused between runs. Each size is measured in a
+fresh process, which records wall time, the number of subprocesses
+started and peak RSS of the Python process for GitExtractor.extract()
+and list_files(). Generating 1M commits takes about a minute and a few
+hundred MB of disk.
+
+Usage: python benchmarks/git_extractor.py --sizes 1000 100000 1000000
+"""
+
+import argparse
+import json
+from pathlib import Path
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from harness import write_report  # noqa: E402
+from synthetic_git import generate_repository  # noqa: E402
+
+
+def count_subprocesses() -> list:
+    """Count the processes started with subprocess.Popen."""
+    counter = [0]
+    init = subprocess.Popen.__init__
+
+    def counting_init(self, *args, **kwargs):
+        counter[0] += 1
+        init(self, *args, **kwargs)
+
+    subprocess.Popen.__init__ = counting_init
+    return counter
+
+
+def measure_repository(path: str) -> dict:
+    """Measure GitExtractor on the repository at path, in this process."""
+    counter = count_subprocesses()
+    from gimie.extractors.git import GitExtractor
+
+    extractor = GitExtractor(
+        f"https://example.org/{Path(path).name}", local_path=path
+    )
+    stages = {}
+    for stage in ("extract", "list_files"):
+        counter[0] = 0
+        start = time.perf_counter()
+        result = getattr(extractor, stage)()
+        stages[stage] = {
+            "seconds": time.perf_counter() - start,
+            "subprocesses": counter[0],
+        }
+    stages["list_files"]["n_files"] = len(result)
+    return {
+        "stages": stages,
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        / 1024,
+    }
+
+
+def run(workdir: Path, commits: int, authors: int, files: int) -> dict:
+    path = workdir / f"repo-{commits}-{authors}-{files}"
+    generated = None
+    if not path.exists():
+        start = time.perf_counter()
+        generate_repository(path, commits, authors, files)
+        generated = time.perf_counter() - start
+    # A fresh process gives per-size peak RSS and cold caches
+    result = subprocess.run(
+        [sys.executable, __file__, "--measure", str(path)],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return {
+        "commits": commits,
+        "authors": authors,
+        "files": files,
+        "generation_s": generated,
+        **json.loads(result.stdout),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[1000, 100000],
+        help="Numbers of commits.",
+    )
+    parser.add_argument("--authors", type=int, default=50)
+    parser.add_argument("--files", type=int, default=1000)
+    parser.add_argument(
+        "--workdir",
+        type=Path,
+        default=Path(tempfile.gettempdir()) / "gimie-benchmarks",
+        help="Where generated repositories are kept between runs.",
+    )
+    parser.add_argument("--measure", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure_repository(args.measure)))
+        return
+    args.workdir.mkdir(parents=True, exist_ok=True)
+    results = [
+        run(args.workdir, size, args.authors, args.files)
+        for size in args.sizes
+    ]
+    write_report("git_extractor", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Measurement helpers shared by the benchmark scripts."""
+
+import gc
+import json
+from pathlib import Path
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+def measure(
+    func: Callable[[], Any], memory: bool = True
+) -> Tuple[Any, float, Optional[int]]:
+    """Run func once and return its result, wall time in seconds and peak
+    Python memory allocated during the call in bytes. Memory is traced in
+    a second run, so that tracing does not slow down the timed one."""
+    gc.collect()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    peak = None
+    if memory:
+        del result
+        gc.collect()
+        tracemalloc.start()
+        try:
+            result = func()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def throughput(
+    seconds: float, n_docs: int, n_bytes: int, peak: Optional[int]
+) -> Dict[str, Any]:
+    """Summarize a measurement as documents/s and MB/s."""
+    return {
+        "seconds": seconds,
+        "docs_per_s": n_docs / seconds if seconds else None,
+        "mb_per_s": n_bytes / 1e6 / seconds if seconds else None,
+        "peak_memory_mb": None if peak is None else peak / 1e6,
+    }
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    """Mean and p50/p95/p99 of latencies in seconds, in milliseconds."""
+    values = sorted(values)
+
+    def pick(q: float) -> float:
+        return 1e3 * values[min(len(values) - 1, int(len(values) * q))]
+
+    return {
+        "mean_ms": 1e3 * statistics.fmean(values),
+        "p50_ms": pick(0.50),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+    }
+
+
+def git_revision() -> Optional[str]:
+    """Commit of the working tree, to label results."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_report(
+    name: str, results: List[Dict[str, Any]], output: Optional[Path]
+):
+    """Print a JSON report and optionally save it to output."""
+    report = json.dumps(
+        {
+            "benchmark": name,
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "results": results,
+        }
+    )
+    if output:
+        output.write_text(report)
+    print(report)
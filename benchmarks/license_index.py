@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Compare shortlist recall and latency of the license inverted index
+against brute-force cosine scoring, for corpora of increasing size.
+
+Usage: python benchmarks/license_index.py --sizes 100 1000 5000
+"""
+
+import argparse
+import json
+from pathlib import Path
+import statistics
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from corpus import generate_corpus, perturb  # noqa: E402
+
+from gimie.parsers.license.index import LicenseIndex  # noqa: E402
+from gimie.utils.text_processing import (  # noqa: E402
+    TfidfConfig,
+    TfidfVectorizer,
+)
+
+
+def run(size: int, n_queries: int, max_features: int) -> dict:
+    docs = generate_corpus(size)
+    vectorizer = TfidfVectorizer(
+        config=TfidfConfig(
+            max_features=max_features,
+            ngram_range=(1, 2),
+            sublinear_tf=True,
+            norm="l2",
+        )
+    )
+    matrix = vectorizer.fit_transform(docs)
+    index = LicenseIndex(matrix)
+
+    targets = [i * size // n_queries for i in range(min(n_queries, size))]
+    queries = vectorizer.transform(
+        [perturb(docs[t], seed=i) for i, t in enumerate(targets)]
+    )
+    timings = {"brute_force": [], "index": []}
+    agree = found = 0
+    for i, target in enumerate(targets):
+        query = queries[i]
+        start = time.perf_counter()
+        exact = index.search_exhaustive(query)
+        timings["brute_force"].append(time.perf_counter() - start)
+        start = time.perf_counter()
+        approx = index.search(query)
+        timings["index"].append(time.perf_counter() - start)
+        agree += approx is not None and approx.row == exact.row
+        found += approx is not None and approx.row == target
+
+    def summary(values):
+        values = sorted(values)
+        return {
+            "mean_ms": 1e3 * statistics.fmean(values),
+            "p50_ms": 1e3 * values[len(values) // 2],
+            "p95_ms": 1e3 * values[int(len(values) * 0.95)],
+        }
+
+    return {
+        "n_docs": size,
+        "n_queries": len(targets),
+        "n_features": matrix.shape[1],
+        "recall_vs_brute_force": agree / len(targets),
+        "recall_vs_source_doc": found / len(targets),
+        "brute_force": summary(timings["brute_force"]),
+        "index": summary(timings["index"]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[100, 1000, 5000]
+    )
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--max-features", type=int, default=5000)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    results = [run(s, args.queries, args.max_features) for s in args.sizes]
+    report = json.dumps({"benchmark": "license_index", "results": results})
+    if args.output:
+        args.output.write_text(report)
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
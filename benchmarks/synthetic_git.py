@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Generate local git repositories with a given number of commits, authors
+and files, using git fast-import.
+
+The first commit adds all files, spread over nested directories, and each
+following commit modifies one file. Authors take turns and commits are one
+hour apart, so that contents and dates are reproducible.
+
+Usage: python benchmarks/synthetic_git.py /tmp/repo --commits 100000
+"""
+
+import argparse
+from pathlib import Path
+import subprocess
+from typing import IO, Iterator
+
+START_TIME = 1_600_000_000
+
+
+def file_path(index: int, files_per_dir: int = 50) -> str:
+    """Path of the index-th file, in a tree of nested directories."""
+    if index == 0:
+        return "LICENSE"
+    directory = index // files_per_dir
+    parts = [f"d{directory % 10}", f"d{directory // 10}"]
+    return "/".join(parts + [f"file{index}.txt"])
+
+
+def fast_import_stream(
+    commits: int, authors: int, files: int
+) -> Iterator[bytes]:
+    """Yield the git fast-import commands of the repository."""
+    for idx in range(commits):
+        author = idx % authors
+        ident = (
+            f"Author {author} <author{author}@example.org> "
+            f"{START_TIME + 3600 * idx} +0000"
+        )
+        message = f"Commit {idx}\n".encode()
+        lines = [
+            b"commit refs/heads/main\n",
+            f"mark :{idx + 1}\n".encode(),
+            f"author {ident}\n".encode(),
+            f"committer {ident}\n".encode(),
+            f"data {len(message)}\n".encode() + message,
+        ]
+        if idx:
+            lines.append(f"from :{idx}\n".encode())
+        changed = range(files) if idx == 0 else [idx % files]
+        for number in changed:
+            content = f"File {number}, revision {idx}\n".encode()
+            lines.append(f"M 100644 inline {file_path(number)}\n".encode())
+            lines.append(f"data {len(content)}\n".encode() + content)
+        lines.append(b"\n")
+        yield b"".join(lines)
+
+
+def _write(stream: IO[bytes], commits: int, authors: int, files: int):
+    buffer = []
+    for chunk in fast_import_stream(commits, authors, files):
+        buffer.append(chunk)
+        if len(buffer) >= 1000:
+            stream.write(b"".join(buffer))
+            buffer.clear()
+    stream.write(b"".join(buffer))
+
+
+def generate_repository(
+    path: Path, commits: int, authors: int = 10, files: int = 100
+) -> Path:
+    """Create a git repository at path and check out its last commit.
+
+    Parameters
+    ----------
+    path:
+        Directory of the repository, which must not exist.
+    commits:
+        Number of commits.
+    authors:
+        Number of distinct commit authors.
+    files:
+        Number of files in the working tree.
+    """
+    path = Path(path)
+    subprocess.run(["git", "init", "-q", "-b", "main", str(path)], check=True)
+    process = subprocess.Popen(
+        ["git", "fast-import", "--quiet", "--done"],
+        cwd=path,
+        stdin=subprocess.PIPE,
+    )
+    assert process.stdin is not None
+    _write(process.stdin, commits, authors, files)
+    process.stdin.write(b"done\n")
+    process.stdin.close()
+    if process.wait() != 0:
+        raise RuntimeError("git fast-import failed")
+    subprocess.run(
+        ["git", "reset", "-q", "--hard", "main"], cwd=path, check=True
+    )
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--commits", type=int, default=1000)
+    parser.add_argument("--authors", type=int, default=10)
+    parser.add_argument("--files", type=int, default=100)
+    args = parser.parse_args()
+    generate_repository(args.path, args.commits, args.authors, args.files)
+
+
+if __name__ == "__main__":
+    main()
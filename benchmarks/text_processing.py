@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Throughput and peak memory of text processing and license matching on
+generated license-like corpora of increasing size.
+
+Usage: python benchmarks/text_processing.py --sizes 1 1000 100000
+"""
+
+import argparse
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from corpus import generate_corpus, perturb  # noqa: E402
+from harness import measure, throughput, write_report  # noqa: E402
+
+from gimie.parsers.license import match_license  # noqa: E402
+from gimie.utils.text_processing import (  # noqa: E402
+    TfidfConfig,
+    TfidfVectorizer,
+    get_ngram_counts,
+    normalize_csr_rows,
+    tokenize,
+)
+
+
+def run(size: int, doc_length: int, max_matches: int, memory: bool) -> dict:
+    docs = generate_corpus(size, doc_length=doc_length)
+    n_bytes = sum(len(doc.encode()) for doc in docs)
+    config = TfidfConfig(
+        max_features=5000, ngram_range=(1, 2), sublinear_tf=True, norm="l2"
+    )
+    results = {}
+
+    def record(stage, func, n_docs=size, n_stage_bytes=n_bytes):
+        result, seconds, peak = measure(func, memory=memory)
+        results[stage] = throughput(seconds, n_docs, n_stage_bytes, peak)
+        return result
+
+    record("tokenize", lambda: [tokenize(doc) for doc in docs])
+    # Counts are dropped as they are made: keeping them all would take
+    # several GB for the largest corpora.
+    record(
+        "get_ngram_counts",
+        lambda: [len(get_ngram_counts(doc, (1, 2))) for doc in docs],
+    )
+    vectorizer = TfidfVectorizer(config=config)
+    record("fit", lambda: vectorizer.fit(docs))
+    matrix = record("transform", lambda: vectorizer.transform(docs))
+    # normalize_csr_rows works in place: normalize a fresh copy each repeat.
+    record(
+        "normalize_csr_rows",
+        lambda: normalize_csr_rows(matrix.copy(), "l2"),
+    )
+
+    # Matching uses the shipped model: licenses are not found in the
+    # generated corpus, so every query goes through tf-idf scoring.
+    queries = [
+        perturb(doc, seed=i).encode()
+        for i, doc in enumerate(docs[:max_matches])
+    ]
+    match_license(queries[0])  # Load the model outside of timings
+    record(
+        "match_license",
+        lambda: [match_license(query) for query in queries],
+        n_docs=len(queries),
+        n_stage_bytes=sum(len(query) for query in queries),
+    )
+    return {
+        "n_docs": size,
+        "doc_length": doc_length,
+        "corpus_mb": n_bytes / 1e6,
+        "stages": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 1000])
+    parser.add_argument(
+        "--doc-length", type=int, default=400, help="Words per document."
+    )
+    parser.add_argument(
+        "--max-matches",
+        type=int,
+        default=1000,
+        help="Maximum number of documents passed to match_license.",
+    )
+    parser.add_argument(
+        "--no-memory",
+        action="store_true",
+        help="Skip the second, traced run measuring peak memory.",
+    )
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    results = [
+        run(size, args.doc_length, args.max_matches, not args.no_memory)
+        for size in args.sizes
+    ]
+    write_report("text_processing", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
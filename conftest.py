@@ -0,0 +1,12 @@
+"""Fixtures shared by the tests and the doctests of the gimie package."""
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def user_dirs(tmp_path, monkeypatch):
+    """Point the user data and cache directories to a temporary
+    directory, so that custom licenses and cached results of the
+    developer do not affect tests."""
+    monkeypatch.setenv("GIMIE_DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setenv("GIMIE_CACHE_DIR", str(tmp_path / "cache"))
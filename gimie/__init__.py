@@ -17,13 +17,18 @@
 
 import logging
 
-import importlib.metadata as importlib_metadata
-
-__version__ = importlib_metadata.version(__name__)
-
 logger = logging.getLogger()
 stdout_formatter = logging.Formatter("%(levelname)s :: %(message)s")
 stream_handler = logging.StreamHandler()
 stream_handler.setLevel(logging.WARNING)
 stream_handler.setFormatter(stdout_formatter)
 logger.addHandler(stream_handler)
+
+
+def __getattr__(name: str):
+    # Reading package metadata is slow: only do it when the version is used
+    if name == "__version__":
+        import importlib.metadata as importlib_metadata
+
+        return importlib_metadata.version(__name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,210 @@
+# Gimie
+# Copyright 2022 - Swiss Data Science Center (SDSC)
+# A partnership between École Polytechnique Fédérale de Lausanne (EPFL) and
+# Eidgenössische Technische Hochschule Zürich (ETHZ).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Persistent cache of extraction results, keyed by source revision.
+
+Results are stored in a SQLite database under a key derived from the
+normalized repository URL, the commit at its HEAD, the enabled parsers
+and the gimie version. An unchanged repository is thus only extracted
+once, while any new commit, parser selection or gimie release leads to a
+new entry. The least recently used entries are evicted when the database
+exceeds its size limit.
+
+The cache lives in the user cache directory and is trusted: cached
+models are stored with pickle.
+"""
+
+from contextlib import closing
+from hashlib import blake2b
+import os
+from pathlib import Path
+import pickle
+import sqlite3
+import time
+from typing import Iterable, Optional, Union
+from urllib.parse import urlparse
+import zlib
+
+from gimie.utils.metrics import record_cache
+from gimie.utils.paths import user_cache_dir
+
+CACHE_FILE = "results.sqlite"
+# 256 MB
+DEFAULT_MAX_BYTES = 256 * 2**20
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    head TEXT NOT NULL,
+    data BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL
+)
+"""
+
+
+def normalize_url(url: str) -> str:
+    """Normalize a repository URL, so that equivalent spellings share
+    cache entries.
+
+    Examples
+    --------
+    >>> normalize_url("HTTPS://GitHub.com/sdsc-ordes/gimie.git/")
+    'https://github.com/sdsc-ordes/gimie'
+    """
+    parsed = urlparse(url.strip())
+    path = parsed.path.rstrip("/").removesuffix(".git")
+    return f"{parsed.scheme.lower()}://{parsed.netloc.lower()}{path}"
+
+
+def cache_key(
+    kind: str,
+    url: str,
+    head: str,
+    parser_names: Iterable[str],
+    *extra: str,
+) -> str:
+    """Key of an extraction result.
+
+    Parameters
+    ----------
+    kind:
+        Kind of result, e.g. "graph" or "models".
+    url:
+        URL of the repository.
+    head:
+        Commit id of the repository HEAD.
+    parser_names:
+        Names of the enabled parsers.
+    extra:
+        Other values the result depends on.
+
+    Examples
+    --------
+    >>> a = cache_key("graph", "https://example.org/repo", "abc", ["cff"])
+    >>> b = cache_key("graph", "https://example.org/repo/", "abc", ["cff"])
+    >>> a == b
+    True
+    """
+    from gimie import __version__
+
+    parts = [
+        kind,
+        normalize_url(url),
+        head,
+        ",".join(sorted(parser_names)),
+        __version__,
+        *extra,
+    ]
+    return blake2b("\n".join(parts).encode(), digest_size=20).hexdigest()
+
+
+class ResultCache:
+    """SQLite store of serialized extraction results with least recently
+    used eviction.
+
+    Parameters
+    ----------
+    path:
+        Database file. Defaults to a file in the user cache directory.
+    max_bytes:
+        Maximum total size of stored results, in bytes.
+
+    Examples
+    --------
+    >>> import tempfile
+    >>> cache = ResultCache(Path(tempfile.mkdtemp()) / "results.sqlite")
+    >>> cache.put("key", "https://example.org/repo", "abc", b"data")
+    >>> cache.get("key")
+    b'data'
+    """
+
+    def __init__(
+        self,
+        path: Optional[Union[str, os.PathLike]] = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        self.path = Path(path or user_cache_dir() / CACHE_FILE)
+        self.max_bytes = max_bytes
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as db, db:
+            db.execute(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # Connections are not shared, so that the cache can be used from
+        # several threads and processes.
+        db = sqlite3.connect(self.path, timeout=30)
+        db.execute("PRAGMA journal_mode=WAL")
+        return db
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the data stored under key, or None."""
+        with closing(self._connect()) as db, db:
+            row = db.execute(
+                "SELECT data FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                db.execute(
+                    "UPDATE results SET accessed = ? WHERE key = ?",
+                    (time.time(), key),
+                )
+        record_cache("results", row is not None)
+        return None if row is None else zlib.decompress(row[0])
+
+    def put(self, key: str, url: str, head: str, data: bytes):
+        """Store data under key, then evict the least recently used
+        entries beyond the size limit."""
+        blob = zlib.compress(data)
+        with closing(self._connect()) as db, db:
+            db.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                (key, normalize_url(url), head, blob, len(blob), time.time()),
+            )
+            db.execute(
+                """
+                DELETE FROM results WHERE key IN (
+                    SELECT key FROM (
+                        SELECT key, SUM(size) OVER (
+                            ORDER BY accessed DESC, key
+                        ) AS total
+                        FROM results
+                    )
+                    WHERE total > ?
+                )
+                """,
+                (self.max_bytes,),
+            )
+
+    def get_object(self, key: str) -> object:
+        """Return the object stored under key with put_object, or None."""
+        data = self.get(key)
+        return None if data is None else pickle.loads(data)
+
+    def put_object(self, key: str, url: str, head: str, obj: object):
+        """Store a picklable object under key."""
+        self.put(key, url, head, pickle.dumps(obj))
+
+    def size(self) -> int:
+        """Total size of stored results, in bytes."""
+        with closing(self._connect()) as db:
+            return db.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM results"
+            ).fetchone()[0]
+
+    def clear(self):
+        """Delete all stored results."""
+        with closing(self._connect()) as db, db:
+            db.execute("DELETE FROM results")
@@ -0,0 +1,323 @@
+# Gimie
+# Copyright 2022 - Swiss Data Science Center (SDSC)
+# A partnership between École Polytechnique Fédérale de Lausanne (EPFL) and
+# Eidgenössische Technische Hochschule Zürich (ETHZ).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Cheap detection of repositories which changed since a previous run.
+
+The commit at the HEAD of many repositories is checked in batches,
+before deciding which ones to extract again:
+
+- GitHub repositories are checked with one GraphQL query per batch,
+  with an aliased repository field per repository.
+- GitLab repositories are checked with one ``projects(fullPaths:)``
+  GraphQL query per batch and instance.
+- Other repositories are checked one by one with their extractor, e.g.
+  ``git ls-remote`` for generic git repositories, in a thread pool.
+
+A batch which fails (e.g. rate limit or authentication error) is logged
+and its repositories are given an unknown HEAD, as for repositories
+checked one by one, so that they are retried instead of aborting the
+run.
+
+Current states are compared with the states stored by a previous run, in
+a JSON state file mapping each URL to its HEAD and last activity date.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+from gimie import logger
+from gimie.extractors import get_extractor, infer_git_provider
+
+# Repositories per GraphQL query. GitHub limits the cost of queries, and
+# GitLab their complexity.
+GITHUB_BATCH_SIZE = 100
+GITLAB_BATCH_SIZE = 50
+# Concurrent HEAD lookups for providers without batch queries
+MAX_WORKERS = 16
+
+
+class RepositoryState(NamedTuple):
+    """State of a repository at a point in time.
+
+    Parameters
+    ----------
+    head:
+        Commit id of the repository HEAD, None if it could not be
+        resolved (e.g. unknown or empty repository).
+    activity:
+        Date of the last push or activity, if the provider reports it.
+    """
+
+    head: Optional[str]
+    activity: Optional[str] = None
+
+
+def check_repositories(
+    urls: Iterable[str],
+    base_url: Optional[str] = None,
+    batch_size: Optional[int] = None,
+) -> Dict[str, RepositoryState]:
+    """Resolve the current state of repositories, using batched queries
+    where the provider supports them. States are returned in the order of
+    urls, without duplicates.
+
+    Parameters
+    ----------
+    urls:
+        URLs of the repositories.
+    base_url:
+        Base URL of the git provider, as in gimie.project.Project.
+    batch_size:
+        Repositories per GraphQL query. Defaults to the provider limit.
+    """
+    urls = list(dict.fromkeys(urls))
+    by_provider = groupby(
+        sorted(urls, key=infer_git_provider), key=infer_git_provider
+    )
+    states: Dict[str, RepositoryState] = {}
+    for provider, group in by_provider:
+        group = list(group)
+        if provider == "github":
+            states.update(
+                _check_github(group, batch_size or GITHUB_BATCH_SIZE)
+            )
+        elif provider == "gitlab":
+            states.update(
+                _check_gitlab(group, base_url, batch_size or GITLAB_BATCH_SIZE)
+            )
+        else:
+            states.update(_check_each(group, provider, base_url))
+    return {url: states[url] for url in urls}
+
+
+def find_stale(
+    states: Dict[str, RepositoryState],
+    previous: Dict[str, RepositoryState],
+) -> List[str]:
+    """URLs whose state differs from the previous one, in the order of
+    states. Repositories with an unknown HEAD are always stale, so that
+    failures are retried.
+
+    Examples
+    --------
+    >>> find_stale(
+    ...     {"a": RepositoryState("1"), "b": RepositoryState("2"),
+    ...      "c": RepositoryState(None)},
+    ...     {"a": RepositoryState("1"), "b": RepositoryState("1")},
+    ... )
+    ['b', 'c']
+    """
+    return [
+        url
+        for url, state in states.items()
+        if state.head is None
+        or url not in previous
+        or previous[url].head != state.head
+    ]
+
+
+def load_state(path: Union[str, os.PathLike]) -> Dict[str, RepositoryState]:
+    """Read a state file. A missing file is an empty state."""
+    try:
+        data = json.loads(Path(path).read_text())
+    except FileNotFoundError:
+        return {}
+    return {
+        url: RepositoryState(entry.get("head"), entry.get("activity"))
+        for url, entry in data.items()
+    }
+
+
+def save_state(
+    path: Union[str, os.PathLike], states: Dict[str, RepositoryState]
+):
+    """Write a state file atomically."""
+    path = Path(path)
+    data = {url: state._asdict() for url, state in sorted(states.items())}
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(json.dumps(data, indent=1) + "\n")
+    os.replace(tmp, path)
+
+
+def _batches(items: List, size: int) -> Iterable[List]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def _check_github(
+    urls: List[str], batch_size: int
+) -> Dict[str, RepositoryState]:
+    """Resolve GitHub repositories with aliased GraphQL queries."""
+    from gimie.extractors.common.queries import send_graphql_query
+    from gimie.extractors.github import GithubExtractor
+
+    # Credentials and endpoint are the same for all repositories
+    extractor = GithubExtractor(urls[0])
+    states = {}
+    for batch in _batches(urls, batch_size):
+        try:
+            paths = [GithubExtractor(url).path.split("/") for url in batch]
+            query, variables = _github_query(paths)
+            response = send_graphql_query(
+                extractor.api_url, query, variables, extractor._headers
+            )
+            data = response.get("data")
+            if data is None:
+                raise ValueError(response.get("errors"))
+        except Exception as err:
+            states.update(_failed_batch(batch, err))
+            continue
+        # Unknown repositories are null, with an error each
+        for i, url in enumerate(batch):
+            repo = data.get(f"r{i}")
+            ref = repo and repo["defaultBranchRef"]
+            states[url] = RepositoryState(
+                ref["target"]["oid"] if ref else None,
+                repo and repo["pushedAt"],
+            )
+    return states
+
+
+def _github_query(
+    paths: List[List[str]],
+) -> Tuple[str, Dict[str, str]]:
+    """Build a GraphQL query with one aliased repository field per
+    owner/name path. Names are passed as variables.
+
+    Examples
+    --------
+    >>> query, variables = _github_query([["sdsc-ordes", "gimie"]])
+    >>> variables
+    {'o0': 'sdsc-ordes', 'n0': 'gimie'}
+    """
+    params, fields, variables = [], [], {}
+    for i, (owner, name) in enumerate(paths):
+        params.append(f"$o{i}: String!, $n{i}: String!")
+        fields.append(
+            f"r{i}: repository(owner: $o{i}, name: $n{i}) {{ ...state }}"
+        )
+        variables[f"o{i}"] = owner
+        variables[f"n{i}"] = name
+    query = (
+        f"query heads({', '.join(params)}) {{\n"
+        + "\n".join(fields)
+        + "\nrateLimit { cost }\n}\n"
+        "fragment state on Repository {\n"
+        "pushedAt\ndefaultBranchRef { target { oid } }\n}"
+    )
+    return query, variables
+
+
+GITLAB_QUERY = """
+query heads($paths: [String!], $first: Int) {
+    projects(fullPaths: $paths, first: $first) {
+        nodes {
+            fullPath
+            lastActivityAt
+            repository {
+                tree {
+                    lastCommit {
+                        sha
+                    }
+                }
+            }
+        }
+    }
+}
+"""
+
+
+def _check_gitlab(
+    urls: List[str], base_url: Optional[str], batch_size: int
+) -> Dict[str, RepositoryState]:
+    """Resolve GitLab projects with projects(fullPaths:) queries, grouped
+    by instance."""
+    from gimie.extractors.common.queries import send_graphql_query
+    from gimie.extractors.gitlab import GitlabExtractor
+
+    extractors = [GitlabExtractor(url, base_url=base_url) for url in urls]
+    states = {}
+    for _, group in groupby(
+        sorted(extractors, key=lambda e: e.base), key=lambda e: e.base
+    ):
+        group = list(group)
+        for batch in _batches(group, batch_size):
+            paths = [extractor.path for extractor in batch]
+            try:
+                response = send_graphql_query(
+                    batch[0].graphql_endpoint,
+                    GITLAB_QUERY,
+                    {"paths": paths, "first": len(paths)},
+                    batch[0]._headers,
+                )
+                if "errors" in response:
+                    raise ValueError(response["errors"])
+                nodes = response["data"]["projects"]["nodes"]
+            except Exception as err:
+                states.update(_failed_batch([e.url for e in batch], err))
+                continue
+            found = {node["fullPath"].lower(): node for node in nodes}
+            for extractor in batch:
+                node = found.get(extractor.path.lower())
+                states[extractor.url] = _gitlab_state(node)
+    return states
+
+
+def _failed_batch(
+    urls: List[str], err: Exception
+) -> Dict[str, RepositoryState]:
+    """Unknown states for the repositories of a failed batch, which are
+    then considered stale and retried by the next run."""
+    logger.warning(
+        f"Could not resolve HEAD of {len(urls)} repositories "
+        f"({urls[0]}, ...): {err}"
+    )
+    return {url: RepositoryState(None) for url in urls}
+
+
+def _gitlab_state(node: Optional[dict]) -> RepositoryState:
+    """State of a GitLab project node, which is None if not found."""
+    if node is None:
+        return RepositoryState(None)
+    try:
+        commit = node["repository"]["tree"]["lastCommit"]
+    except (KeyError, TypeError):
+        # Empty repository
+        commit = None
+    return RepositoryState(
+        commit["sha"] if commit else None, node.get("lastActivityAt")
+    )
+
+
+def _check_each(
+    urls: List[str], provider: str, base_url: Optional[str]
+) -> Dict[str, RepositoryState]:
+    """Resolve repositories one by one, concurrently."""
+
+    def resolve(url: str) -> RepositoryState:
+        try:
+            extractor = get_extractor(url, provider, base_url=base_url)
+            return RepositoryState(extractor.resolve_head())
+        except Exception as err:
+            logger.warning(f"Could not resolve HEAD of {url}: {err}")
+            return RepositoryState(None)
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        return dict(zip(urls, executor.map(resolve, urls)))
@@ -17,16 +17,20 @@
 """Command line interface to the gimie package."""
 
 from enum import Enum
+from pathlib import Path
 from typing import List, Optional
 
 import click
 import typer
 
-from gimie import __version__
 from gimie.parsers import get_parser, list_default_parsers, list_parsers
-from gimie.project import Project
 
 app = typer.Typer(add_completion=False)
+licenses_app = typer.Typer(
+    add_completion=False,
+    help="Manage custom license texts recognized by the license parser.",
+)
+app.add_typer(licenses_app, name="licenses")
 
 
 # Used to autogenerate docs with sphinx-click
@@ -40,10 +44,13 @@ class RDFFormatChoice(str, Enum):
     ttl = "ttl"
     jsonld = "json-ld"
     nt = "nt"
+    nq = "nq"
 
 
 def version_callback(value: bool):
     if value:
+        from gimie import __version__
+
         print(f"gimie {__version__}")
         # Exits successfully
         raise typer.Exit()
@@ -51,12 +58,21 @@ def version_callback(value: bool):
 
 @app.command()
 def data(
-    url: str,
+    urls: List[str] = typer.Argument(
+        ..., metavar="URL...", help="URLs of the git repositories."
+    ),
     format: RDFFormatChoice = typer.Option(
         RDFFormatChoice.ttl,
         "--format",
         show_choices=True,
-        help="Output serialization format for the RDF graph.",
+        help="Output serialization format for the RDF graph. "
+        "nt and nq are streamed; nq puts each repository in its own named graph.",
+    ),
+    output: Optional[str] = typer.Option(
+        None,
+        "--output",
+        "-o",
+        help="Output file. Defaults to stdout. Compressed with gzip if it ends with .gz.",
     ),
     base_url: Optional[str] = typer.Option(
         None,
@@ -75,6 +91,38 @@ def data(
         "-X",
         help="Exclude selected parser.",
     ),
+    profile: bool = typer.Option(
+        False,
+        "--profile",
+        help="Print the time, CPU, bytes transferred and peak memory of "
+        "each extraction stage as JSON on stderr. Files are parsed "
+        "sequentially while profiling memory.",
+    ),
+    profile_stats: Optional[Path] = typer.Option(
+        None,
+        "--profile-stats",
+        help="Run under cProfile and write pstats to this file.",
+    ),
+    provenance: bool = typer.Option(
+        False,
+        "--provenance",
+        help="Describe what each extraction cost (requests, API points, "
+        "bytes, clone size, CPU time) with PROV-O triples. With nq, they "
+        "are written to a separate named graph.",
+    ),
+    cache: bool = typer.Option(
+        False,
+        "--cache",
+        help="Reuse results of previous extractions if the repository HEAD "
+        "did not change. Results are stored in the user cache directory "
+        "(GIMIE_CACHE_DIR).",
+    ),
+    metrics: Optional[Path] = typer.Option(
+        None,
+        "--metrics",
+        help="Write HTTP, cache and clone metrics to this file in "
+        "Prometheus text format.",
+    ),
     version: Optional[bool] = typer.Option(
         None,
         "--version",
@@ -82,18 +130,222 @@ def data(
         callback=version_callback,
     ),
 ):
-    """Extract linked metadata from a Git repository at the target URL.
+    """Extract linked metadata from Git repositories at the target URLs.
 
     The output is sent to stdout, and turtle is used as the default serialization format.
     """
+    extract_args = (
+        urls,
+        format,
+        output,
+        base_url,
+        include_parser,
+        exclude_parser,
+        provenance,
+        cache,
+    )
+    try:
+        if profile or profile_stats:
+            _profile(extract_args, profile, profile_stats)
+        else:
+            _extract(*extract_args)
+    finally:
+        # Metrics are also useful when extraction fails
+        if metrics is not None:
+            from gimie.utils.metrics import get_registry
+
+            get_registry().write(str(metrics))
+
+
+def _profile(extract_args: tuple, profile: bool, stats: Optional[Path]):
+    """Run _extract, printing stage measurements to stderr if profile is
+    set and writing cProfile stats to the stats file if given."""
+    import cProfile
+    import json
+    import sys
+
+    from gimie.utils.profiling import Profiler
+
+    profiler = cProfile.Profile() if stats is not None else None
+    with Profiler(memory=profile) as stages:
+        if profiler is not None:
+            profiler.enable()
+        try:
+            _extract(*extract_args)
+        finally:
+            if profiler is not None and stats is not None:
+                profiler.disable()
+                profiler.dump_stats(stats)
+    if profile:
+        print(
+            json.dumps({"stages": stages.report()}, indent=2), file=sys.stderr
+        )
+
+
+def _extract(
+    urls: List[str],
+    format: RDFFormatChoice,
+    output: Optional[str],
+    base_url: Optional[str],
+    include_parser: Optional[List[str]],
+    exclude_parser: Optional[List[str]],
+    provenance: bool = False,
+    cache: bool = False,
+):
+    """Extract and serialize metadata, as described in data()."""
+    # Extraction dependencies are heavy: only import them when needed
+    from gimie.cache import ResultCache
+    from gimie.graph.ntriples import NTriplesWriter, open_output
+    from gimie.graph.operations import combine_graphs
+    from gimie.project import Project
+    from gimie.utils.profiling import stage
+
     parser_names = list_default_parsers()
     if exclude_parser:
         parser_names -= set([parser for parser in exclude_parser])
     if include_parser:
         parser_names = set([parser for parser in include_parser])
-    proj = Project(url, base_url=base_url, parser_names=parser_names)
-    repo_meta = proj.extract()
-    print(repo_meta.serialize(format=format.value))
+    results = ResultCache() if cache else None
+    projects = (
+        Project(
+            url,
+            base_url=base_url,
+            parser_names=parser_names,
+            track_cost=provenance,
+            cache=results,
+        )
+        for url in urls
+    )
+    with open_output(output) as stream:
+        if format in (RDFFormatChoice.nt, RDFFormatChoice.nq):
+            # Stream triples as they are extracted, one repository at a time
+            writer = NTriplesWriter(stream)
+            for proj in projects:
+                if format == RDFFormatChoice.nq:
+                    writer.start_graph(proj.url)
+                else:
+                    writer.start_graph()
+                proj.emit(writer)
+                if proj.cost is not None:
+                    if format == RDFFormatChoice.nq:
+                        writer.start_graph(proj.cost._id)
+                    proj.cost.emit(writer)
+            return
+        graphs = []
+        for proj in projects:
+            graphs.append(proj.extract())
+            if proj.cost is not None:
+                proj.cost.emit(graphs[-1])
+        with stage("serialize"):
+            repo_meta = combine_graphs(*graphs[1:], into=graphs[0])
+            print(repo_meta.serialize(format=format.value), file=stream)
+
+
+@app.command()
+def serve(
+    host: str = typer.Option(
+        "127.0.0.1", "--host", help="Address to listen on."
+    ),
+    port: int = typer.Option(8000, "--port", "-p", help="Port to listen on."),
+    workers: int = typer.Option(
+        4,
+        "--workers",
+        "-w",
+        help="Maximum number of concurrent extractions and HEAD lookups.",
+    ),
+    cache_size: int = typer.Option(
+        128, "--cache-size", help="Number of responses kept in memory."
+    ),
+    cache: bool = typer.Option(
+        False,
+        "--cache",
+        help="Also store results in the persistent result cache.",
+    ),
+):
+    """Run an HTTP server extracting metadata on request, e.g.
+    GET /extract?url=<repository>&format=ttl. Responses carry an ETag
+    derived from the repository HEAD, for revalidation with
+    If-None-Match."""
+    from gimie.cache import ResultCache
+    from gimie.server import ExtractionService, make_server
+
+    service = ExtractionService(
+        max_workers=workers,
+        cache_size=cache_size,
+        result_cache=ResultCache() if cache else None,
+    )
+    service.warm()
+    httpd = make_server(host, port, service)
+    typer.echo(f"Serving on http://{host}:{httpd.server_address[1]}")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+
+
+@app.command()
+def changed(
+    urls: Optional[List[str]] = typer.Argument(
+        None, metavar="[URL...]", help="URLs of the git repositories."
+    ),
+    input: Optional[Path] = typer.Option(
+        None,
+        "--input",
+        "-i",
+        help="File with one repository URL per line, or - for stdin.",
+    ),
+    state: Path = typer.Option(
+        ...,
+        "--state",
+        dir_okay=False,
+        help="State file of the previous run. A missing file means all "
+        "repositories are stale.",
+    ),
+    update: bool = typer.Option(
+        False,
+        "--update",
+        help="Record the current state of the repositories in the state file.",
+    ),
+    base_url: Optional[str] = typer.Option(
+        None,
+        "--base-url",
+        help="Specify the base URL of the git provider. Inferred by default.",
+    ),
+):
+    """Print the URLs of repositories which changed since the state file
+    was updated, one per line. Only the HEAD of each repository is
+    checked, with batched API queries where possible."""
+    import sys
+
+    from gimie.changes import (
+        check_repositories,
+        find_stale,
+        load_state,
+        save_state,
+    )
+
+    urls = list(urls or [])
+    if input is not None:
+        text = sys.stdin.read() if str(input) == "-" else input.read_text()
+        urls += [line.strip() for line in text.splitlines() if line.strip()]
+    if not urls:
+        typer.echo("No repository URLs given.", err=True)
+        raise typer.Exit(code=1)
+
+    previous = load_state(state)
+    states = check_repositories(urls, base_url=base_url)
+    for url in find_stale(states, previous):
+        typer.echo(url)
+    if update:
+        # Unresolved repositories keep their previous state
+        previous.update(
+            (url, current)
+            for url, current in states.items()
+            if current.head is not None
+        )
+        save_state(state, previous)
 
 
 @app.command()
@@ -130,6 +382,96 @@ def parsers(
     typer.echo(message)
 
 
+@licenses_app.command("add")
+def licenses_add(
+    license_id: str = typer.Argument(
+        ..., help="Identifier of the license, e.g. LicenseRef-Acme-1.0."
+    ),
+    file: Path = typer.Argument(
+        ..., exists=True, dir_okay=False, help="File with the license text."
+    ),
+    url: Optional[str] = typer.Option(
+        None,
+        "--url",
+        help="URL of the license in the output graph. Defaults to an URL in the gimie namespace.",
+    ),
+):
+    """Register a custom license text, without modifying the shipped model."""
+    from gimie.parsers.license.custom import add_custom_license
+
+    try:
+        add_custom_license(license_id, file.read_text(), url=url)
+    except ValueError as err:
+        typer.echo(err, err=True)
+        raise typer.Exit(code=1)
+    typer.echo(f"Added custom license {license_id}.")
+
+
+@licenses_app.command("build")
+def licenses_build(
+    source: Path = typer.Argument(
+        ...,
+        exists=True,
+        help="Local checkout or tarball of the SPDX license-list-data repository.",
+    ),
+    output: Path = typer.Option(
+        Path("."),
+        "--output",
+        "-o",
+        file_okay=False,
+        help="Directory where the model and its manifest are written.",
+    ),
+    all_licenses: bool = typer.Option(
+        False,
+        "--all",
+        help="Include licenses which are not OSI approved and license "
+        "exceptions in the tf-idf model.",
+    ),
+    jobs: Optional[int] = typer.Option(
+        None, "--jobs", "-j", help="Number of tokenization processes."
+    ),
+):
+    """Build the license model from SPDX license data, offline."""
+    from gimie.parsers.license.build import build_license_model
+
+    manifest = build_license_model(
+        source,
+        output,
+        osi_only=not all_licenses,
+        include_exceptions=all_licenses,
+        jobs=jobs,
+    )
+    typer.echo(
+        f"Built model of {manifest['n_licenses']} licenses from SPDX "
+        f"license list {manifest['spdx']['licenseListVersion']} "
+        f"(sha256: {manifest['artifact']['sha256']})."
+    )
+
+
+@licenses_app.command("remove")
+def licenses_remove(license_id: str):
+    """Unregister a custom license."""
+    from gimie.parsers.license.custom import remove_custom_license
+
+    if not remove_custom_license(license_id):
+        typer.echo(f"No custom license {license_id}.", err=True)
+        raise typer.Exit(code=1)
+    typer.echo(f"Removed custom license {license_id}.")
+
+
+@licenses_app.command("list")
+def licenses_list():
+    """List custom licenses and their URLs."""
+    from gimie.parsers.license.custom import load_custom_licenses
+
+    custom = load_custom_licenses()
+    for license_id, url in (
+        zip(custom.license_ids, custom.urls) if custom else []
+    ):
+        title = typer.style(license_id, fg=typer.colors.GREEN, bold=True)
+        typer.echo(f"{title} - {url}")
+
+
 typer_cli = typer.main.get_command(app)
 cli.add_command(typer_cli, "cli")
 
@@ -15,20 +15,43 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-"""Git providers from which metadata can be extracted by gimie."""
+"""Git providers from which metadata can be extracted by gimie.
 
-from typing import Dict, Optional, Type
-from gimie.extractors.abstract import Extractor
-from gimie.extractors.github import GithubExtractor
-from gimie.extractors.gitlab import GitlabExtractor
-from gimie.extractors.git import GitExtractor
+Extractor modules are only imported when their provider is used.
+Third-party providers are registered as entry points of the
+"gimie.extractors" group, pointing to an Extractor subclass.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Optional, Type
+
+from gimie.plugins import PluginRegistry
 from gimie.utils.uri import validate_url
 
-GIT_PROVIDERS: Dict[str, Type[Extractor]] = {
-    "git": GitExtractor,
-    "github": GithubExtractor,
-    "gitlab": GitlabExtractor,
-}
+if TYPE_CHECKING:
+    from gimie.extractors.abstract import Extractor
+
+GIT_PROVIDERS: PluginRegistry[str, Type[Extractor]] = PluginRegistry(
+    "gimie.extractors",
+    {
+        "git": "gimie.extractors.git:GitExtractor",
+        "github": "gimie.extractors.github:GithubExtractor",
+        "gitlab": "gimie.extractors.gitlab:GitlabExtractor",
+    },
+)
+
+
+def __getattr__(name: str):
+    """Import extractor classes lazily, e.g. gimie.extractors.GitExtractor."""
+    if name == "Extractor":
+        from gimie.extractors.abstract import Extractor
+
+        return Extractor
+    for target in GIT_PROVIDERS.specs().values():
+        if target.endswith(f":{name}"):
+            return GIT_PROVIDERS.load(target)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def get_extractor(
@@ -53,6 +53,12 @@ class Extractor(ABC):
         """List all files in the repository HEAD."""
         ...
 
+    def resolve_head(self) -> Optional[str]:
+        """Return the commit id of the repository HEAD, or None if it
+        cannot be resolved. This is much cheaper than extract(), and tells
+        whether the repository changed since a previous extraction."""
+        return None
+
     @property
     def path(self) -> str:
         """Path to the repository without the base URL."""
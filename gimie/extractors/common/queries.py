@@ -14,18 +14,89 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+from functools import lru_cache
+import threading
 import requests
-from typing import Any, Dict, List, Union
+from requests.adapters import HTTPAdapter
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from gimie.utils.metrics import record_bytes, record_cache, record_request
+from gimie.utils.profiling import add_bytes, add_request, profiling, stage
+
+# Connections kept open per host, enough for concurrent extractions
+POOL_SIZE = 32
+# Logins verified during the process lifetime, by endpoint and credentials
+_LOGINS: Dict[Tuple[str, str], str] = {}
+_LOGINS_LOCK = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def get_session() -> requests.Session:
+    """HTTP session shared by all API and file requests, so that
+    connections are reused across requests and extractions."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_login(url: str, headers: Dict[str, str]) -> Optional[str]:
+    """Login of the user authenticated by headers at the /user endpoint
+    url, or None if authentication fails. Successful logins are cached, so
+    that long-running processes check each token once."""
+    key = (url, headers.get("Authorization", ""))
+    with _LOGINS_LOCK:
+        login = _LOGINS.get(key)
+    record_cache("login", login is not None)
+    if login is not None:
+        return login
+    resp = get_session().get(url, headers=headers)
+    record_response(resp)
+    try:
+        login = resp.json().get("login") if resp.ok else None
+    except requests.exceptions.JSONDecodeError:
+        login = None
+    if login:
+        with _LOGINS_LOCK:
+            _LOGINS[key] = login
+    return login or None
+
+
+def record_response(resp: requests.Response):
+    """Report an API response to the metrics registry."""
+    record_request(
+        resp.url,
+        resp.request.method or "GET",
+        resp.status_code,
+        resp.elapsed.total_seconds(),
+        resp.headers,
+    )
+    record_bytes(resp.url, len(resp.content))
+
+
+def query_cost(resp: requests.Response) -> float:
+    """Rate limit points consumed by a GraphQL query, as reported by
+    GitHub when the query selects ``rateLimit { cost }``. Other queries
+    count as one point."""
+    try:
+        return float(resp.json()["data"]["rateLimit"]["cost"])
+    except (ValueError, KeyError, TypeError):
+        return 1.0
 
 
 def send_rest_query(
     api: str, query: str, headers: Dict[str, str]
 ) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
     """Generic function to send a query to the GitHub/GitLab rest API."""
-    resp = requests.get(
-        url=f"{api}/{query}",
-        headers=headers,
-    )
+    with stage("api.rest"):
+        resp = get_session().get(
+            url=f"{api}/{query}",
+            headers=headers,
+        )
+        add_bytes(len(resp.content))
+        add_request()
+    record_response(resp)
 
     if resp.status_code != 200:
         try:
@@ -45,14 +116,19 @@ def send_graphql_query(
     api: str, query: str, data: Dict[str, Any], headers: Dict[str, str]
 ) -> Dict[str, Any]:
     """Generic function to send a GraphQL query to the GitHub/GitLab API."""
-    resp = requests.post(
-        url=f"{api}/graphql",
-        json={
-            "query": query,
-            "variables": data,
-        },
-        headers=headers,
-    )
+    with stage("api.graphql"):
+        resp = get_session().post(
+            url=f"{api}/graphql",
+            json={
+                "query": query,
+                "variables": data,
+            },
+            headers=headers,
+        )
+        add_bytes(len(resp.content))
+        if profiling():
+            add_request(query_cost(resp))
+    record_response(resp)
 
     if resp.status_code != 200:
         try:
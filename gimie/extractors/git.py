@@ -16,24 +16,29 @@
 # limitations under the License.
 """Extractor which uses a locally available (usually cloned) repository."""
 
+from __future__ import annotations
+
 from dataclasses import dataclass
 from datetime import datetime
 from functools import cached_property
 import os
 import shutil
 import tempfile
-from typing import List, Optional
+import time
+from typing import TYPE_CHECKING, List, Optional
 import uuid
 
-import git
-import pydriller
-
 from gimie.io import LocalResource
 from gimie.models import Person, Repository
 from gimie.extractors.abstract import Extractor
+from gimie.utils.metrics import record_clone
+from gimie.utils.profiling import add_bytes, profiling, stage
 from gimie.utils.uri import sanitize_identifier
 from pathlib import Path
 
+if TYPE_CHECKING:
+    import pydriller
+
 
 @dataclass
 class GitExtractor(Extractor):
@@ -66,17 +71,34 @@ class GitExtractor(Extractor):
         # Assuming author is the first person to commit
         self.repository = self._repo_data
 
-        repo_meta = dict(
-            authors=[self._get_creator()],
-            contributors=self._get_contributors(),
-            date_created=self._get_creation_date(),
-            date_modified=self._get_modification_date(),
-            name=self.path,
-            url=self.url,
-        )
+        with stage("git.history"):
+            repo_meta = dict(
+                authors=[self._get_creator()],
+                contributors=self._get_contributors(),
+                date_created=self._get_creation_date(),
+                date_modified=self._get_modification_date(),
+                name=self.path,
+                url=self.url,
+            )
 
         return Repository(**repo_meta)  # type: ignore
 
+    def resolve_head(self) -> Optional[str]:
+        """Return the commit id of HEAD, from the local repository if it
+        exists, otherwise with git ls-remote."""
+        import git
+        from git.cmd import Git
+
+        if self.local_path and Path(self.local_path, ".git").exists():
+            try:
+                return git.Repo(self.local_path).head.commit.hexsha
+            except ValueError:
+                # No commits yet
+                return None
+        with stage("git.ls_remote"):
+            output = str(Git().ls_remote(self.url, "HEAD"))
+        return output.split()[0] if output else None
+
     def list_files(self) -> List[LocalResource]:
         self.repository = self._repo_data
         file_list = []
@@ -106,10 +128,26 @@ class GitExtractor(Extractor):
     @cached_property
     def _repo_data(self) -> pydriller.Repository:
         """Get the repository data by accessing local data or cloning."""
+        # GitPython and pydriller are slow to import: only load them here
+        import git
+        import pydriller
+
         if self.local_path is None:
             self._cloned = True
             self.local_path = tempfile.TemporaryDirectory().name
-            git.Repo.clone_from(self.url, self.local_path)  # type: ignore
+            start = time.perf_counter()
+            success = False
+            try:
+                with stage("git.clone"):
+                    git.Repo.clone_from(self.url, self.local_path)  # type: ignore
+                    if profiling():
+                        # The object store approximates the transfer size
+                        add_bytes(
+                            _directory_size(Path(self.local_path, ".git"))
+                        )
+                success = True
+            finally:
+                record_clone(time.perf_counter() - start, success)
         return pydriller.Repository(self.local_path)
 
     def _get_contributors(self) -> List[Person]:
@@ -161,3 +199,12 @@ class GitExtractor(Extractor):
             name=name,
             email=email,
         )
+
+
+def _directory_size(path: Path) -> int:
+    """Total size of the files in a directory tree, in bytes."""
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path)
+        for name in names
+    )
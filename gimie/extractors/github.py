@@ -23,7 +23,6 @@ import os
 import requests
 from typing import Any, Dict, List, Optional, Union
 from urllib.parse import urlparse
-from dotenv import load_dotenv
 
 from gimie.extractors.abstract import Extractor
 from gimie.models import (
@@ -34,16 +33,16 @@ from gimie.models import (
 
 from gimie.io import RemoteResource
 from gimie.extractors.common.queries import (
+    get_login,
     send_rest_query,
     send_graphql_query,
 )
 
 GH_API = "https://api.github.com"
-load_dotenv()
 
 
 def query_contributors(
-    url: str, headers: Dict[str, str]
+    url: str, headers: Dict[str, str], api: str = GH_API
 ) -> List[Dict[str, Any]]:
     """Queries the list of contributors of target repository
     using GitHub's REST and GraphQL APIs. Returns a list of GraphQL User nodes.
@@ -52,7 +51,7 @@ def query_contributors(
     owner, name = urlparse(url).path.strip("/").split("/")
     # Get contributors (available in the REST API but not GraphQL)
     data = f"repos/{owner}/{name}/contributors"
-    contributors = send_rest_query(GH_API, data, headers=headers)
+    contributors = send_rest_query(api, data, headers=headers)
     ids = [contributor["node_id"] for contributor in contributors]
     # Get all contributors' metadata in 1 GraphQL query
     users_query = """
@@ -75,10 +74,13 @@ def query_contributors(
                 url
             }
         }
+        rateLimit {
+            cost
+        }
     }"""
 
     contributors = send_graphql_query(
-        GH_API, users_query, data={"ids": ids}, headers=headers
+        api, users_query, data={"ids": ids}, headers=headers
     )
     # Drop empty users (e.g. dependabot)
     return [user for user in contributors["data"]["nodes"] if user]
@@ -231,21 +233,54 @@ class GithubExtractor(Extractor):
                 updatedAt
                 url
             }
+            rateLimit {
+                cost
+            }
         }
         """
-        response = send_graphql_query(GH_API, repo_query, data, self._headers)
+        response = send_graphql_query(
+            self.api_url, repo_query, data, self._headers
+        )
 
         if "errors" in response:
             raise ValueError(response["errors"])
 
         return response["data"]["repository"]
 
+    def resolve_head(self) -> Optional[str]:
+        """Return the commit id of the default branch HEAD."""
+        owner, name = self.path.split("/")
+        head_query = """
+        query head($owner: String!, $name: String!) {
+            repository(name: $name, owner: $owner) {
+                defaultBranchRef {
+                    target {
+                        oid
+                    }
+                }
+            }
+            rateLimit {
+                cost
+            }
+        }
+        """
+        response = send_graphql_query(
+            self.api_url,
+            head_query,
+            {"owner": owner, "name": name},
+            self._headers,
+        )
+        if "errors" in response:
+            raise ValueError(response["errors"])
+        ref = response["data"]["repository"]["defaultBranchRef"]
+        return ref["target"]["oid"] if ref else None
+
     def _fetch_contributors(self) -> List[Person]:
         """Queries the GitHub GraphQL API to extract contributors through the commit list.
         NOTE: This is a workaround for the lack of a contributors field in the GraphQL API.
         """
         contributors = []
-        resp = query_contributors(self.url, self._headers)
+        resp = query_contributors(self.url, self._headers, self.api_url)
         for user in resp:
             contributors.append(self._get_user(user))
         return list(contributors)
@@ -255,6 +290,10 @@ class GithubExtractor(Extractor):
         """Set authentication headers for GitHub API requests."""
         try:
             if not self.token:
+                # Only look for a .env file when a token is needed
+                from dotenv import load_dotenv
+
+                load_dotenv()
                 self.token = os.environ.get("GITHUB_TOKEN")
                 if not self.token:
                     raise ValueError(
@@ -263,8 +302,7 @@ class GithubExtractor(Extractor):
                     )
             headers = {"Authorization": f"token {self.token}"}
 
-            login = requests.get(f"{GH_API}/user", headers=headers)
-            if not login.ok or not login.json().get("login"):
+            if not get_login(f"{self.api_url}/user", headers):
                 raise ValueError(
                     "GitHub authentication failed. Please check that your GITHUB_TOKEN is valid."
                 )
@@ -272,6 +310,12 @@ class GithubExtractor(Extractor):
         except requests.exceptions.RequestException as e:
             raise ConnectionError(f"Failed to connect to GitHub API: {str(e)}")
 
+    @property
+    def api_url(self) -> str:
+        """Root URL of the GitHub API. It can be set with the GITHUB_API_URL
+        environment variable, e.g. for GitHub Enterprise Server."""
+        return os.environ.get("GITHUB_API_URL", GH_API).rstrip("/")
+
     def _get_keywords(self, *nodes: Dict[str, Any]) -> List[str]:
         """Extract names from GraphQL topic nodes."""
         return [node["topic"]["name"] for node in nodes]
@@ -17,13 +17,11 @@
 from __future__ import annotations
 from dataclasses import dataclass
 import os
-import requests
 from datetime import datetime
 from dateutil.parser import isoparse
 from functools import cached_property
 from typing import Any, Dict, List, Optional, Union
 from urllib.parse import urlparse
-from dotenv import load_dotenv
 from gimie.io import RemoteResource
 from gimie.models import (
     Organization,
@@ -31,9 +29,11 @@ from gimie.models import (
     Repository,
 )
 from gimie.extractors.abstract import Extractor
-from gimie.extractors.common.queries import send_graphql_query, send_rest_query
-
-load_dotenv()
+from gimie.extractors.common.queries import (
+    get_login,
+    send_graphql_query,
+    send_rest_query,
+)
 
 
 @dataclass
@@ -149,6 +149,36 @@ class GitlabExtractor(Extractor):
         uniq_contrib = list({c["id"]: c for c in contributors}.values())
         return [self._get_user(contrib) for contrib in uniq_contrib]
 
+    def resolve_head(self) -> Optional[str]:
+        """Return the commit id of the default branch HEAD."""
+        head_query = """
+        query head($path: ID!) {
+            project(fullPath: $path) {
+                repository {
+                    tree {
+                        lastCommit {
+                            sha
+                        }
+                    }
+                }
+            }
+        }
+        """
+        response = send_graphql_query(
+            self.graphql_endpoint,
+            head_query,
+            {"path": self.path},
+            self._headers,
+        )
+        if "errors" in response:
+            raise ValueError(response["errors"])
+        try:
+            project = response["data"]["project"]
+            return project["repository"]["tree"]["lastCommit"]["sha"]
+        except (KeyError, TypeError):
+            # Unknown project or empty repository
+            return None
+
     @cached_property
     def _repo_data(self) -> Dict[str, Any]:
         """Fetch repository metadata from GraphQL endpoint."""
@@ -238,12 +268,15 @@ class GitlabExtractor(Extractor):
         """Set authentication headers for Gitlab API requests."""
         try:
             if not self.token:
+                # Only look for a .env file when a token is needed
+                from dotenv import load_dotenv
+
+                load_dotenv()
                 self.token = os.environ.get("GITLAB_TOKEN")
                 assert self.token
             headers = {"Authorization": f"token {self.token}"}
 
-            login = requests.get(f"{self.rest_endpoint}/user", headers=headers)
-            assert login.json().get("login")
+            assert get_login(f"{self.rest_endpoint}/user", headers)
         except AssertionError:
             return {}
         else:
@@ -14,8 +14,52 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-from typing import Tuple, Union
+from typing import Any, List, Protocol, Tuple, Union
 
 from rdflib.term import Literal, URIRef
 
 Property = Tuple[URIRef, Union[URIRef, Literal]]
+Triple = Tuple[URIRef, URIRef, Union[URIRef, Literal]]
+
+
+class TripleSink(Protocol):
+    """Anything triples can be added to, e.g. an rdflib Graph."""
+
+    def add(self, triple: Triple) -> Any: ...
+
+
+class TripleBuffer(List[Triple]):
+    """Triple sink keeping triples in a list, in the order they were
+    added. Used to collect triples before replaying them into another
+    sink, e.g. from worker threads.
+
+    Examples
+    --------
+    >>> buffer = TripleBuffer()
+    >>> buffer.add((URIRef("s"), URIRef("p"), Literal("o")))
+    >>> len(buffer)
+    1
+    """
+
+    def add(self, triple: Triple):
+        self.append(triple)
+
+
+class TeeSink:
+    """Triple sink adding each triple to several sinks, e.g. to stream
+    triples while also keeping them.
+
+    Examples
+    --------
+    >>> first, second = TripleBuffer(), TripleBuffer()
+    >>> TeeSink(first, second).add((URIRef("s"), URIRef("p"), Literal("o")))
+    >>> first == second
+    True
+    """
+
+    def __init__(self, *sinks: TripleSink):
+        self.sinks = sinks
+
+    def add(self, triple: Triple):
+        for sink in self.sinks:
+            sink.add(triple)
@@ -0,0 +1,176 @@
+# Gimie
+# Copyright 2022 - Swiss Data Science Center (SDSC)
+# A partnership between École Polytechnique Fédérale de Lausanne (EPFL) and
+# Eidgenössische Technische Hochschule Zürich (ETHZ).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Streaming N-Triples and N-Quads writer. Triples are written to the
+output as soon as they are added, without building a graph."""
+
+from contextlib import contextmanager
+import gzip
+import re
+import sys
+from typing import Iterator, Optional, Set, TextIO
+
+from rdflib.term import BNode, Literal, Node, URIRef
+
+from gimie.graph import Triple
+
+# Characters which must be escaped in N-Triples IRIs
+_IRI_ESCAPE = re.compile(r'[\x00-\x20<>"{}|^`\\]')
+_LITERAL_ESCAPE = re.compile(r'["\\\n\r]')
+_LITERAL_ESCAPES = {'"': '\\"', "\\": "\\\\", "\n": "\\n", "\r": "\\r"}
+_BNODE_INVALID = re.compile(r"[^A-Za-z0-9_]")
+
+
+def escape_iri(iri: str) -> str:
+    """Escape characters not allowed in N-Triples IRIs.
+
+    Examples
+    --------
+    >>> escape_iri("https://example.org/a b")
+    'https://example.org/a\\\\u0020b'
+    """
+    return _IRI_ESCAPE.sub(lambda m: f"\\u{ord(m.group()):04X}", iri)
+
+
+def escape_literal(value: str) -> str:
+    """Escape the lexical form of a literal for N-Triples.
+
+    Examples
+    --------
+    >>> print(escape_literal('say "hi"\\n'))
+    say \\"hi\\"\\n
+    """
+    return _LITERAL_ESCAPE.sub(lambda m: _LITERAL_ESCAPES[m.group()], value)
+
+
+def format_term(term: Node) -> str:
+    """Format an RDF term in N-Triples syntax.
+
+    Examples
+    --------
+    >>> from rdflib.namespace import XSD
+    >>> format_term(URIRef("https://example.org"))
+    '<https://example.org>'
+    >>> format_term(Literal("2023-01-02", datatype=XSD.date))
+    '"2023-01-02"^^<http://www.w3.org/2001/XMLSchema#date>'
+    >>> format_term(Literal("Hallo", lang="de"))
+    '"Hallo"@de'
+    """
+    if isinstance(term, URIRef):
+        return f"<{escape_iri(term)}>"
+    if isinstance(term, Literal):
+        lexical = f'"{escape_literal(str(term))}"'
+        if term.language:
+            return f"{lexical}@{term.language}"
+        if term.datatype:
+            return f"{lexical}^^<{escape_iri(term.datatype)}>"
+        return lexical
+    if isinstance(term, BNode):
+        return f"_:{_BNODE_INVALID.sub('_', term)}"
+    raise TypeError(f"Cannot serialize {term!r} to N-Triples.")
+
+
+class NTriplesWriter:
+    """Triple sink writing N-Triples, or N-Quads when a graph name is set,
+    to a text stream. Duplicate triples are skipped within each graph; the
+    set of seen lines is cleared when starting a new graph, so that memory
+    only depends on the size of one graph.
+
+    Parameters
+    ----------
+    stream:
+        Text stream to write to.
+    graph:
+        Name of the graph triples belong to. If set, N-Quads are written.
+    dedupe:
+        Whether to skip duplicate triples within a graph.
+
+    Examples
+    --------
+    >>> import io
+    >>> out = io.StringIO()
+    >>> writer = NTriplesWriter(out)
+    >>> s = URIRef("https://example.org/repo")
+    >>> writer.add((s, URIRef("http://schema.org/name"), Literal("repo")))
+    >>> writer.add((s, URIRef("http://schema.org/name"), Literal("repo")))
+    >>> print(out.getvalue(), end="")
+    <https://example.org/repo> <http://schema.org/name> "repo" .
+    """
+
+    def __init__(
+        self,
+        stream: TextIO,
+        graph: Optional[str] = None,
+        dedupe: bool = True,
+    ):
+        self.stream = stream
+        self.dedupe = dedupe
+        self.count = 0
+        self._seen: Set[str] = set()
+        self._suffix = " .\n"
+        self.start_graph(graph)
+
+    def start_graph(self, graph: Optional[str] = None):
+        """Write subsequent triples to a new graph. If graph is None,
+        N-Triples are written."""
+        self._seen.clear()
+        if graph is None:
+            self._suffix = " .\n"
+        else:
+            self._suffix = f" {format_term(URIRef(graph))} .\n"
+
+    def add(self, triple: Triple):
+        """Write a triple, unless it was already written to this graph."""
+        s, p, o = triple
+        line = f"{format_term(s)} {format_term(p)} {format_term(o)}"
+        if self.dedupe:
+            if line in self._seen:
+                return
+            self._seen.add(line)
+        self.stream.write(line + self._suffix)
+        self.count += 1
+
+
+@contextmanager
+def open_output(
+    path: Optional[str] = None, compress: Optional[bool] = None
+) -> Iterator[TextIO]:
+    """Open a text output stream. Writes to stdout if path is None or "-".
+    Output is gzip-compressed if compress is True, or if it is None and
+    path ends with ".gz".
+
+    Parameters
+    ----------
+    path:
+        Output file path.
+    compress:
+        Whether to gzip the output. Inferred from the path by default.
+    """
+    if compress is None:
+        compress = path is not None and path.endswith(".gz")
+    if path is None or path == "-":
+        if not compress:
+            yield sys.stdout
+            return
+        with gzip.open(sys.stdout.buffer, "wt", encoding="utf-8") as fp:
+            yield fp
+        return
+    if compress:
+        with gzip.open(path, "wt", encoding="utf-8") as fp:
+            yield fp
+        return
+    with open(path, "w", encoding="utf-8") as fp:
+        yield fp
@@ -16,8 +16,7 @@
 # limitations under the License.
 """Operations on graphs."""
 
-from functools import reduce
-from typing import Set
+from typing import Optional, Set
 
 from rdflib import Graph
 from rdflib.term import URIRef
@@ -25,16 +24,24 @@ from rdflib.term import URIRef
 from gimie.graph import Property
 
 
-def combine_graphs(*graphs: Graph) -> Graph:
+def combine_graphs(*graphs: Graph, into: Optional[Graph] = None) -> Graph:
     """Combines an arbitrary number of input graphs
-    into a single graph."""
-    return reduce(lambda g1, g2: g1 | g2, graphs)
+    into a single graph. Triples are copied once into a new graph,
+    or into the given graph in place."""
+    combined = Graph() if into is None else into
+    for graph in graphs:
+        if graph is not combined:
+            combined += graph
+    return combined
 
 
-def properties_to_graph(uri: URIRef, properties: Set[Property]) -> Graph:
+def properties_to_graph(
+    uri: URIRef, properties: Set[Property], graph: Optional[Graph] = None
+) -> Graph:
     """Attaches a set of predicate-object tuples to input
-    URI to produce an RDF graph."""
-    g = Graph()
+    URI to produce an RDF graph. If a graph is given, triples are
+    added to it in place."""
+    g = Graph() if graph is None else graph
     for pred, obj in properties:
         g.add((uri, pred, obj))
     return g
@@ -19,7 +19,6 @@
 import io
 import os
 from pathlib import Path
-import requests
 from typing import Iterator, Optional, Union
 
 
@@ -77,10 +76,34 @@ class RemoteResource(Resource):
         self.headers = headers or {}
 
     def open(self) -> io.RawIOBase:
-        resp = requests.get(
-            self.url, headers=self.headers, stream=True
-        ).iter_content(chunk_size=128)
-        return IterStream(resp)
+        from gimie.extractors.common.queries import get_session
+        from gimie.utils.metrics import record_request
+        from gimie.utils.profiling import add_request
+
+        resp = get_session().get(self.url, headers=self.headers, stream=True)
+        add_request()
+        record_request(
+            self.url,
+            "GET",
+            resp.status_code,
+            resp.elapsed.total_seconds(),
+            resp.headers,
+            endpoint="raw",
+        )
+        return IterStream(_count_bytes(self.url, resp.iter_content(128)))
+
+
+def _count_bytes(url: str, chunks: Iterator[bytes]) -> Iterator[bytes]:
+    """Pass chunks through, reporting their total size once consumed."""
+    from gimie.utils.metrics import record_bytes
+
+    total = 0
+    try:
+        for chunk in chunks:
+            total += len(chunk)
+            yield chunk
+    finally:
+        record_bytes(url, total, endpoint="raw")
 
 
 class IterStream(io.RawIOBase):
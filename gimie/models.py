@@ -18,15 +18,33 @@
 
 from __future__ import annotations
 from dataclasses import dataclass, field
-from datetime import datetime
-from typing import List, Optional, Union
+from datetime import date, datetime
+import json
+from typing import Any, Dict, Iterable, List, Optional, Union
 
 from calamus.schema import JsonLDSchema
 from calamus import fields
-from rdflib import Graph
+from rdflib import RDF, XSD, Graph
+from rdflib.term import Literal, URIRef
 
+from gimie.graph import TripleSink
 from gimie.graph.namespaces import SDO
 
+# Fixed context of the native JSON-LD output: schema.org terms, with
+# IRI-valued and date properties coerced to the right type.
+JSONLD_CONTEXT: Dict[str, Any] = {
+    "@vocab": str(SDO),
+    "xsd": str(XSD),
+    "codeRepository": {"@type": "@id"},
+    "downloadUrl": {"@type": "@id"},
+    "isBasedOn": {"@type": "@id"},
+    "license": {"@type": "@id"},
+    "logo": {"@type": "@id"},
+    "dateCreated": {"@type": "xsd:date"},
+    "dateModified": {"@type": "xsd:date"},
+    "datePublished": {"@type": "xsd:date"},
+}
+
 
 @dataclass(order=True)
 class Release:
@@ -59,6 +77,31 @@ class Organization:
     description: Optional[str] = None
     logo: Optional[str] = None
 
+    def emit(self, sink: TripleSink) -> URIRef:
+        """Add the triples describing the organization to sink and
+        return its node."""
+        node = URIRef(self._id)
+        sink.add((node, RDF.type, SDO.Organization))
+        _add_literal(sink, node, SDO.name, self.name)
+        _add_literal(sink, node, SDO.legalName, self.legal_name)
+        _add_literal(sink, node, SDO.email, self.email)
+        _add_literal(sink, node, SDO.description, self.description)
+        _add_iri(sink, node, SDO.logo, self.logo)
+        return node
+
+    def to_jsonld(self) -> Dict[str, Any]:
+        """Return the organization as a JSON-LD node object, using the
+        terms of JSONLD_CONTEXT."""
+        return _node(
+            self._id,
+            "Organization",
+            name=self.name,
+            legalName=self.legal_name,
+            email=self.email,
+            description=self.description,
+            logo=self.logo,
+        )
+
 
 class OrganizationSchema(JsonLDSchema):
     _id = fields.Id()
@@ -93,6 +136,30 @@ class Person:
         )
         return f"{self.identifier} {name}{email}{orgs}".strip(" ")
 
+    def emit(self, sink: TripleSink) -> URIRef:
+        """Add the triples describing the person and their affiliations
+        to sink and return its node."""
+        node = URIRef(self._id)
+        sink.add((node, RDF.type, SDO.Person))
+        _add_literal(sink, node, SDO.identifier, self.identifier)
+        _add_literal(sink, node, SDO.name, self.name)
+        _add_literal(sink, node, SDO.email, self.email)
+        for org in self.affiliations or []:
+            sink.add((node, SDO.affiliation, org.emit(sink)))
+        return node
+
+    def to_jsonld(self) -> Dict[str, Any]:
+        """Return the person and their affiliations as a JSON-LD node
+        object, using the terms of JSONLD_CONTEXT."""
+        return _node(
+            self._id,
+            "Person",
+            identifier=self.identifier,
+            name=self.name,
+            email=self.email,
+            affiliation=[org.to_jsonld() for org in self.affiliations or []],
+        )
+
 
 class PersonSchema(JsonLDSchema):
     _id = fields.Id()
@@ -139,18 +206,72 @@ class Repository:
 
     def to_graph(self) -> Graph:
         """Convert repository to RDF graph."""
-        jd = RepositorySchema().dumps(self)
-        g: Graph = Graph().parse(format="json-ld", data=str(jd))
+        g = Graph()
         g.bind("schema", SDO)
+        self.emit(g)
         return g
 
+    def emit(self, sink: TripleSink) -> URIRef:
+        """Add the triples describing the repository, its authors and
+        contributors to sink and return its node. The predicates and
+        datatypes are those of :class:`RepositorySchema`, without going
+        through JSON-LD."""
+        node = URIRef(self._id)
+        sink.add((node, RDF.type, SDO.SoftwareSourceCode))
+        for author in self.authors or []:
+            sink.add((node, SDO.author, author.emit(sink)))
+        for contributor in self.contributors or []:
+            sink.add((node, SDO.contributor, contributor.emit(sink)))
+        _add_date(sink, node, SDO.dateCreated, self.date_created)
+        _add_date(sink, node, SDO.dateModified, self.date_modified)
+        _add_date(sink, node, SDO.datePublished, self.date_published)
+        _add_literal(sink, node, SDO.description, self.description)
+        _add_iri(sink, node, SDO.downloadUrl, self.download_url)
+        _add_literal(sink, node, SDO.identifier, self.identifier)
+        _add_literals(sink, node, SDO.keywords, self.keywords)
+        _add_iris(sink, node, SDO.license, self.licenses)
+        _add_literal(sink, node, SDO.name, self.name)
+        _add_iri(sink, node, SDO.isBasedOn, self.parent_repository)
+        _add_literals(sink, node, SDO.programmingLanguage, self.prog_langs)
+        _add_iri(sink, node, SDO.codeRepository, self.url)
+        _add_literal(sink, node, SDO.version, self.version)
+        return node
+
+    def to_jsonld(self) -> Dict[str, Any]:
+        """Return the repository as a compact JSON-LD document with the
+        fixed JSONLD_CONTEXT, built directly from the dataclass. It
+        describes the same graph as :meth:`to_graph`."""
+        return {
+            "@context": JSONLD_CONTEXT,
+            **_node(
+                self._id,
+                "SoftwareSourceCode",
+                author=[a.to_jsonld() for a in self.authors or []],
+                contributor=[c.to_jsonld() for c in self.contributors or []],
+                dateCreated=_isodate(self.date_created),
+                dateModified=_isodate(self.date_modified),
+                datePublished=_isodate(self.date_published),
+                description=self.description,
+                downloadUrl=self.download_url,
+                identifier=self.identifier,
+                keywords=self.keywords,
+                license=self.licenses,
+                name=self.name,
+                isBasedOn=self.parent_repository,
+                programmingLanguage=self.prog_langs,
+                codeRepository=self.url,
+                version=self.version,
+            ),
+        }
+
     def serialize(self, format: str = "ttl", **kwargs) -> str:
         """Serialize the RDF graph representing the instance."""
         return self.to_graph().serialize(format=format, **kwargs)  # type: ignore
 
-    def jsonld(self) -> str:
-        """Alias for jsonld serialization."""
-        return self.serialize(format="json-ld")
+    def jsonld(self, **kwargs) -> str:
+        """Serialize the repository to compact JSON-LD, without going
+        through rdflib. Keyword arguments are passed to json.dumps."""
+        return json.dumps(self.to_jsonld(), **{"indent": 2, **kwargs})
 
 
 class RepositorySchema(JsonLDSchema):
@@ -179,3 +300,70 @@ class RepositorySchema(JsonLDSchema):
         rdf_type = SDO.SoftwareSourceCode
         model = Repository
         add_value_types = False
+
+
+def _add_literal(
+    sink: TripleSink, node: URIRef, pred: URIRef, value: Optional[str]
+):
+    """Add a plain literal, unless value is None."""
+    if value is not None:
+        sink.add((node, pred, Literal(str(value))))
+
+
+def _add_literals(
+    sink: TripleSink,
+    node: URIRef,
+    pred: URIRef,
+    values: Optional[Iterable[str]],
+):
+    """Add one plain literal per value."""
+    for value in values or []:
+        _add_literal(sink, node, pred, value)
+
+
+def _add_iri(
+    sink: TripleSink, node: URIRef, pred: URIRef, value: Optional[str]
+):
+    """Add an IRI, unless value is None."""
+    if value is not None:
+        sink.add((node, pred, URIRef(value)))
+
+
+def _add_iris(
+    sink: TripleSink,
+    node: URIRef,
+    pred: URIRef,
+    values: Optional[Iterable[str]],
+):
+    """Add one IRI per value."""
+    for value in values or []:
+        _add_iri(sink, node, pred, value)
+
+
+def _add_date(
+    sink: TripleSink, node: URIRef, pred: URIRef, value: Optional[date]
+):
+    """Add the date part of value as an xsd:date literal, like
+    calamus.fields.Date does."""
+    if value is not None:
+        literal = Literal(date.isoformat(value), datatype=XSD.date)
+        sink.add((node, pred, literal))
+
+
+def _node(_id: str, rdf_type: str, **properties: Any) -> Dict[str, Any]:
+    """Build a JSON-LD node object, leaving out missing and empty
+    properties. Strings are kept as is and lists are kept as arrays."""
+    node: Dict[str, Any] = {"@id": _id, "@type": rdf_type}
+    for key, value in properties.items():
+        if value is None or (isinstance(value, list) and not value):
+            continue
+        if isinstance(value, list):
+            node[key] = [v if isinstance(v, dict) else str(v) for v in value]
+        else:
+            node[key] = str(value)
+    return node
+
+
+def _isodate(value: Optional[date]) -> Optional[str]:
+    """Date part of value in ISO format, like calamus.fields.Date."""
+    return None if value is None else date.isoformat(value)
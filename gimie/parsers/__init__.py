@@ -14,31 +14,123 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-"""Files which can be parsed by gimie."""
+"""Files which can be parsed by gimie.
 
+Parser modules, and their dependencies (rdflib, numpy, scipy, ...), are
+only imported when a parser is used, so that listing parsers is cheap.
+Third-party parsers are registered as entry points of the "gimie.parsers"
+group, pointing to a Parser subclass. They are not used by default, and
+are only imported when selected.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from functools import lru_cache
 from pathlib import Path
-from typing import Iterable, NamedTuple, Optional, Set, Type
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    FrozenSet,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Type,
+    TypeVar,
+)
+
+from gimie import logger
+from gimie.parsers.filenames import (
+    LICENSE_PATTERN,
+    FileRule,
+    ParserIndex,
+    is_license_filename,
+)
+from gimie.plugins import PluginRegistry, import_object
+from gimie.utils.profiling import add_bytes, stage, tracing_memory
+
+if TYPE_CHECKING:
+    from gimie.graph import TripleSink
+    from gimie.io import Resource
+    from gimie.parsers.abstract import Parser
+    from gimie.parsers.findings import Finding
 
-from gimie.graph import Property
-from gimie.io import Resource
-from gimie.parsers.abstract import Parser
-from gimie.parsers.license import LicenseParser, is_license_filename
-from gimie.parsers.cff import CffParser
-from gimie.parsers.publiccode import PublicCodeParser
+T = TypeVar("T")
 
-from rdflib import Graph
+# Upper bound on the number of files fetched and parsed concurrently
+MAX_WORKERS = 8
 
 
 class ParserInfo(NamedTuple):
+    """A registered parser.
+
+    Parameters
+    ----------
+    default:
+        Whether the parser is used by default.
+    target:
+        Import path of the parser class, as "module:Class".
+    files:
+        Which files the parser handles. If None, the files attribute of
+        the parser class is used, which requires importing it.
+    """
+
     default: bool
-    type: Type[Parser]
+    target: str
+    files: Optional[FileRule] = None
+
+    @property
+    def type(self) -> Type[Parser]:
+        """The parser class, imported on first access."""
+        return import_object(self.target)
+
+    @property
+    def rule(self) -> FileRule:
+        """Which files the parser handles."""
+        if self.files is not None:
+            return self.files
+        return self.type.files
+
+
+def _plugin_info(target: str) -> ParserInfo:
+    """Parsers from entry points are only used when selected."""
+    return ParserInfo(default=False, target=target)
+
 
+PARSERS: PluginRegistry[ParserInfo, ParserInfo] = PluginRegistry(
+    "gimie.parsers",
+    {
+        # Only parse licenses and citations in the root directory
+        "license": ParserInfo(
+            default=True,
+            target="gimie.parsers.license:LicenseParser",
+            files=FileRule(patterns=(LICENSE_PATTERN,)),
+        ),
+        "cff": ParserInfo(
+            default=True,
+            target="gimie.parsers.cff:CffParser",
+            files=FileRule(filenames=("CITATION.cff",)),
+        ),
+        "publiccode": ParserInfo(
+            default=True,
+            target="gimie.parsers.publiccode:PublicCodeParser",
+            files=FileRule(filenames=("publiccode.yml", "publiccode.yaml")),
+        ),
+    },
+    from_target=_plugin_info,
+    load=lambda info: info,
+)
 
-PARSERS = {
-    "license": ParserInfo(default=True, type=LicenseParser),
-    "cff": ParserInfo(default=True, type=CffParser),
-    "publiccode": ParserInfo(default=True, type=PublicCodeParser),
-}
+
+def __getattr__(name: str):
+    """Import parser classes lazily, e.g. gimie.parsers.CffParser."""
+    for info in PARSERS.specs().values():
+        if info.target.endswith(f":{name}"):
+            return info.type
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def get_parser(name: str) -> Type[Parser]:
@@ -62,12 +154,41 @@ def list_parsers() -> Set[str]:
     return set(PARSERS.keys())
 
 
+def build_parser_index(parsers: Optional[Set[str]] = None) -> ParserIndex:
+    """Build the dispatch index of a collection of parsers. The index
+    should be built once and reused for all files of a repository.
+
+    Parameters
+    ----------
+    parsers:
+        A set of parser names. If None, use the default collection.
+
+    Examples
+    --------
+    >>> index = build_parser_index({"cff"})
+    >>> index.classify(["CITATION.cff", "LICENSE"])
+    ['cff', None]
+    """
+    selected = parsers or list_default_parsers()
+    # Only the selected parsers are looked up, so that plugins which are
+    # not used are never imported.
+    return ParserIndex(
+        {name: PARSERS[name].rule for name in PARSERS if name in selected}
+    )
+
+
+@lru_cache(maxsize=8)
+def _cached_index(parsers: Optional[FrozenSet[str]]) -> ParserIndex:
+    return build_parser_index(set(parsers) if parsers else None)
+
+
 def select_parser(
     path: Path,
     parsers: Optional[Set[str]] = None,
 ) -> Optional[Type[Parser]]:
     """Select the appropriate parser from a collection based on a file path.
-    If no parser is found, return None.
+    If no parser is found, return None. To select parsers for many files,
+    use :func:`build_parser_index` instead.
 
     Parameters
     ----------
@@ -76,33 +197,27 @@ def select_parser(
     parsers:
         A set of parser names. If None, use the default collection.
     """
-    # Only parse licenses and citations in the root directory
-    if is_license_filename(path.name) and len(path.parts) == 1:
-        name = "license"
-    elif path.name == "CITATION.cff" and len(path.parts) == 1:
-        name = "cff"
-    elif (
-        path.name in ("publiccode.yml", "publiccode.yaml")
-        and len(path.parts) == 1
-    ):
-        name = "publiccode"
-    else:
-        return None
-
-    if name not in (parsers or list_parsers()):
-        return None
-    return get_parser(name)
+    key = frozenset(parsers) if parsers else None
+    name = _cached_index(key).select(path)
+    return None if name is None else get_parser(name)
 
 
 def parse_files(
     subject: str,
     files: Iterable[Resource],
     parsers: Optional[Set[str]] = None,
-) -> Graph:
+    graph: Optional[TripleSink] = None,
+    max_workers: Optional[int] = None,
+) -> TripleSink:
     """For each input file, select appropriate parser among a collection and
-    parse its contents. Return the union of all parsed properties in the form of triples.
+    parse its contents. Return the union of all parsed properties in the form of triples,
+    in graph if given.
     If no parser is found for a given file, skip it.
 
+    Matched files are fetched and parsed concurrently on a thread pool.
+    Triples are added to the graph in the order of the input files, so the
+    output does not depend on which file finishes first.
+
     Parameters
     ----------
     subject:
@@ -111,12 +226,111 @@ def parse_files(
         A collection of file-like objects.
     parsers:
         A set of parser names. If None, use the default collection.
+    graph:
+        Graph (or any triple sink) to which triples are added in place.
+        If None, a new graph is created.
+    max_workers:
+        Maximum number of files processed concurrently. Defaults to
+        MAX_WORKERS. Files are processed sequentially if set to 1.
     """
-    parsed_properties = Graph()
-    for file in files:
-        parser = select_parser(file.path, parsers)
-        if not parser:
-            continue
-        data = file.open().read()
-        parsed_properties |= parser(subject).parse(data or b"")
-    return parsed_properties
+    from gimie.graph import TripleBuffer
+
+    if graph is None:
+        from rdflib import Graph
+
+        graph = Graph()
+
+    def parse(
+        file: Resource, data: bytes, parser: Type[Parser]
+    ) -> TripleBuffer:
+        triples = TripleBuffer()
+        parser(subject).parse(data, triples)
+        return triples
+
+    with stage("parse_files"):
+        for triples in _map_files(files, parsers, parse, max_workers):
+            for triple in triples:
+                graph.add(triple)
+    return graph
+
+
+def parse_files_models(
+    subject: str,
+    files: Iterable[Resource],
+    parsers: Optional[Set[str]] = None,
+    max_workers: Optional[int] = None,
+) -> List[Finding]:
+    """Same as :func:`parse_files`, but return the findings of each parser
+    as dataclasses instead of triples. Parsers which do not implement
+    parse_models are skipped.
+
+    Parameters
+    ----------
+    subject:
+        The subject URI of the repository.
+    files:
+        A collection of file-like objects.
+    parsers:
+        A set of parser names. If None, use the default collection.
+    max_workers:
+        Maximum number of files processed concurrently. Defaults to
+        MAX_WORKERS. Files are processed sequentially if set to 1.
+    """
+
+    def parse(
+        file: Resource, data: bytes, parser: Type[Parser]
+    ) -> List[Finding]:
+        try:
+            return parser(subject).parse_models(data)
+        except NotImplementedError as err:
+            logger.warning(f"{err} Skipping {file.path}.")
+            return []
+
+    findings: List[Finding] = []
+    with stage("parse_files"):
+        for file_findings in _map_files(files, parsers, parse, max_workers):
+            findings.extend(file_findings)
+    return findings
+
+
+def _read(file: Resource) -> bytes:
+    """Read the contents of a file, downloading it if remote."""
+    with stage("fetch"):
+        data = file.open().read() or b""
+        add_bytes(len(data))
+    return data
+
+
+def _map_files(
+    files: Iterable[Resource],
+    parsers: Optional[Set[str]],
+    func: Callable[[Resource, bytes, Type[Parser]], T],
+    max_workers: Optional[int] = None,
+) -> List[T]:
+    """Read each file with a matching parser and apply func to the file,
+    its contents and the parser class, on a bounded thread pool. Results
+    are returned in input order. Downloads and file reads release the
+    GIL, as do the numpy parts of license matching."""
+    files = list(files)
+    index = build_parser_index(parsers)
+    matched = [
+        (file, name)
+        for file, name in zip(files, index.classify(f.path for f in files))
+        if name is not None
+    ]
+
+    def run(file: Resource, name: str) -> T:
+        data = _read(file)
+        with stage(f"parse.{name}"):
+            return func(file, data, get_parser(name))
+
+    workers = min(max_workers or MAX_WORKERS, len(matched))
+    # Memory is only measured for stages on the profiling thread
+    if workers <= 1 or tracing_memory():
+        return [run(file, name) for file, name in matched]
+    # Workers run in copies of the caller's context, e.g. to profile them
+    contexts = [copy_context() for _ in matched]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(
+            executor.map(lambda ctx, m: ctx.run(run, *m), contexts, matched)
+        )
@@ -15,10 +15,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 from abc import ABC, abstractmethod
-from functools import reduce
-from typing import Iterable, Set
-from rdflib import Graph, URIRef
-from gimie.graph import Property
+from typing import ClassVar, Iterable, List, Optional, Set
+from gimie.graph import Property, TripleSink
+from gimie.parsers.filenames import FileRule
+from gimie.parsers.findings import Finding
 
 
 class Parser(ABC):
@@ -27,25 +27,62 @@ class Parser(ABC):
     to define a standard interface for all parsers.
 
     All subclasses must implement parse(). A parser parses
-    bytes data into a set of predicate-object tuples.
+    bytes data into triples, which are added in place to the
+    graph passed to parse(), if any. Parsers may also implement
+    parse_models() to return their findings as dataclasses, without
+    creating triples.
 
     Parameters
     ----------
     subject:
         The subject of a triple (subject - predicate - object) to be used for writing parsed properties to.
+        It is kept as a string and only converted to a URI when triples
+        are emitted.
     """
 
+    # Files handled by the parser, used for parsers registered as plugins
+    files: ClassVar[FileRule] = FileRule()
+
     def __init__(self, subject: str):
-        self.subject = URIRef(subject)
+        self.subject = subject
 
     @abstractmethod
-    def parse(self, data: bytes) -> Graph:
-        """Extract rdf graph from a source."""
+    def parse(
+        self, data: bytes, graph: Optional[TripleSink] = None
+    ) -> TripleSink:
+        """Extract rdf triples from a source and add them to graph, or to
+        any other triple sink. A new graph is created if graph is None.
+        Returns the graph or sink."""
         ...
 
-    def parse_all(self, docs: Iterable[bytes]) -> Graph:
+    def parse_models(self, data: bytes) -> List[Finding]:
+        """Extract structured findings from a source, without creating
+        any triples. Findings can later be added to a graph with their
+        emit() method."""
+        raise NotImplementedError(
+            f"{type(self).__name__} does not support parse_models."
+        )
+
+    def emit_findings(
+        self, data: bytes, graph: Optional[TripleSink] = None
+    ) -> TripleSink:
+        """Implementation of parse() for parsers implementing
+        parse_models(): findings are emitted to graph."""
+        from rdflib import Graph
+
+        graph = Graph() if graph is None else graph
+        for finding in self.parse_models(data):
+            finding.emit(graph, self.subject)
+        return graph
+
+    def parse_all(
+        self, docs: Iterable[bytes], graph: Optional[TripleSink] = None
+    ) -> TripleSink:
         """Parse multiple sources and return the union of
         triples."""
+        from rdflib import Graph
 
-        properties = map(self.parse, docs)
-        return reduce(lambda p1, p2: p1 | p2, properties)
+        graph = Graph() if graph is None else graph
+        for doc in docs:
+            self.parse(doc, graph)
+        return graph
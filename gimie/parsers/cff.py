@@ -16,15 +16,14 @@
 # limitations under the License.
 from io import BytesIO
 import re
-from typing import List, Optional, Set
+from typing import Any, List, Optional, Set
 import yaml
-from rdflib.term import URIRef
-from rdflib import Graph, URIRef, Literal
-from rdflib.namespace import RDF
 from gimie import logger
-from gimie.graph.namespaces import SDO, MD4I
+from gimie.graph import TripleSink
 from gimie.parsers.abstract import Parser
+from gimie.parsers.findings import Author, Citation, Finding
 from gimie.utils.uri import is_valid_orcid, extract_doi_match
+from gimie.utils.yaml_loader import load_yaml
 
 
 class CffParser(Parser):
@@ -33,58 +32,39 @@ class CffParser(Parser):
     def __init__(self, subject: str):
         super().__init__(subject)
 
-    def parse(self, data: bytes) -> Graph:
-        """Extracts DOIs and list of authors from a CFF file and returns a
-        graph with triples <subject> <schema:citation> <doi>
-        and a number of author objects with <schema:name> and <md4i:orcid> values.
+    def parse(
+        self, data: bytes, graph: Optional[TripleSink] = None
+    ) -> TripleSink:
+        """Extracts DOIs and list of authors from a CFF file and adds
+        triples <subject> <schema:citation> <doi>
+        and a number of author objects with <schema:name> and <md4i:orcid> values
+        to the graph.
         If no DOIs are found, they will not be included in the graph.
         If no authors are found, they will not be included in the graph.
-        If neither authors nor DOIs are found, an empty graph is returned.
+        If neither authors nor DOIs are found, no triple is added.
         """
-        extracted_cff_triples = Graph()
-        dois = get_cff_doi(data)
-        authors = get_cff_authors(data)
-
-        if dois:
-            for doi in dois:
-                extracted_cff_triples.add(
-                    (self.subject, SDO.citation, URIRef(doi))
-                )
-        if not authors:
-            return extracted_cff_triples
-        for author in authors:
+        return self.emit_findings(data, graph)
+
+    def parse_models(self, data: bytes) -> List[Finding]:
+        """Return the DOIs and the authors with a valid ORCID."""
+        # Parse the file once for both DOIs and authors
+        cff = load_cff(data)
+        if cff is None:
+            return []
+        findings: List[Finding] = [Citation(doi) for doi in cff_doi(cff) or []]
+        for author in cff_authors(cff) or []:
             if is_valid_orcid(author["orcid"]):
-                orcid = URIRef(author["orcid"])
-                extracted_cff_triples.add(
-                    (self.subject, SDO.author, URIRef(orcid))
-                )
-                extracted_cff_triples.add(
-                    (
-                        URIRef(orcid),
-                        SDO.name,
-                        Literal(
-                            author["given-names"]
-                            + " "
-                            + author["family-names"]
-                        ),
-                    )
-                )
-                extracted_cff_triples.add(
-                    (
-                        orcid,
-                        MD4I.orcidId,
-                        Literal(orcid),
+                findings.append(
+                    Author(
+                        _id=author["orcid"],
+                        name=author["given-names"]
+                        + " "
+                        + author["family-names"],
+                        affiliation=author["affiliation"],
+                        orcid=author["orcid"],
                     )
                 )
-                extracted_cff_triples.add(
-                    (
-                        orcid,
-                        SDO.affiliation,
-                        Literal(author["affiliation"]),
-                    )
-                )
-                extracted_cff_triples.add((orcid, RDF.type, SDO.Person))
-        return extracted_cff_triples
+        return findings
 
 
 def doi_to_url(doi: str) -> str:
@@ -120,6 +100,26 @@ def doi_to_url(doi: str) -> str:
     return f"https://doi.org/{doi_match}"
 
 
+CFF_KEYS = ("identifiers", "authors")
+
+
+def load_cff(data: bytes) -> Any:
+    """Load the parts of a CFF file used by gimie. Other keys, such as
+    the potentially large list of references, are not constructed.
+    Returns None if the file is not valid YAML.
+
+    Parameters
+    ----------
+    data
+        The cff file body as bytes.
+    """
+    try:
+        return load_yaml(data.decode(), keys=CFF_KEYS)
+    except yaml.scanner.ScannerError:
+        logger.warning("cannot read CITATION.cff, skipped.")
+        return None
+
+
 def get_cff_doi(data: bytes) -> Optional[list[str]]:
     """Given a CFF file, returns a list of DOIs, if any.
 
@@ -141,13 +141,15 @@ def get_cff_doi(data: bytes) -> Optional[list[str]]:
     ['https://doi.org/10.5281/zenodo.9012']
     >>> get_cff_doi(bytes("abc: def", encoding="utf8"))
     """
-
-    try:
-        cff = yaml.safe_load(data.decode())
-    except yaml.scanner.ScannerError:
-        logger.warning("cannot read CITATION.cff, skipped.")
+    cff = load_cff(data)
+    if cff is None:
         return None
+    return cff_doi(cff)
+
 
+def cff_doi(cff: Any) -> Optional[list[str]]:
+    """Given a loaded CFF document, returns a list of DOIs, if any.
+    See :func:`get_cff_doi`."""
     doi_urls = []
 
     try:
@@ -183,13 +185,15 @@ def get_cff_authors(data: bytes) -> Optional[List[dict[str, str]]]:
         orcid, names strings of authors
 
     """
-
-    try:
-        cff = yaml.safe_load(data.decode())
-    except yaml.scanner.ScannerError:
-        logger.warning("cannot read CITATION.cff, skipped.")
+    cff = load_cff(data)
+    if cff is None:
         return None
+    return cff_authors(cff)
+
 
+def cff_authors(cff: Any) -> Optional[List[dict[str, str]]]:
+    """Given a loaded CFF document, returns the list of authors, if any.
+    See :func:`get_cff_authors`."""
     authors = []
     try:
         for author in cff["authors"]:
@@ -0,0 +1,138 @@
+# Gimie
+# Copyright 2022 - Swiss Data Science Center (SDSC)
+# A partnership between École Polytechnique Fédérale de Lausanne (EPFL) and
+# Eidgenössische Technische Hochschule Zürich (ETHZ).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Recognition of parseable files from their names. This module has no
+dependencies, so that files can be selected without loading parsers."""
+
+from pathlib import PurePath
+import re
+from typing import (
+    Iterable,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Pattern,
+    Tuple,
+    Union,
+)
+
+# Dotfiles are never licenses
+LICENSE_PATTERN = re.compile(
+    r"(?!\.).*(license(s)?.*|lizenz|reus(e|ing).*|copy(ing)?.*)"
+    r"(\.(txt|md|rst))?$",
+    flags=re.IGNORECASE,
+)
+
+
+def is_license_filename(filename: str) -> bool:
+    """Given an input filename, returns a boolean indicating whether the filename path looks like a license.
+
+    Parameters
+    ----------
+    filename:
+        A filename to check.
+
+    Examples
+    --------
+    >>> is_license_filename('LICENSE-APACHE')
+    True
+    >>> is_license_filename('README.md')
+    False
+    """
+    return LICENSE_PATTERN.match(filename) is not None
+
+
+class FileRule(NamedTuple):
+    """Which files a parser handles.
+
+    Parameters
+    ----------
+    filenames:
+        Exact file names handled by the parser.
+    patterns:
+        Compiled patterns matched against the file name.
+    max_depth:
+        Maximum number of path components, e.g. 1 for files in the
+        repository root only. None means any depth.
+    """
+
+    filenames: Tuple[str, ...] = ()
+    patterns: Tuple[Pattern[str], ...] = ()
+    max_depth: Optional[int] = 1
+
+
+class ParserIndex:
+    """Dispatch index from file paths to parser names, built once for a
+    collection of parsers. Exact names are looked up in a dict and patterns
+    are only tried on paths within the allowed depth. When several parsers
+    match a file, the first one in rules order wins.
+
+    Parameters
+    ----------
+    rules:
+        File rule of each parser name, in order of precedence.
+
+    Examples
+    --------
+    >>> index = ParserIndex({
+    ...     "license": FileRule(patterns=(LICENSE_PATTERN,)),
+    ...     "cff": FileRule(filenames=("CITATION.cff",)),
+    ... })
+    >>> index.classify(["CITATION.cff", "LICENSE", "docs/LICENSE", "x.py"])
+    ['cff', 'license', None, None]
+    """
+
+    def __init__(self, rules: Mapping[str, FileRule]):
+        self._exact = {}
+        self._patterns = []
+        depths = []
+        for rank, (name, rule) in enumerate(rules.items()):
+            depth = float("inf") if rule.max_depth is None else rule.max_depth
+            depths.append(depth)
+            for filename in rule.filenames:
+                self._exact.setdefault(filename, (rank, name, depth))
+            for pattern in rule.patterns:
+                self._patterns.append((rank, pattern, name, depth))
+        self.max_depth = max(depths, default=0)
+
+    def select(self, path: Union[str, PurePath]) -> Optional[str]:
+        """Return the name of the parser for a path relative to the
+        repository root, or None. String paths use "/" as separator."""
+        if isinstance(path, str):
+            depth = path.count("/") + 1
+            name = path.rpartition("/")[2]
+        else:
+            depth = len(path.parts)
+            name = path.name
+        if depth > self.max_depth or not name:
+            return None
+        exact = self._exact.get(name)
+        if exact is not None and depth > exact[2]:
+            exact = None
+        for rank, pattern, parser, max_depth in self._patterns:
+            if exact is not None and rank >= exact[0]:
+                break
+            if depth <= max_depth and pattern.match(name):
+                return parser
+        return None if exact is None else exact[1]
+
+    def classify(
+        self, paths: Iterable[Union[str, PurePath]]
+    ) -> List[Optional[str]]:
+        """Return the parser name of each path, or None, in input order."""
+        select = self.select
+        return [select(path) for path in paths]
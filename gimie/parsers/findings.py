@@ -0,0 +1,124 @@
+# Gimie
+# Copyright 2022 - Swiss Data Science Center (SDSC)
+# A partnership between École Polytechnique Fédérale de Lausanne (EPFL) and
+# Eidgenössische Technische Hochschule Zürich (ETHZ).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Structured values found by file parsers. Findings are plain
+dataclasses; they are only converted to triples on request, via emit(),
+which is also where rdflib terms are created."""
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Optional
+
+from gimie.graph import TripleSink
+
+
+class Finding(ABC):
+    """Base class of parser findings about a repository."""
+
+    @abstractmethod
+    def emit(self, sink: TripleSink, subject: str):
+        """Add the triples of the finding about the repository subject
+        to sink."""
+        ...
+
+
+@dataclass(frozen=True)
+class License(Finding):
+    """The repository is distributed under the license at url."""
+
+    url: str
+
+    def emit(self, sink: TripleSink, subject: str):
+        from rdflib import URIRef
+
+        from gimie.graph.namespaces import SDO
+
+        sink.add((URIRef(subject), SDO.license, URIRef(self.url)))
+
+
+@dataclass(frozen=True)
+class Citation(Finding):
+    """The repository should be cited with the DOI url."""
+
+    doi: str
+
+    def emit(self, sink: TripleSink, subject: str):
+        from rdflib import URIRef
+
+        from gimie.graph.namespaces import SDO
+
+        sink.add((URIRef(subject), SDO.citation, URIRef(self.doi)))
+
+
+@dataclass(frozen=True)
+class IsBasedOn(Finding):
+    """The repository is based on the repository at url."""
+
+    url: str
+
+    def emit(self, sink: TripleSink, subject: str):
+        from rdflib import URIRef
+
+        from gimie.graph.namespaces import SDO
+
+        sink.add((URIRef(subject), SDO.isBasedOn, URIRef(self.url)))
+
+
+@dataclass(frozen=True)
+class Author(Finding):
+    """An author declared in a metadata file. Unlike
+    :class:`gimie.models.Person`, the affiliation is free text.
+
+    Parameters
+    ----------
+    _id:
+        URI of the author.
+    name:
+        Full name of the author.
+    identifier:
+        Short identifier of the author, if any.
+    email:
+        Email address of the author, if any.
+    affiliation:
+        Name of the author's affiliation, if any.
+    orcid:
+        ORCID URL of the author, if any.
+    """
+
+    _id: str
+    name: str
+    identifier: Optional[str] = None
+    email: Optional[str] = None
+    affiliation: Optional[str] = None
+    orcid: Optional[str] = None
+
+    def emit(self, sink: TripleSink, subject: str):
+        from rdflib import RDF, Literal, URIRef
+
+        from gimie.graph.namespaces import MD4I, SDO
+
+        node = URIRef(self._id)
+        sink.add((URIRef(subject), SDO.author, node))
+        sink.add((node, RDF.type, SDO.Person))
+        sink.add((node, SDO.name, Literal(self.name)))
+        if self.identifier is not None:
+            sink.add((node, SDO.identifier, Literal(self.identifier)))
+        if self.email is not None:
+            sink.add((node, SDO.email, Literal(self.email)))
+        if self.affiliation is not None:
+            sink.add((node, SDO.affiliation, Literal(self.affiliation)))
+        if self.orcid is not None:
+            sink.add((node, MD4I.orcidId, Literal(self.orcid)))
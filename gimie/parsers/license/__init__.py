@@ -14,119 +14,401 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-import csv
-from io import BytesIO
+from functools import lru_cache
+from hashlib import blake2b
+from importlib import resources
+from pathlib import Path
 import pkgutil
 import re
-from typing import List, Optional, Set
+from typing import Dict, List, Mapping, Optional, Set, Tuple
 
 import numpy as np
 import scipy.sparse as sp
-from rdflib.term import URIRef
-from rdflib import Graph
-from gimie.graph.namespaces import SDO
+from spdx_license_list import EXCEPTIONS, LICENSES
+from gimie.graph import TripleSink
 from gimie.parsers.abstract import Parser, Property
+from gimie.parsers.filenames import is_license_filename
+from gimie.parsers.findings import Finding, License
+from gimie.parsers.license.artifact import LicenseModel, read_model
+from gimie.parsers.license.custom import load_custom_licenses
+from gimie.parsers.license.index import LicenseIndex
 from gimie.utils.text_processing import TfidfVectorizer
 
+MODEL_FILE = "data/license_model.bin"
+SPDX_IDENTIFIER_PATTERN = re.compile(
+    r"SPDX-License-Identifier:\s*(?P<expression>[^\n\r*#]+)", re.IGNORECASE
+)
+SPDX_TOKEN_PATTERN = re.compile(r"[()]|[\w.:+-]+")
+# Copyright notices, e.g. "Copyright (c) 2023 Jane" or "Copyright <year>"
+COPYRIGHT_LINE_PATTERN = re.compile(
+    r"^\s*(copyright\s*(\(c\)|©|\d{4}|<year>|\[yyyy\]|\[year\]|year\b)|©).*$",
+    re.IGNORECASE | re.MULTILINE,
+)
+YEAR_PATTERN = re.compile(r"\b(19|20)\d{2}\b")
+
 
 class LicenseParser(Parser):
     """Parse LICENSE body into schema:license <spdx-url>.
-    Uses tf-idf-based matching."""
+    Uses SPDX identifiers, exact text hashes or tf-idf-based matching."""
 
     def __init__(self, subject: str):
         super().__init__(subject)
 
-    def parse(self, data: bytes) -> Graph:
-        """Extracts an spdx URL from a license file and returns a
-        graph with a single triple <url> <schema:license> <spdx_url>.
-        If no matching URL is found, an empty graph is returned.
+    def parse(
+        self, data: bytes, graph: Optional[TripleSink] = None
+    ) -> TripleSink:
+        """Extracts spdx URLs from a license file and adds a triple
+        <url> <schema:license> <spdx_url> to the graph for each of them.
+        If no matching URL is found, no triple is added.
         """
-        license_facts = Graph()
-        license_url = match_license(data)
+        return self.emit_findings(data, graph)
 
-        if license_url:
-            license_facts.add((self.subject, SDO.license, URIRef(license_url)))
-        return license_facts
+    def parse_models(self, data: bytes) -> List[Finding]:
+        """Return the matching licenses, if any."""
+        return [License(url) for url in match_licenses(data)]
 
 
 def match_license(data: bytes, min_similarity: float = 0.9) -> Optional[str]:
-    """Given a license file, returns the url of the most similar spdx license.
-    This is done using TF-IDF on the license text and getting the
-    closest match in the SPDX license corpus based on cosine similarity.
+    """Given a license file, returns the url of the matching license, or
+    of the first one if the file declares several (see match_licenses).
+
+    Examples
+    --------
+    >>> match_license(open('LICENSE', 'rb').read())
+    'https://spdx.org/licenses/Apache-2.0.html'
+    """
+    urls = match_licenses(data, min_similarity)
+    return urls[0] if urls else None
+
+
+def match_licenses(data: bytes, min_similarity: float = 0.9) -> List[str]:
+    """Given a license file, returns the urls of the licenses which all
+    apply. Matching is tiered from cheapest to most expensive:
+
+    1. An explicit SPDX-License-Identifier tag at the top of the file,
+       which can declare several licenses (see match_spdx_identifiers).
+    2. An exact match of the normalized text (see
+       :func:`normalize_license_text`) against all SPDX license texts.
+    3. TF-IDF on the license text, picking the closest match in the SPDX
+       license corpus based on cosine similarity.
+
+    Custom licenses (see :mod:`gimie.parsers.license.custom`) are
+    considered at every tier.
 
     Parameters
     ----------
     data:
         The license body as bytes.
+    min_similarity:
+        Minimum cosine similarity for tf-idf matches.
 
     Examples
     --------
-    >>> match_license(open('LICENSE', 'rb').read())
-    'https://spdx.org/licenses/Apache-2.0.html'
+    >>> match_licenses(b"SPDX-License-Identifier: MIT AND Apache-2.0")
+    ['https://spdx.org/licenses/MIT.html', 'https://spdx.org/licenses/Apache-2.0.html']
     """
-    # Compute tfidf vector for input license
-    vectorizer = load_tfidf_vectorizer()
-    input_vec = vectorizer.transform([data.decode()])
-
-    # Load ids and tfidf vectors for spdx licenses
-    spdx_licenses = load_spdx_ids()
-    spdx_vecs = load_tfidf_matrix()
-    # Compute cosine similarity between input_vec and spdx vectors
-    sim: np.ndarray = (input_vec * spdx_vecs.T).todense()
-    # Pick the most similar spdx vector
-    closest_idx = np.argmax(sim)
-    # If similarity is below threshold, return None
-    if sim[0, closest_idx] < min_similarity:
-        return None
-    closest_id = spdx_licenses[closest_idx]
-    return f"https://spdx.org/licenses/{closest_id}.html"
+    text = data.decode()
+    license_ids = match_spdx_identifiers(text)
+    if not license_ids:
+        license_id = match_license_hash(text) or match_license_tfidf(
+            text, min_similarity
+        )
+        license_ids = [license_id] if license_id else []
+    return [license_url(license_id) for license_id in license_ids]
 
 
-def load_tfidf_vectorizer() -> TfidfVectorizer:
-    """Load tfidf matrix and vectorizer from disk."""
+def match_spdx_identifiers(text: str) -> List[str]:
+    """Return the license ids declared with an SPDX-License-Identifier tag
+    near the top of the text, if any. All licenses of a conjunction (AND)
+    are returned, and the first resolvable alternative of a disjunction
+    (OR). A license with an exception (WITH) returns both the license and
+    exception ids. Expressions with unknown ids return no license.
 
-    data = pkgutil.get_data(__name__, "data/tfidf_vectorizer.json")
-    if data is None:
-        raise FileNotFoundError("Could not find tfidf_vectorizer.json")
-    return TfidfVectorizer.model_validate_json(data)
+    Examples
+    --------
+    >>> match_spdx_identifiers("# SPDX-License-Identifier: (mit OR Apache-2.0)")
+    ['MIT']
+    >>> match_spdx_identifiers("SPDX-License-Identifier: MIT AND (BSD-3-Clause OR GPL-2.0-only)")
+    ['MIT', 'BSD-3-Clause']
+    >>> match_spdx_identifiers("SPDX-License-Identifier: GPL-2.0-only WITH Classpath-exception-2.0")
+    ['GPL-2.0-only', 'Classpath-exception-2.0']
+    >>> match_spdx_identifiers("SPDX-License-Identifier: MIT WITH not-an-exception")
+    []
+    >>> match_spdx_identifiers("SPDX-License-Identifier: not-a-license")
+    []
+    """
+    match = SPDX_IDENTIFIER_PATTERN.search(text, 0, 4096)
+    if match is None:
+        return []
+    known = _known_spdx_ids()
+    custom = load_custom_licenses()
+    if custom is not None:
+        known = {**known, **{i.lower(): i for i in custom.license_ids}}
+    tokens = SPDX_TOKEN_PATTERN.findall(match.group("expression"))
+    try:
+        # Trailing tokens, e.g. the end of an HTML comment, are ignored
+        license_ids, _ = _parse_or(tokens, 0, known)
+    except IndexError:
+        # Empty expression or unbalanced parentheses
+        return []
+    return license_ids or []
 
 
-def load_spdx_ids() -> List[str]:
-    """Load spdx licenses from disk."""
-    data = pkgutil.get_data(__name__, "data/spdx_licenses.csv")
-    if data is None:
-        raise FileNotFoundError("Could not find spdx_licenses.csv")
-    reader = csv.reader(data.decode().split("\n"))
-    return [l[0] for l in reader if l]
+# The functions below parse SPDX expressions by recursive descent, AND
+# binding tighter than OR. Each returns the license ids of the parsed
+# expression (None if it cannot be resolved) and the next token position.
 
 
-def load_tfidf_matrix() -> sp.csr_matrix:
-    """Load pre-computed tfidf matrix of spdx licenses from disk.
-    Matrix has dimensions (n_licenses, n_features)."""
-    data = pkgutil.get_data(__name__, "data/tfidf_matrix.npz")
-    if data is None:
-        raise FileNotFoundError("Could not find tfidf_matrix.npz")
-    return sp.load_npz(BytesIO(data))
+def _parse_or(
+    tokens: List[str], pos: int, known: Mapping[str, str]
+) -> Tuple[Optional[List[str]], int]:
+    result, pos = _parse_and(tokens, pos, known)
+    while pos < len(tokens) and tokens[pos].upper() == "OR":
+        alternative, pos = _parse_and(tokens, pos + 1, known)
+        result = result or alternative
+    return result, pos
+
+
+def _parse_and(
+    tokens: List[str], pos: int, known: Mapping[str, str]
+) -> Tuple[Optional[List[str]], int]:
+    result, pos = _parse_term(tokens, pos, known)
+    while pos < len(tokens) and tokens[pos].upper() == "AND":
+        other, pos = _parse_term(tokens, pos + 1, known)
+        if result is None or other is None:
+            result = None
+        else:
+            result = result + [i for i in other if i not in result]
+    return result, pos
+
+
+def _parse_term(
+    tokens: List[str], pos: int, known: Mapping[str, str]
+) -> Tuple[Optional[List[str]], int]:
+    if tokens[pos] == "(":
+        result, pos = _parse_or(tokens, pos + 1, known)
+        if tokens[pos] != ")":
+            raise IndexError(pos)
+        pos += 1
+    else:
+        # "+" means "or later": the declared version still applies
+        license_id = known.get(tokens[pos].rstrip("+").lower())
+        result = [license_id] if license_id else None
+        pos += 1
+    if pos < len(tokens) and tokens[pos].upper() == "WITH":
+        exception_id = _known_spdx_exceptions().get(tokens[pos + 1].lower())
+        if result is None or exception_id is None:
+            return None, pos + 2
+        return result + [exception_id], pos + 2
+    return result, pos
+
+
+def match_license_hash(text: str) -> Optional[str]:
+    """Return the id of the license whose normalized text is identical
+    to the normalized input text, if any. This is a single binary search in
+    a precomputed table of text hashes.
+
+    Examples
+    --------
+    >>> match_license_hash(open('LICENSE').read())
+    'Apache-2.0'
+    """
+    key = np.uint64(license_text_hash(text))
+    custom = load_custom_licenses()
+    if custom is not None:
+        license_id = _search_hash(
+            custom.text_hashes, custom.text_hash_ids, key
+        )
+        if license_id:
+            return license_id
+    arrays = load_license_model().arrays
+    if "text_hashes" not in arrays:
+        return None
+    return _search_hash(arrays["text_hashes"], arrays["text_hash_ids"], key)
 
 
-def is_license_filename(filename: str) -> bool:
-    """Given an input filename, returns a boolean indicating whether the filename path looks like a license.
+def match_license_tfidf(
+    text: str, min_similarity: float = 0.9
+) -> Optional[str]:
+    """Given a license text, returns the id of the most similar license.
+    This is done using TF-IDF on the license text and getting the
+    closest match in the SPDX license corpus based on cosine similarity.
 
     Parameters
     ----------
-    filename:
-        A filename to check.
+    text:
+        The license body.
+    min_similarity:
+        Minimum cosine similarity to consider a license as matching.
+    """
+    model = load_license_model()
+    # Compute tfidf vector for input license
+    input_vec = model.vectorizer.transform([text])
+
+    # Shortlist candidate spdx licenses sharing rare ngrams with the input
+    # and pick the closest one based on cosine similarity
+    best_id, best_sim = None, min_similarity
+    match = load_license_index().search(input_vec)
+    if match is not None and match.similarity >= best_sim:
+        best_id = model.license_ids[match.row].decode()
+        best_sim = match.similarity
+
+    # Custom licenses are few: score them all
+    custom = load_custom_licenses()
+    if custom is not None and custom.license_ids:
+        sim = (custom.matrix @ input_vec.T).toarray().ravel()
+        closest_idx = int(np.argmax(sim))
+        if sim[closest_idx] >= best_sim:
+            best_id = custom.license_ids[closest_idx]
+    return best_id
+
+
+def license_url(license_id: str) -> str:
+    """Return the URL of a custom or SPDX license.
 
     Examples
     --------
-    >>> is_license_filename('LICENSE-APACHE')
-    True
-    >>> is_license_filename('README.md')
-    False
+    >>> license_url("MIT")
+    'https://spdx.org/licenses/MIT.html'
     """
-    if filename.startswith("."):
-        return False
-    pattern = r".*(license(s)?.*|lizenz|reus(e|ing).*|copy(ing)?.*)(\.(txt|md|rst))?$"
-    if re.match(pattern, filename, flags=re.IGNORECASE):
-        return True
-    return False
+    custom = load_custom_licenses()
+    if custom is not None:
+        url = custom.url(license_id)
+        if url:
+            return url
+    return spdx_url(license_id)
+
+
+def spdx_url(license_id: str) -> str:
+    """Return the URL of an SPDX license.
+
+    Examples
+    --------
+    >>> spdx_url("MIT")
+    'https://spdx.org/licenses/MIT.html'
+    """
+    return f"https://spdx.org/licenses/{license_id}.html"
+
+
+def _search_hash(
+    hashes: np.ndarray, ids: np.ndarray, key: np.uint64
+) -> Optional[str]:
+    """Binary search of key in a sorted hash table."""
+    idx = int(np.searchsorted(hashes, key))
+    if idx < len(hashes) and hashes[idx] == key:
+        return ids[idx].decode()
+    return None
+
+
+def normalize_license_text(text: str) -> str:
+    """Normalize a license text for exact comparison: copyright notices,
+    years, punctuation, case and whitespace are discarded.
+
+    Examples
+    --------
+    >>> normalize_license_text("MIT\\nCopyright (c) 2023 Jane\\nPermission,  granted")
+    'mit permission granted'
+    """
+    text = COPYRIGHT_LINE_PATTERN.sub("", text).lower()
+    text = YEAR_PATTERN.sub("", text)
+    return " ".join(re.findall(r"\w+", text))
+
+
+def license_text_hash(text: str) -> int:
+    """Return a stable 64 bits hash of the normalized license text."""
+    digest = blake2b(
+        normalize_license_text(text).encode(), digest_size=8
+    ).digest()
+    return int.from_bytes(digest, "little")
+
+
+def build_hash_table(texts: Mapping[str, str]) -> Dict[str, np.ndarray]:
+    """Build the sorted lookup table used by :func:`match_license_hash`
+    from a mapping of license ids to license texts. Texts which are
+    identical after normalization for different ids are ambiguous and
+    left out of the table.
+
+    Parameters
+    ----------
+    texts:
+        License texts, keyed by license id.
+    """
+    return hash_table_from_hashes(
+        {
+            license_id: license_text_hash(text)
+            for license_id, text in texts.items()
+        }
+    )
+
+
+def hash_table_from_hashes(hashes: Mapping[str, int]) -> Dict[str, np.ndarray]:
+    """Same as :func:`build_hash_table`, from precomputed text hashes
+    (see :func:`license_text_hash`).
+
+    Parameters
+    ----------
+    hashes:
+        Normalized license text hashes, keyed by license id.
+    """
+    ids_by_hash: Dict[int, Set[str]] = {}
+    for license_id, key in hashes.items():
+        ids_by_hash.setdefault(key, set()).add(license_id)
+    table = sorted(
+        (key, ids.pop()) for key, ids in ids_by_hash.items() if len(ids) == 1
+    )
+    return {
+        "text_hashes": np.array([k for k, _ in table], dtype=np.uint64),
+        "text_hash_ids": np.array([i for _, i in table], dtype=bytes),
+    }
+
+
+@lru_cache(maxsize=None)
+def _known_spdx_ids() -> Dict[str, str]:
+    """Map lowercase SPDX license ids to their canonical case."""
+    return {license_id.lower(): license_id for license_id in LICENSES}
+
+
+@lru_cache(maxsize=None)
+def _known_spdx_exceptions() -> Dict[str, str]:
+    """Map lowercase SPDX license exception ids to their canonical case."""
+    return {exception_id.lower(): exception_id for exception_id in EXCEPTIONS}
+
+
+@lru_cache(maxsize=None)
+def load_license_model() -> LicenseModel:
+    """Load the license model shipped with gimie. The artifact is memory
+    mapped when installed as regular files and is only loaded once per
+    process."""
+    model_file = resources.files(__name__).joinpath(MODEL_FILE)
+    if isinstance(model_file, Path):
+        if not model_file.is_file():
+            raise FileNotFoundError(f"Could not find {MODEL_FILE}")
+        return read_model(model_file)
+    # Package is not on the filesystem (e.g. zipped): read into memory
+    data = pkgutil.get_data(__name__, MODEL_FILE)
+    if data is None:
+        raise FileNotFoundError(f"Could not find {MODEL_FILE}")
+    return read_model(data)
+
+
+@lru_cache(maxsize=None)
+def load_license_index() -> LicenseIndex:
+    """Load the inverted index over the shipped license model."""
+    model = load_license_model()
+    return LicenseIndex.from_arrays(model.matrix, model.arrays)
+
+
+def load_tfidf_vectorizer() -> TfidfVectorizer:
+    """Load tfidf vectorizer from disk."""
+    return load_license_model().vectorizer
+
+
+def load_spdx_ids() -> List[str]:
+    """Load spdx licenses from disk."""
+    return [i.decode() for i in load_license_model().license_ids.tolist()]
+
+
+def load_tfidf_matrix() -> sp.csr_matrix:
+    """Load pre-computed tfidf matrix of spdx licenses from disk.
+    Matrix has dimensions (n_licenses, n_features)."""
+    return load_license_model().matrix
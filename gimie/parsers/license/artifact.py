@@ -0,0 +1,290 @@
+# Gimie
+# Copyright 2022 - Swiss Data Science Center (SDSC)
+# A partnership between École Polytechnique Fédérale de Lausanne (EPFL) and
+# Eidgenössische Technische Hochschule Zürich (ETHZ).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Single-file binary artifact holding the license matching model.
+
+The file layout is:
+
+* 8 bytes magic (``GIMIELM\\0``)
+* format version (uint32, little endian)
+* header length in bytes (uint32, little endian)
+* header as UTF-8 JSON, with the vectorizer config, free-form metadata and
+  a table giving the dtype, shape and absolute offset of each array
+* raw array buffers, each aligned to 64 bytes
+
+Arrays are read with ``np.frombuffer`` on a memory map of the file, so
+loading does no per-element Python work regardless of the model size.
+"""
+
+import csv
+from io import BytesIO
+import json
+import mmap
+import os
+from pathlib import Path
+import struct
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+import scipy.sparse as sp
+
+from gimie.utils.text_processing import (
+    ArrayVocabulary,
+    TfidfConfig,
+    TfidfVectorizer,
+)
+
+MAGIC = b"GIMIELM\x00"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+_PREFIX = struct.Struct("<8sII")
+
+
+class LicenseModel(NamedTuple):
+    """Everything needed to match a license text against a corpus.
+
+    Parameters
+    ----------
+    vectorizer:
+        The fitted tf-idf vectorizer.
+    matrix:
+        Tf-idf matrix of the license corpus, with one row per license.
+    license_ids:
+        License identifier of each row of the matrix.
+    arrays:
+        All arrays of the artifact, including optional sections.
+    metadata:
+        Free-form metadata stored in the header.
+    """
+
+    vectorizer: TfidfVectorizer
+    matrix: sp.csr_matrix
+    license_ids: np.ndarray
+    arrays: Dict[str, np.ndarray]
+    metadata: Dict[str, Any]
+
+
+def write_arrays(
+    path: Union[str, os.PathLike],
+    header: Dict[str, Any],
+    arrays: Dict[str, np.ndarray],
+):
+    """Write a header and named arrays to a binary artifact file.
+
+    Parameters
+    ----------
+    path:
+        Destination file.
+    header:
+        JSON-serializable header. The "arrays" key is filled automatically.
+    arrays:
+        Named arrays to store. Object arrays are not supported.
+    """
+    # Array offsets depend on the header length, which depends on the
+    # offsets: reserve room for the table by iterating until it is stable.
+    table: Dict[str, Dict[str, Any]] = {}
+    data_start = 0
+    while True:
+        offset = data_start
+        for name, arr in arrays.items():
+            table[name] = {
+                "dtype": arr.dtype.str,
+                "shape": list(arr.shape),
+                "offset": offset,
+            }
+            offset = _align(offset + arr.nbytes)
+        encoded = json.dumps(
+            {**header, "arrays": table}, sort_keys=True
+        ).encode()
+        start = _align(_PREFIX.size + len(encoded))
+        if start == data_start:
+            break
+        data_start = start
+
+    with open(path, "wb") as fp:
+        fp.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, len(encoded)))
+        fp.write(encoded)
+        for name, arr in arrays.items():
+            fp.write(b"\0" * (table[name]["offset"] - fp.tell()))
+            fp.write(np.ascontiguousarray(arr).tobytes())
+
+
+def read_arrays(
+    source: Union[str, os.PathLike, bytes],
+) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    """Read the header and arrays of a binary artifact. Files are memory
+    mapped and arrays are read-only views on the mapping.
+
+    Parameters
+    ----------
+    source:
+        Path to the artifact, or its raw contents.
+    """
+    buffer: Union[bytes, mmap.mmap]
+    if isinstance(source, bytes):
+        buffer = source
+    else:
+        with open(source, "rb") as fp:
+            buffer = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version, header_len = _PREFIX.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise ValueError("Not a gimie license model artifact.")
+    if version != FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported license model format version: {version}. "
+            f"Expected {FORMAT_VERSION}."
+        )
+    header = json.loads(
+        bytes(buffer[_PREFIX.size : _PREFIX.size + header_len])
+    )
+    arrays = {}
+    for name, spec in header.pop("arrays").items():
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"], dtype=np.int64))
+        if count == 0:
+            arrays[name] = np.empty(spec["shape"], dtype=dtype)
+            continue
+        arr = np.frombuffer(
+            buffer, dtype=dtype, count=count, offset=spec["offset"]
+        )
+        arrays[name] = arr.reshape(spec["shape"])
+    return header, arrays
+
+
+def write_model(
+    path: Union[str, os.PathLike],
+    vectorizer: TfidfVectorizer,
+    matrix: sp.csr_matrix,
+    license_ids: List[str],
+    extra: Optional[Dict[str, np.ndarray]] = None,
+    metadata: Optional[Dict[str, Any]] = None,
+):
+    """Write a license model to a binary artifact.
+
+    Parameters
+    ----------
+    path:
+        Destination file.
+    vectorizer:
+        Fitted tf-idf vectorizer.
+    matrix:
+        Tf-idf matrix of the license corpus (n_licenses, n_features).
+    license_ids:
+        License identifier of each row of the matrix.
+    extra:
+        Additional named arrays to store alongside the model.
+    metadata:
+        Free-form JSON-serializable metadata.
+    """
+    matrix = sp.csr_matrix(matrix)
+    matrix.sort_indices()
+    arrays = {
+        "idf": np.asarray(vectorizer.idf_vector, dtype=np.float32),
+        "matrix_data": matrix.data,
+        "matrix_indices": matrix.indices.astype(np.int32),
+        "matrix_indptr": matrix.indptr.astype(np.int32),
+        "license_ids": np.array(license_ids, dtype=bytes),
+    }
+    if vectorizer.config.n_features is None:
+        vocab = vectorizer.vocabulary
+        if not isinstance(vocab, ArrayVocabulary):
+            vocab = ArrayVocabulary.from_dict(vocab)
+        arrays["vocab_ngrams"] = vocab.ngrams
+        arrays["vocab_columns"] = vocab.columns
+    arrays.update(extra or {})
+    header = {
+        "config": json.loads(vectorizer.model_dump_json(include={"config"}))[
+            "config"
+        ],
+        "shape": list(matrix.get_shape()),
+        "metadata": metadata or {},
+    }
+    write_arrays(path, header, arrays)
+
+
+def read_model(source: Union[str, os.PathLike, bytes]) -> LicenseModel:
+    """Load a license model from a binary artifact.
+
+    Parameters
+    ----------
+    source:
+        Path to the artifact, or its raw contents.
+    """
+    header, arrays = read_arrays(source)
+    config = TfidfConfig(**header["config"])
+    if config.n_features is None:
+        vocab = ArrayVocabulary(
+            arrays["vocab_ngrams"], arrays["vocab_columns"]
+        )
+    else:
+        vocab = {}
+    # Skip validation: it would copy the arrays into python objects.
+    vectorizer = TfidfVectorizer.model_construct(
+        config=config,
+        idf_vector=arrays["idf"],
+        vocabulary=vocab,
+    )
+    matrix = sp.csr_matrix(
+        (
+            arrays["matrix_data"],
+            arrays["matrix_indices"],
+            arrays["matrix_indptr"],
+        ),
+        shape=tuple(header["shape"]),
+        copy=False,
+    )
+    return LicenseModel(
+        vectorizer=vectorizer,
+        matrix=matrix,
+        license_ids=arrays["license_ids"],
+        arrays=arrays,
+        metadata=header["metadata"],
+    )
+
+
+def convert_legacy_model(
+    vectorizer_path: Union[str, os.PathLike],
+    matrix_path: Union[str, os.PathLike],
+    ids_path: Union[str, os.PathLike],
+    out_path: Union[str, os.PathLike],
+):
+    """Convert the legacy model files (pydantic JSON vectorizer, npz
+    matrix and csv license list) to a single binary artifact.
+
+    Parameters
+    ----------
+    vectorizer_path:
+        Path to tfidf_vectorizer.json.
+    matrix_path:
+        Path to tfidf_matrix.npz.
+    ids_path:
+        Path to spdx_licenses.csv.
+    out_path:
+        Destination of the binary artifact.
+    """
+    vectorizer = TfidfVectorizer.model_validate_json(
+        Path(vectorizer_path).read_bytes()
+    )
+    matrix = sp.load_npz(BytesIO(Path(matrix_path).read_bytes()))
+    with open(ids_path, newline="") as fp:
+        license_ids = [row[0] for row in csv.reader(fp) if row]
+    write_model(out_path, vectorizer, matrix, license_ids)
+
+
+def _align(offset: int) -> int:
+    """Round offset up to the next multiple of ALIGNMENT."""
+    return -(-offset // ALIGNMENT) * ALIGNMENT
@@ -0,0 +1,334 @@
+# Gimie
+# Copyright 2022 - Swiss Data Science Center (SDSC)
+# A partnership between École Polytechnique Fédérale de Lausanne (EPFL) and
+# Eidgenössische Technische Hochschule Zürich (ETHZ).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Offline builder for the license model artifact.
+
+The model is built from a local copy of the SPDX license-list-data
+repository (https://github.com/spdx/license-list-data), either a checkout
+or a release tarball. Texts are tokenized in a process pool, and the output
+only depends on the input data and configuration: licenses are processed
+in id order and no timestamp is recorded.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from functools import partial
+from hashlib import sha256
+import json
+import os
+from pathlib import Path
+import tarfile
+from typing import (
+    Any,
+    Counter,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
+
+import numpy as np
+
+from gimie.parsers.license import hash_table_from_hashes, license_text_hash
+from gimie.parsers.license.artifact import write_model
+from gimie.parsers.license.index import build_postings
+from gimie.utils.text_processing import (
+    TfidfConfig,
+    TfidfVectorizer,
+    get_ngram_counts,
+)
+
+MODEL_NAME = "license_model.bin"
+MANIFEST_NAME = "license_model.json"
+LICENSES_JSON = "json/licenses.json"
+EXCEPTIONS_JSON = "json/exceptions.json"
+DEFAULT_CONFIG = TfidfConfig(
+    max_features=700, ngram_range=(1, 2), sublinear_tf=True, norm="l2"
+)
+
+
+class SpdxLicense(NamedTuple):
+    """A license or license exception of the SPDX license list."""
+
+    license_id: str
+    text: str
+    is_osi_approved: bool
+
+
+class LicenseListData:
+    """Read access to a local copy of the SPDX license-list-data
+    repository, either a directory or a (possibly compressed) tarball.
+
+    Parameters
+    ----------
+    source:
+        Path to the checkout or tarball.
+    """
+
+    def __init__(self, source: Union[str, os.PathLike]):
+        self.source = Path(source)
+        self._tar: Optional[tarfile.TarFile] = None
+        self._prefix = ""
+        if self.source.is_file():
+            self._tar = tarfile.open(self.source, "r:*")
+            # Release tarballs have a single top-level directory
+            names = [
+                name
+                for name in self._tar.getnames()
+                if name == LICENSES_JSON or name.endswith("/" + LICENSES_JSON)
+            ]
+            if not names:
+                raise FileNotFoundError(
+                    f"No {LICENSES_JSON} in {self.source}."
+                )
+            self._prefix = min(names, key=len)[: -len(LICENSES_JSON)]
+        elif not (self.source / LICENSES_JSON).is_file():
+            raise FileNotFoundError(f"No {LICENSES_JSON} in {self.source}.")
+
+    def read(self, path: str) -> bytes:
+        """Read a file, given its path relative to the repository root."""
+        if self._tar is None:
+            return (self.source / path).read_bytes()
+        member = self._tar.extractfile(self._prefix + path)
+        if member is None:
+            raise FileNotFoundError(path)
+        return member.read()
+
+    def exists(self, path: str) -> bool:
+        """Whether a file exists in the repository."""
+        if self._tar is None:
+            return (self.source / path).is_file()
+        try:
+            self._tar.getmember(self._prefix + path)
+        except KeyError:
+            return False
+        return True
+
+    def close(self):
+        if self._tar is not None:
+            self._tar.close()
+
+    def __enter__(self) -> "LicenseListData":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def license_list(self) -> Dict[str, Any]:
+        """The parsed licenses.json index."""
+        return json.loads(self.read(LICENSES_JSON))
+
+    def licenses(
+        self, include_deprecated: bool = False
+    ) -> Iterator[SpdxLicense]:
+        """Iterate over licenses and their texts, sorted by id. Licenses
+        without a text are skipped.
+
+        Parameters
+        ----------
+        include_deprecated:
+            Whether to include deprecated license ids.
+        """
+        entries = sorted(
+            self.license_list()["licenses"], key=lambda e: e["licenseId"]
+        )
+        for entry in entries:
+            if entry.get("isDeprecatedLicenseId") and not include_deprecated:
+                continue
+            text = self.license_text(entry["licenseId"])
+            if text is None:
+                continue
+            yield SpdxLicense(
+                license_id=entry["licenseId"],
+                text=text,
+                is_osi_approved=bool(entry.get("isOsiApproved")),
+            )
+
+    def exceptions(
+        self, include_deprecated: bool = False
+    ) -> Iterator[SpdxLicense]:
+        """Iterate over license exceptions and their texts, sorted by id.
+        Exceptions without a text are skipped, and none are returned if
+        the repository has no exceptions.json index.
+
+        Parameters
+        ----------
+        include_deprecated:
+            Whether to include deprecated exception ids.
+        """
+        if not self.exists(EXCEPTIONS_JSON):
+            return
+        entries = sorted(
+            json.loads(self.read(EXCEPTIONS_JSON))["exceptions"],
+            key=lambda e: e["licenseExceptionId"],
+        )
+        for entry in entries:
+            if entry.get("isDeprecatedLicenseId") and not include_deprecated:
+                continue
+            text = self.exception_text(entry["licenseExceptionId"])
+            if text is None:
+                continue
+            yield SpdxLicense(
+                license_id=entry["licenseExceptionId"],
+                text=text,
+                is_osi_approved=False,
+            )
+
+    def license_text(self, license_id: str) -> Optional[str]:
+        """Text of a license, from its json details or plain text file."""
+        return self._text(f"json/details/{license_id}.json", license_id)
+
+    def exception_text(self, exception_id: str) -> Optional[str]:
+        """Text of a license exception, from its json details or plain
+        text file."""
+        return self._text(f"json/exceptions/{exception_id}.json", exception_id)
+
+    def _text(self, details: str, spdx_id: str) -> Optional[str]:
+        if self.exists(details):
+            data = json.loads(self.read(details))
+            return data.get("licenseText") or data.get("licenseExceptionText")
+        text = f"text/{spdx_id}.txt"
+        if self.exists(text):
+            return self.read(text).decode()
+        return None
+
+
+def build_license_model(
+    source: Union[str, os.PathLike],
+    out_dir: Union[str, os.PathLike],
+    config: TfidfConfig = DEFAULT_CONFIG,
+    osi_only: bool = True,
+    include_deprecated: bool = False,
+    include_exceptions: bool = False,
+    jobs: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Build the license model artifact and its manifest from a local copy
+    of the SPDX license-list-data repository. The tf-idf matrix covers the
+    selected licenses, while exact text hashes cover all licenses.
+    License exceptions are never OSI approved, so they only enter the
+    tf-idf matrix when ``osi_only`` is disabled.
+
+    Parameters
+    ----------
+    source:
+        Path to a license-list-data checkout or tarball.
+    out_dir:
+        Directory where the artifact and manifest are written.
+    config:
+        Configuration of the tf-idf vectorizer.
+    osi_only:
+        Only include OSI approved licenses in the tf-idf matrix.
+    include_deprecated:
+        Include deprecated license ids.
+    include_exceptions:
+        Include license exceptions, such as Classpath-exception-2.0.
+    jobs:
+        Number of processes used for tokenization. Defaults to the number
+        of CPUs.
+
+    Returns
+    -------
+    The manifest, which is also written next to the artifact.
+    """
+    with LicenseListData(source) as data:
+        license_list = data.license_list()
+        licenses = list(data.licenses(include_deprecated=include_deprecated))
+        if include_exceptions:
+            licenses += data.exceptions(include_deprecated=include_deprecated)
+        index_sha256 = sha256(data.read(LICENSES_JSON)).hexdigest()
+    if not licenses:
+        raise ValueError(f"No license texts found in {source}.")
+
+    analyzed = _map(
+        partial(_analyze, ngram_range=config.ngram_range),
+        [lic.text for lic in licenses],
+        jobs,
+    )
+    hashes = {lic.license_id: h for lic, (h, _) in zip(licenses, analyzed)}
+    selected = [
+        (lic.license_id, counts)
+        for lic, (_, counts) in zip(licenses, analyzed)
+        if lic.is_osi_approved or not osi_only
+    ]
+    counts_records = [counts for _, counts in selected]
+
+    vectorizer = TfidfVectorizer(config=config)
+    vectorizer.fit_counts(counts_records)
+    matrix = vectorizer.transform_counts(counts_records)
+    # Prune precision to reduce size
+    matrix.data = matrix.data.astype(np.float16)
+
+    spdx = {
+        "licenseListVersion": license_list.get("licenseListVersion"),
+        "releaseDate": license_list.get("releaseDate"),
+        "sha256": index_sha256,
+    }
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    model_path = out_dir / MODEL_NAME
+    write_model(
+        model_path,
+        vectorizer,
+        matrix,
+        [license_id for license_id, _ in selected],
+        extra={**hash_table_from_hashes(hashes), **build_postings(matrix)},
+        metadata={"spdx": spdx},
+    )
+    manifest = {
+        "spdx": spdx,
+        "config": _config_dict(config),
+        "selection": {
+            "osi_only": osi_only,
+            "include_deprecated": include_deprecated,
+            "include_exceptions": include_exceptions,
+        },
+        "n_licenses": len(selected),
+        "n_hashes": len(hashes),
+        "artifact": {
+            "file": MODEL_NAME,
+            "size": model_path.stat().st_size,
+            "sha256": sha256(model_path.read_bytes()).hexdigest(),
+        },
+    }
+    (out_dir / MANIFEST_NAME).write_text(
+        json.dumps(manifest, indent=2, sort_keys=True) + "\n"
+    )
+    return manifest
+
+
+def _analyze(
+    text: str, ngram_range: Tuple[int, int]
+) -> Tuple[int, Counter[str]]:
+    """Compute the normalized text hash and ngram counts of a license."""
+    return license_text_hash(text), get_ngram_counts(text, ngram_range)
+
+
+def _map(func, items: List[str], jobs: Optional[int]) -> List[Any]:
+    """Apply func to items in a process pool, preserving order."""
+    if jobs == 1 or len(items) < 2:
+        return [func(item) for item in items]
+    workers = jobs or os.cpu_count() or 1
+    chunksize = max(1, len(items) // (4 * workers))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(func, items, chunksize=chunksize))
+
+
+def _config_dict(config: TfidfConfig) -> Dict[str, Any]:
+    """JSON-serializable representation of a vectorizer config."""
+    return json.loads(json.dumps(asdict(config)))
@@ -0,0 +1,357 @@
+# Gimie
+# Copyright 2022 - Swiss Data Science Center (SDSC)
+# A partnership between École Polytechnique Fédérale de Lausanne (EPFL) and
+# Eidgenössische Technische Hochschule Zürich (ETHZ).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Custom (e.g. organization-specific) licenses registered at runtime.
+
+Custom licenses live in the user data directory and never modify the
+shipped model. The directory contains the raw text of each license as
+``<id>.txt`` and an overlay artifact with the tf-idf row and normalized
+text hash of each text, computed with the shipped vectorizer. The overlay
+is merged with the shipped model at match time.
+
+The overlay is only written when custom licenses are added or removed.
+If it was computed with another shipped model, it is recomputed in
+memory when loaded, so that matching works from read-only directories.
+"""
+
+from functools import lru_cache
+from hashlib import blake2b
+import os
+from pathlib import Path
+import re
+import threading
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+from gimie.graph.namespaces import GIMIE
+from gimie.parsers.license.artifact import (
+    LicenseModel,
+    read_arrays,
+    write_arrays,
+)
+from gimie.utils.paths import user_data_dir
+
+OVERLAY_FILE = "overlay.bin"
+LICENSE_ID_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9.+-]*$")
+# Files may be parsed from several threads; only one of them should
+# read or recompute the overlay.
+_OVERLAY_LOCK = threading.Lock()
+
+
+class CustomLicenses(NamedTuple):
+    """Tf-idf rows and text hashes of custom licenses.
+
+    Parameters
+    ----------
+    license_ids:
+        Identifier of each custom license, in matrix row order.
+    urls:
+        URL of each custom license, in matrix row order.
+    matrix:
+        Tf-idf matrix of the custom license texts.
+    text_hashes:
+        Sorted normalized text hashes.
+    text_hash_ids:
+        License id of each hash.
+    """
+
+    license_ids: List[str]
+    urls: List[str]
+    matrix: sp.csr_matrix
+    text_hashes: np.ndarray
+    text_hash_ids: np.ndarray
+
+    def url(self, license_id: str) -> Optional[str]:
+        """Return the URL of a custom license, if it exists."""
+        try:
+            return self.urls[self.license_ids.index(license_id)]
+        except ValueError:
+            return None
+
+
+def custom_licenses_dir() -> Path:
+    """Default directory where custom licenses are stored."""
+    return user_data_dir() / "licenses"
+
+
+def default_license_url(license_id: str) -> str:
+    """URL assigned to custom licenses registered without one.
+
+    Examples
+    --------
+    >>> default_license_url("LicenseRef-Acme")
+    'https://sdsc-ordes.github.io/gimie/licenses/LicenseRef-Acme'
+    """
+    return f"{GIMIE}licenses/{license_id}"
+
+
+def add_custom_license(
+    license_id: str,
+    text: str,
+    url: Optional[str] = None,
+    directory: Optional[Path] = None,
+) -> CustomLicenses:
+    """Register a custom license text. The text is transformed with the
+    shipped vectorizer and its row is appended to the overlay; other rows
+    are not recomputed. An existing custom license with the same id is
+    replaced.
+
+    Parameters
+    ----------
+    license_id:
+        Identifier of the license, e.g. LicenseRef-Acme-1.0.
+    text:
+        Full text of the license.
+    url:
+        URL identifying the license in the output graph. Defaults to an
+        URL in the gimie namespace.
+    directory:
+        Where custom licenses are stored. Defaults to custom_licenses_dir().
+    """
+    from gimie.parsers.license import (
+        _known_spdx_ids,
+        license_text_hash,
+        load_license_model,
+    )
+
+    if not LICENSE_ID_PATTERN.match(license_id):
+        raise ValueError(
+            f"Invalid license id: {license_id}. Only letters, digits, "
+            "'.', '+' and '-' are allowed."
+        )
+    if license_id.lower() in _known_spdx_ids():
+        raise ValueError(
+            f"{license_id} is an SPDX license id. Custom licenses should "
+            "use their own ids, e.g. LicenseRef-<name>."
+        )
+    directory = Path(directory or custom_licenses_dir())
+    directory.mkdir(parents=True, exist_ok=True)
+    model = load_license_model()
+    current = load_custom_licenses(directory) or _empty(model)
+    keep = [
+        i for i, lid in enumerate(current.license_ids) if lid != license_id
+    ]
+
+    row = model.vectorizer.transform([text])
+    ids = [current.license_ids[i] for i in keep] + [license_id]
+    urls = [current.urls[i] for i in keep] + [
+        url or default_license_url(license_id)
+    ]
+    matrix = sp.csr_matrix(sp.vstack([current.matrix[keep], row]))
+    hashes = {
+        int(h): lid.decode()
+        for h, lid in zip(current.text_hashes, current.text_hash_ids)
+        if lid.decode() != license_id
+    }
+    hashes[license_text_hash(text)] = license_id
+
+    (directory / f"{license_id}.txt").write_text(text)
+    return _save(directory, model, ids, urls, matrix, hashes)
+
+
+def remove_custom_license(
+    license_id: str, directory: Optional[Path] = None
+) -> bool:
+    """Unregister a custom license. Returns False if it did not exist.
+
+    Parameters
+    ----------
+    license_id:
+        Identifier of the license to remove.
+    directory:
+        Where custom licenses are stored. Defaults to custom_licenses_dir().
+    """
+    from gimie.parsers.license import load_license_model
+
+    directory = Path(directory or custom_licenses_dir())
+    current = load_custom_licenses(directory)
+    if current is None or license_id not in current.license_ids:
+        return False
+    keep = [
+        i for i, lid in enumerate(current.license_ids) if lid != license_id
+    ]
+    hashes = {
+        int(h): lid.decode()
+        for h, lid in zip(current.text_hashes, current.text_hash_ids)
+        if lid.decode() != license_id
+    }
+    _save(
+        directory,
+        load_license_model(),
+        [current.license_ids[i] for i in keep],
+        [current.urls[i] for i in keep],
+        current.matrix[keep],
+        hashes,
+    )
+    (directory / f"{license_id}.txt").unlink(missing_ok=True)
+    return True
+
+
+def load_custom_licenses(
+    directory: Optional[Path] = None,
+) -> Optional[CustomLicenses]:
+    """Load the custom license overlay, or None if there is none. The
+    overlay is cached until the file changes, and recomputed in memory
+    from the stored texts if it was computed with a different shipped
+    model. The file itself is not modified.
+
+    Parameters
+    ----------
+    directory:
+        Where custom licenses are stored. Defaults to custom_licenses_dir().
+    """
+    path = Path(directory or custom_licenses_dir()) / OVERLAY_FILE
+    version = overlay_version(directory)
+    if version is None:
+        return None
+    with _OVERLAY_LOCK:
+        return _load_overlay(str(path), version)
+
+
+def overlay_version(
+    directory: Optional[Path] = None,
+) -> Optional[Tuple[int, int]]:
+    """Identify the current state of the custom license overlay, or None
+    if there is none. It changes whenever custom licenses are added or
+    removed.
+
+    Parameters
+    ----------
+    directory:
+        Where custom licenses are stored. Defaults to custom_licenses_dir().
+    """
+    path = Path(directory or custom_licenses_dir()) / OVERLAY_FILE
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    # Overlays are replaced atomically, so the inode changes on each write
+    return stat.st_ino, stat.st_mtime_ns
+
+
+@lru_cache(maxsize=4)
+def _load_overlay(path: str, version: Tuple[int, int]) -> CustomLicenses:
+    """Read an overlay file. version is only used as a cache key."""
+    from gimie.parsers.license import load_license_model
+
+    model = load_license_model()
+    header, arrays = read_arrays(path)
+    if header["fingerprint"] != model_fingerprint(model):
+        return _recompute(Path(path).parent, model, header["licenses"])
+    return CustomLicenses(
+        license_ids=[lic["id"] for lic in header["licenses"]],
+        urls=[lic["url"] for lic in header["licenses"]],
+        matrix=sp.csr_matrix(
+            (
+                arrays["matrix_data"],
+                arrays["matrix_indices"],
+                arrays["matrix_indptr"],
+            ),
+            shape=tuple(header["shape"]),
+        ),
+        text_hashes=arrays["text_hashes"],
+        text_hash_ids=arrays["text_hash_ids"],
+    )
+
+
+def _recompute(
+    directory: Path, model: LicenseModel, licenses: List[Dict[str, str]]
+) -> CustomLicenses:
+    """Recompute the overlay from the stored texts with the current
+    shipped model, without writing it."""
+    from gimie.parsers.license import license_text_hash
+
+    licenses = [
+        lic for lic in licenses if (directory / f"{lic['id']}.txt").exists()
+    ]
+    texts = [(directory / f"{lic['id']}.txt").read_text() for lic in licenses]
+    ids = [lic["id"] for lic in licenses]
+    matrix = (
+        model.vectorizer.transform(texts) if texts else _empty(model).matrix
+    )
+    hashes = {license_text_hash(t): i for t, i in zip(texts, ids)}
+    return _overlay(ids, [lic["url"] for lic in licenses], matrix, hashes)
+
+
+def _overlay(
+    ids: List[str],
+    urls: List[str],
+    matrix: sp.csr_matrix,
+    hashes: Dict[int, str],
+) -> CustomLicenses:
+    """Assemble an overlay from its licenses and text hashes."""
+    table = sorted(hashes.items())
+    return CustomLicenses(
+        license_ids=ids,
+        urls=urls,
+        matrix=sp.csr_matrix(matrix),
+        text_hashes=np.array([h for h, _ in table], dtype=np.uint64),
+        text_hash_ids=np.array([i for _, i in table], dtype=bytes),
+    )
+
+
+def _save(
+    directory: Path,
+    model: LicenseModel,
+    ids: List[str],
+    urls: List[str],
+    matrix: sp.csr_matrix,
+    hashes: Dict[int, str],
+) -> CustomLicenses:
+    """Write the overlay atomically and return it."""
+    overlay = _overlay(ids, urls, matrix, hashes)
+    header = {
+        "fingerprint": model_fingerprint(model),
+        "licenses": [{"id": i, "url": u} for i, u in zip(ids, urls)],
+        "shape": list(overlay.matrix.get_shape()),
+    }
+    arrays = {
+        "matrix_data": overlay.matrix.data.astype(np.float32),
+        "matrix_indices": overlay.matrix.indices.astype(np.int32),
+        "matrix_indptr": overlay.matrix.indptr.astype(np.int32),
+        "text_hashes": overlay.text_hashes,
+        "text_hash_ids": overlay.text_hash_ids,
+    }
+    tmp = directory / f".{OVERLAY_FILE}.tmp"
+    write_arrays(tmp, header, arrays)
+    os.replace(tmp, directory / OVERLAY_FILE)
+    return overlay
+
+
+def _empty(model: LicenseModel) -> CustomLicenses:
+    """An overlay without licenses."""
+    return CustomLicenses(
+        license_ids=[],
+        urls=[],
+        matrix=sp.csr_matrix(
+            (0, model.vectorizer.n_features), dtype=np.float32
+        ),
+        text_hashes=np.array([], dtype=np.uint64),
+        text_hash_ids=np.array([], dtype=bytes),
+    )
+
+
+def model_fingerprint(model: LicenseModel) -> str:
+    """Identify the vectorizer of a license model, so that overlays
+    computed with another model are detected."""
+    digest = blake2b(digest_size=8)
+    digest.update(np.ascontiguousarray(model.arrays["idf"]).tobytes())
+    if "vocab_ngrams" in model.arrays:
+        digest.update(model.arrays["vocab_ngrams"].tobytes())
+        digest.update(model.arrays["vocab_columns"].tobytes())
+    return digest.hexdigest()
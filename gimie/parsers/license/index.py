@@ -0,0 +1,205 @@
+# Gimie
+# Copyright 2022 - Swiss Data Science Center (SDSC)
+# A partnership between École Polytechnique Fédérale de Lausanne (EPFL) and
+# Eidgenössische Technische Hochschule Zürich (ETHZ).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Inverted index over the license tf-idf matrix, used to shortlist
+candidate licenses before exact cosine scoring."""
+
+from typing import Dict, NamedTuple, Optional
+
+import numpy as np
+import scipy.sparse as sp
+
+
+class IndexMatch(NamedTuple):
+    """Best matching row of the index and its cosine similarity."""
+
+    row: int
+    similarity: float
+
+
+class LicenseIndex:
+    """Inverted index mapping each n-gram column to the license rows that
+    contain it (the postings lists are the CSC form of the matrix).
+
+    A query only probes the postings of its highest-weighted n-grams,
+    which are the rarest ones since weights include the idf. Rows are
+    ranked by their partial dot product over these n-grams, and only the
+    best candidates are scored exactly. The cost of a query therefore
+    depends on the length of a few postings lists rather than on the
+    number of licenses.
+
+    Parameters
+    ----------
+    matrix:
+        L2-normalized tf-idf matrix (n_licenses, n_features).
+    postings:
+        The same matrix in CSC format. Computed from matrix if None.
+    n_terms:
+        Number of query n-grams whose postings are probed.
+    n_candidates:
+        Number of candidate rows scored exactly.
+
+    Examples
+    --------
+    >>> matrix = sp.csr_matrix([[0.6, 0.8, 0.0], [0.0, 0.6, 0.8]])
+    >>> index = LicenseIndex(matrix, n_terms=1, n_candidates=1)
+    >>> index.search(sp.csr_matrix([[0.0, 0.6, 0.8]]))
+    IndexMatch(row=1, similarity=1.0)
+    """
+
+    def __init__(
+        self,
+        matrix: sp.csr_matrix,
+        postings: Optional[sp.csc_matrix] = None,
+        n_terms: int = 32,
+        n_candidates: int = 16,
+    ):
+        # The matrix may be a half precision view of a mapped artifact:
+        # rows are scored from its arrays, without converting it.
+        self.matrix = matrix
+        # Number of licenses, from the CSR row pointers
+        self.n_rows = len(matrix.indptr) - 1
+        self.postings = sp.csc_matrix(matrix) if postings is None else postings
+        self.n_terms = n_terms
+        self.n_candidates = n_candidates
+
+    @classmethod
+    def from_arrays(
+        cls, matrix: sp.csr_matrix, arrays: Dict[str, np.ndarray], **kwargs
+    ) -> "LicenseIndex":
+        """Build the index from a matrix and the precomputed postings
+        arrays of a license model artifact, if present."""
+        if "postings_indptr" not in arrays:
+            return cls(matrix, **kwargs)
+        postings = sp.csc_matrix(
+            (
+                arrays["postings_data"],
+                arrays["postings_indices"],
+                arrays["postings_indptr"],
+            ),
+            shape=matrix.shape,
+            copy=False,
+        )
+        return cls(matrix, postings=postings, **kwargs)
+
+    def candidates(self, query: sp.csr_matrix) -> np.ndarray:
+        """Return the rows sharing the highest partial similarity with the
+        query, over its n_terms highest-weighted n-grams.
+
+        Parameters
+        ----------
+        query:
+            Tf-idf vector of a single document (1, n_features).
+        """
+        cols, weights = query.indices, query.data
+        if len(cols) > self.n_terms:
+            top = np.argpartition(-weights, self.n_terms)[: self.n_terms]
+            cols, weights = cols[top], weights[top]
+
+        indptr = self.postings.indptr
+        rows, values = [], []
+        for col, weight in zip(cols.tolist(), weights.tolist()):
+            start, end = indptr[col], indptr[col + 1]
+            rows.append(self.postings.indices[start:end])
+            values.append(self.postings.data[start:end] * weight)
+        if not rows:
+            return np.array([], dtype=np.int64)
+        rows_arr = np.concatenate(rows)
+        scores = np.bincount(
+            rows_arr,
+            weights=np.concatenate(values).astype(np.float64),
+            minlength=self.n_rows,
+        )
+        hits = np.flatnonzero(scores)
+        if len(hits) > self.n_candidates:
+            best = np.argpartition(-scores[hits], self.n_candidates)
+            hits = hits[best[: self.n_candidates]]
+        # Keep rows sorted so that ties resolve like an exhaustive search
+        return np.sort(hits)
+
+    def search(self, query: sp.csr_matrix) -> Optional[IndexMatch]:
+        """Return the most similar row among the shortlisted candidates.
+
+        Parameters
+        ----------
+        query:
+            Tf-idf vector of a single document (1, n_features).
+        """
+        rows = self.candidates(query)
+        if not len(rows):
+            return None
+        sim = self.scores(rows, query)
+        best = int(np.argmax(sim))
+        return IndexMatch(row=int(rows[best]), similarity=float(sim[best]))
+
+    def search_exhaustive(self, query: sp.csr_matrix) -> Optional[IndexMatch]:
+        """Return the most similar row by scoring every row. Used as a
+        reference for the shortlist."""
+        if self.n_rows == 0:
+            return None
+        sim = self.scores(np.arange(self.n_rows), query)
+        best = int(np.argmax(sim))
+        return IndexMatch(row=best, similarity=float(sim[best]))
+
+    def scores(self, rows: np.ndarray, query: sp.csr_matrix) -> np.ndarray:
+        """Dot products of the given matrix rows with the query. Only the
+        data of these rows is read, and accumulated in single precision.
+
+        Parameters
+        ----------
+        rows:
+            Indices of the rows to score.
+        query:
+            Tf-idf vector of a single document (1, n_features).
+        """
+        query = query.tocsr()
+        order = np.argsort(query.indices)
+        query_cols = query.indices[order]
+        query_weights = query.data[order].astype(np.float32)
+        indptr = self.matrix.indptr
+        scores = np.zeros(len(rows), dtype=np.float32)
+        if not len(query_cols):
+            return scores
+        for i, row in enumerate(rows.tolist()):
+            start, end = indptr[row], indptr[row + 1]
+            cols = self.matrix.indices[start:end]
+            pos = np.minimum(
+                np.searchsorted(query_cols, cols), len(query_cols) - 1
+            )
+            shared = query_cols[pos] == cols
+            scores[i] = np.dot(
+                self.matrix.data[start:end][shared].astype(np.float32),
+                query_weights[pos[shared]],
+            )
+        return scores
+
+
+def build_postings(matrix: sp.csr_matrix) -> Dict[str, np.ndarray]:
+    """Precompute the postings arrays of the index for storage in a license
+    model artifact, so that loading the index does not convert the matrix.
+
+    Parameters
+    ----------
+    matrix:
+        Tf-idf matrix (n_licenses, n_features).
+    """
+    postings = sp.csc_matrix(matrix)
+    postings.sort_indices()
+    return {
+        "postings_data": postings.data,
+        "postings_indices": postings.indices.astype(np.int32),
+        "postings_indptr": postings.indptr.astype(np.int32),
+    }
@@ -21,56 +21,47 @@ from __future__ import annotations
 from typing import Dict, List, Optional
 
 import yaml
-from rdflib import Graph, Literal, URIRef
-from rdflib.namespace import RDF
 
 from gimie import logger
-from gimie.graph.namespaces import SDO
+from gimie.graph import TripleSink
 from gimie.parsers.abstract import Parser
+from gimie.parsers.findings import Author, Finding, IsBasedOn
 from gimie.utils.uri import sanitize_identifier
+from gimie.utils.yaml_loader import load_yaml
+
+# Top-level keys used by the parser
+PUBLICCODE_KEYS = ("isBasedOn", "maintenance")
 
 
 class PublicCodeParser(Parser):
     """Parse metadata from publiccode.yml (v0.5.0)."""
 
-    def parse(self, data: bytes) -> Graph:
-        graph = Graph()
+    def parse(
+        self, data: bytes, graph: Optional[TripleSink] = None
+    ) -> TripleSink:
+        return self.emit_findings(data, graph)
 
+    def parse_models(self, data: bytes) -> List[Finding]:
+        """Return the upstream repositories and maintenance contacts."""
         pc = _parse_yaml(data)
         if pc is None:
-            return graph
-
-        is_based_on = get_publiccode_is_based_on(pc)
-        contacts = get_publiccode_contacts(pc)
-
-        if is_based_on:
-            for url in is_based_on:
-                graph.add((self.subject, SDO.isBasedOn, URIRef(url)))
-
-        if contacts:
-            for contact in contacts:
-                uid = sanitize_identifier(contact["name"])
-                person_uri = URIRef(f"{self.subject}/{uid}")
-
-                graph.add((self.subject, SDO.author, person_uri))
-                graph.add((person_uri, RDF.type, SDO.Person))
-                graph.add((person_uri, SDO.name, Literal(contact["name"])))
-                graph.add((person_uri, SDO.identifier, Literal(uid)))
-
-                if contact.get("email") is not None:
-                    graph.add(
-                        (person_uri, SDO.email, Literal(contact["email"]))
-                    )
-                if contact.get("affiliation") is not None:
-                    graph.add(
-                        (
-                            person_uri,
-                            SDO.affiliation,
-                            Literal(contact["affiliation"]),
-                        )
-                    )
-
-        return graph
+            return []
+
+        findings: List[Finding] = [
+            IsBasedOn(url) for url in get_publiccode_is_based_on(pc) or []
+        ]
+        for contact in get_publiccode_contacts(pc) or []:
+            uid = sanitize_identifier(contact["name"])
+            findings.append(
+                Author(
+                    _id=f"{self.subject}/{uid}",
+                    name=contact["name"],
+                    identifier=uid,
+                    email=contact.get("email"),
+                    affiliation=contact.get("affiliation"),
+                )
+            )
+        return findings
 
 
 def _parse_yaml(data: bytes) -> Optional[dict]:
@@ -79,7 +70,7 @@ def _parse_yaml(data: bytes) -> Optional[dict]:
     Returns None on invalid YAML or non-dict content.
     """
     try:
-        pc = yaml.safe_load(data.decode())
+        pc = load_yaml(data.decode(), keys=PUBLICCODE_KEYS)
     except (yaml.YAMLError, UnicodeDecodeError):
         logger.warning("Cannot read publiccode.yml, skipped.")
         return None
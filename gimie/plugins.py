@@ -0,0 +1,155 @@
+# Gimie
+# Copyright 2022 - Swiss Data Science Center (SDSC)
+# A partnership between École Polytechnique Fédérale de Lausanne (EPFL) and
+# Eidgenössische Technische Hochschule Zürich (ETHZ).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Registries of named plugins, such as parsers and git providers.
+
+Built-in plugins are recorded by import path, and third-party plugins are
+discovered from entry points of installed packages, e.g. in pyproject.toml:
+
+.. code-block:: toml
+
+    [project.entry-points."gimie.parsers"]
+    acme = "acme_gimie.parser:AcmeParser"
+
+Plugin modules are only imported when the plugin is used.
+"""
+
+from importlib import import_module
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    Iterator,
+    Mapping,
+    Optional,
+    TypeVar,
+    cast,
+)
+
+S = TypeVar("S")
+T = TypeVar("T")
+
+
+def import_object(target: str) -> Any:
+    """Import an object from its path, as "module:attribute".
+
+    Examples
+    --------
+    >>> import_object("pathlib:PurePath").__name__
+    'PurePath'
+    """
+    module, _, name = target.partition(":")
+    obj = import_module(module)
+    for attr in filter(None, name.split(".")):
+        obj = getattr(obj, attr)
+    return obj
+
+
+class PluginRegistry(Mapping[str, T], Generic[S, T]):
+    """Mapping from plugin names to plugins. Each plugin is recorded as a
+    cheap spec (e.g. an import path), which is only loaded when the plugin
+    is accessed. Entry points of group are discovered the first time names
+    are listed or an unknown name is looked up; built-in plugins take
+    precedence over entry points with the same name.
+
+    Parameters
+    ----------
+    group:
+        Entry point group of third-party plugins, e.g. "gimie.parsers".
+    builtins:
+        Spec of each built-in plugin.
+    from_target:
+        Converts the import path of an entry point into a spec.
+    load:
+        Converts a spec into the plugin. Defaults to importing the spec as
+        an import path.
+
+    Examples
+    --------
+    >>> registry = PluginRegistry(
+    ...     "gimie.examples", {"path": "pathlib:PurePath"}
+    ... )
+    >>> list(registry)
+    ['path']
+    >>> registry["path"].__name__
+    'PurePath'
+    """
+
+    def __init__(
+        self,
+        group: str,
+        builtins: Dict[str, S],
+        from_target: Optional[Callable[[str], S]] = None,
+        load: Optional[Callable[[S], T]] = None,
+    ):
+        self.group = group
+        self._specs: Dict[str, S] = dict(builtins)
+        self._from_target = from_target or (lambda target: target)
+        # Specs are import paths unless a loader is given
+        self._load: Callable[[S], T] = load or cast(
+            Callable[[S], T], import_object
+        )
+        self._discovered = False
+
+    def _discover(self):
+        if self._discovered:
+            return
+        from importlib.metadata import entry_points
+
+        self._discovered = True
+        for entry_point in entry_points(group=self.group):
+            if entry_point.name not in self._specs:
+                self._specs[entry_point.name] = self._from_target(
+                    entry_point.value
+                )
+
+    def register(self, name: str, spec: S):
+        """Register a plugin at runtime, replacing any plugin with the
+        same name."""
+        self._specs[name] = spec
+
+    def spec(self, name: str) -> S:
+        """Return the spec of a plugin without loading it."""
+        if name not in self._specs:
+            self._discover()
+        return self._specs[name]
+
+    def specs(self) -> Dict[str, S]:
+        """Return the specs of all plugins without loading them."""
+        self._discover()
+        return dict(self._specs)
+
+    def load(self, spec: S) -> T:
+        """Load the plugin described by spec, e.g. one returned by
+        specs()."""
+        return self._load(spec)
+
+    def __getitem__(self, name: str) -> T:
+        return self.load(self.spec(name))
+
+    def __contains__(self, name: object) -> bool:
+        if name not in self._specs:
+            self._discover()
+        return name in self._specs
+
+    def __iter__(self) -> Iterator[str]:
+        self._discover()
+        return iter(list(self._specs))
+
+    def __len__(self) -> int:
+        self._discover()
+        return len(self._specs)
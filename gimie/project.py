@@ -17,18 +17,71 @@
 """Orchestration of multiple extractors for a given project.
 This is the main entry point for end-to-end analysis."""
 
-from typing import Iterable, Optional, Tuple
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import cached_property
+import io
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple, cast
 
 from rdflib import Graph
 from rdflib.term import URIRef
 from urllib.parse import urlparse
 
+from gimie.cache import ResultCache, cache_key
 from gimie.extractors import get_extractor, infer_git_provider
-from gimie.graph.operations import properties_to_graph
-from gimie.parsers import parse_files
+from gimie.graph import TeeSink, Triple, TripleBuffer, TripleSink
+from gimie.graph.namespaces import SDO
+from gimie.io import Resource
+from gimie.models import Repository
+from gimie.parsers import (
+    list_default_parsers,
+    parse_files,
+    parse_files_models,
+)
+from gimie.parsers.findings import Finding
+from gimie.provenance import ExtractionCost, measure_cost
+from gimie.utils.profiling import stage
 from gimie.utils.uri import validate_url
 
 
+class _CacheSlot(NamedTuple):
+    """Where a result of an extraction is stored in the result cache."""
+
+    cache: ResultCache
+    key: str
+    head: str
+
+
+@dataclass
+class ExtractionResult:
+    """Metadata extracted from a repository as Python objects.
+
+    Parameters
+    ----------
+    repository:
+        Metadata from the git provider.
+    findings:
+        Structured values found by file parsers about the repository.
+    """
+
+    repository: Repository
+    findings: List[Finding] = field(default_factory=list)
+
+    def emit(self, sink: TripleSink):
+        """Add the triples of the repository and findings to sink."""
+        self.repository.emit(sink)
+        for finding in self.findings:
+            finding.emit(sink, self.repository.url)
+
+    def to_graph(self) -> Graph:
+        """Convert the result to an RDF graph, as returned by
+        Project.extract."""
+        graph = Graph()
+        graph.bind("schema", SDO)
+        self.emit(graph)
+        return graph
+
+
 class Project:
     """A class to represent a project's git repository.
 
@@ -46,6 +99,13 @@ class Project:
     parser_names:
         Names of file parsers to use. ('license').
         If None, default parsers are used (see gimie.parsers.PARSERS).
+    track_cost:
+        Measure what each extraction costs (requests, bytes, CPU time).
+        The last measurement is available as the cost attribute, and
+        can be added to a graph with its emit method.
+    cache:
+        Where results are stored and looked up, keyed by the commit at
+        the repository HEAD. If None, results are not cached.
 
     Examples
     --------
@@ -59,11 +119,16 @@ class Project:
         base_url: Optional[str] = None,
         git_provider: Optional[str] = None,
         parser_names: Optional[Iterable[str]] = None,
+        track_cost: bool = False,
+        cache: Optional[ResultCache] = None,
     ):
         if not git_provider:
             git_provider = infer_git_provider(path)
 
         self.base_url = base_url
+        self.track_cost = track_cost
+        self.cache = cache
+        self.cost: Optional[ExtractionCost] = None
         self.project_dir = None
         self._cloned = False
         if validate_url(path):
@@ -86,15 +151,147 @@ class Project:
         """Extract repository metadata from git provider to RDF graph and enrich with
         metadata parsed from file contents."""
 
-        repo = self.extractor.extract()
-        repo_graph = repo.to_graph()
+        with self._measure(), stage("extract"):
+            slot = self._cache_slot("graph")
+            cached = slot.cache.get(slot.key) if slot else None
+            if cached is not None:
+                return _load_graph(cached)
+            repo = self._extract_repository()
+            repo_graph = repo.to_graph()
 
-        files = self.extractor.list_files()
-        parsed_graph = parse_files(self.url, files, self.parsers)
-
-        repo_graph += parsed_graph
+            # Parsers add their triples to the repository graph in place
+            files = self._list_files()
+            parse_files(self.url, files, self.parsers, graph=repo_graph)
+            if slot:
+                slot.cache.put(
+                    slot.key, self.url, slot.head, _dump(repo_graph)
+                )
         return repo_graph
 
+    def extract_models(self) -> ExtractionResult:
+        """Extract repository metadata from git provider and parse file
+        contents into Python objects, without creating RDF graphs.
+        Conversion to RDF is left to ExtractionResult.to_graph."""
+        with self._measure(), stage("extract"):
+            slot = self._cache_slot("models")
+            cached = slot.cache.get_object(slot.key) if slot else None
+            if isinstance(cached, ExtractionResult):
+                return cached
+            repo = self._extract_repository()
+            files = self._list_files()
+            findings = parse_files_models(self.url, files, self.parsers)
+            result = ExtractionResult(repository=repo, findings=findings)
+            if slot:
+                slot.cache.put_object(slot.key, self.url, slot.head, result)
+        return result
+
+    def emit(self, sink: TripleSink):
+        """Extract repository metadata and parsed file contents, adding
+        triples to sink as they are produced instead of building a graph.
+
+        Parameters
+        ----------
+        sink:
+            Where triples are added, e.g. a streaming writer
+            (see gimie.graph.ntriples.NTriplesWriter).
+        """
+        with self._measure(), stage("extract"):
+            slot = self._cache_slot("graph")
+            cached = slot.cache.get(slot.key) if slot else None
+            if cached is not None:
+                for triple in _load_graph(cached):
+                    sink.add(cast(Triple, triple))
+                return
+            kept = None
+            if slot:
+                # Keep triples for the cache while streaming them
+                kept = TripleBuffer()
+                sink = TeeSink(sink, kept)
+            self._extract_repository().emit(sink)
+            files = self._list_files()
+            parse_files(self.url, files, self.parsers, graph=sink)
+            if slot and kept is not None:
+                slot.cache.put(slot.key, self.url, slot.head, _dump(kept))
+
+    @cached_property
+    def head(self) -> Optional[str]:
+        """Commit id of the repository HEAD, None if unknown."""
+        return self.extractor.resolve_head()
+
+    def result_key(self, kind: str) -> Optional[str]:
+        """Key identifying a result of the extraction. It changes with
+        every input of the result: the repository HEAD, the parsers, the
+        custom licenses and the gimie version. None if the HEAD is
+        unknown.
+
+        Parameters
+        ----------
+        kind:
+            Kind of result, e.g. "graph" or a serialization format.
+        """
+        if self.head is None:
+            return None
+        parsers = self.parsers
+        if parsers is None:
+            parsers = list_default_parsers()
+        extra = []
+        if "license" in parsers:
+            from gimie.parsers.license.custom import overlay_version
+
+            # Custom licenses change license matches
+            extra.append(str(overlay_version()))
+        return cache_key(kind, self.url, self.head, parsers, *extra)
+
+    def _cache_slot(self, kind: str) -> Optional[_CacheSlot]:
+        """Where the result is stored in the cache, None if results are
+        not cached or the HEAD is unknown."""
+        if self.cache is None:
+            return None
+        key = self.result_key(kind)
+        if key is None or self.head is None:
+            return None
+        return _CacheSlot(self.cache, key, self.head)
+
+    @contextmanager
+    def _measure(self) -> Iterator[None]:
+        """Measure the cost of the enclosed extraction, if tracked. The
+        cost of a failed extraction is not recorded."""
+        # Never leave the cost of a previous extraction behind
+        self.cost = None
+        if not self.track_cost:
+            yield
+            return
+        with measure_cost(self.url) as costs:
+            yield
+        self.cost = costs[0]
+
+    def _extract_repository(self) -> Repository:
+        with stage("extractor.extract"):
+            return self.extractor.extract()
+
+    def _list_files(self) -> List[Resource]:
+        with stage("extractor.list_files"):
+            return self.extractor.list_files()
+
+
+def _dump(triples: Iterable) -> bytes:
+    """Serialize triples to N-Triples for the result cache."""
+    from gimie.graph.ntriples import NTriplesWriter
+
+    stream = io.StringIO()
+    writer = NTriplesWriter(stream)
+    for triple in triples:
+        writer.add(triple)
+    return stream.getvalue().encode()
+
+
+def _load_graph(data: bytes) -> Graph:
+    """Load a graph stored in the result cache."""
+    graph = Graph()
+    graph.bind("schema", SDO)
+    graph.parse(data=data, format="nt")
+    return graph
+
 
 def split_git_url(url: str) -> Tuple[str, str]:
     """Split a git URL into base URL and project path.
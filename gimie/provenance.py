@@ -0,0 +1,160 @@
+# Gimie
+# Copyright 2022 - Swiss Data Science Center (SDSC)
+# A partnership between École Polytechnique Fédérale de Lausanne (EPFL) and
+# Eidgenössische Technische Hochschule Zürich (ETHZ).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Provenance of extractions: what extracting a repository cost, as
+PROV-O activities annotated with measurements in the gimie namespace.
+
+The cost is measured with a profiler (see gimie.utils.profiling), so it
+covers the instrumented stages: API requests and the rate limit points
+they consumed, downloaded bytes, the size of the cloned repository and
+CPU seconds.
+"""
+
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List
+import uuid
+
+from rdflib import PROV, RDF
+from rdflib.term import Literal, URIRef
+
+from gimie.graph import Triple, TripleSink
+from gimie.graph.namespaces import GIMIE, SDO
+from gimie.utils.profiling import Profiler, StageStats
+
+# Stage covering a whole extraction, see gimie.project.Project
+TOTAL_STAGE = "extract"
+CLONE_STAGE = "git.clone"
+
+
+@dataclass
+class ExtractionCost:
+    """Resources used to extract metadata from a repository.
+
+    Parameters
+    ----------
+    url:
+        URL of the repository.
+    started:
+        When the extraction started.
+    ended:
+        When the extraction ended.
+    stages:
+        Measurements of each extraction stage.
+    version:
+        Version of gimie used for the extraction.
+    _id:
+        URI of the extraction activity. Unique by default.
+
+    Examples
+    --------
+    >>> from rdflib import Graph
+    >>> now = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    >>> cost = ExtractionCost(
+    ...     "https://example.org/repo", now, now,
+    ...     {"extract": StageStats(calls=1, requests=3)}, "0.7.0",
+    ... )
+    >>> graph = Graph()
+    >>> cost.emit(graph)
+    >>> graph.value(URIRef(cost._id), GIMIE.httpRequests).toPython()
+    3
+    """
+
+    url: str
+    started: datetime
+    ended: datetime
+    stages: Dict[str, StageStats]
+    version: str
+    _id: str = field(
+        default_factory=lambda: f"{GIMIE}extraction/{uuid.uuid4()}"
+    )
+
+    @property
+    def total(self) -> StageStats:
+        """Measurements of the whole extraction."""
+        return self.stages.get(TOTAL_STAGE, StageStats())
+
+    @property
+    def clone_size(self) -> int:
+        """Size of the cloned repository in bytes, 0 if it was not
+        cloned."""
+        return self.stages.get(CLONE_STAGE, StageStats()).bytes
+
+    def emit(self, sink: TripleSink):
+        """Add the triples describing the extraction activity to sink."""
+        activity = URIRef(self._id)
+        agent = GIMIE[f"version/{self.version}"]
+        sink.add((activity, RDF.type, PROV.Activity))
+        sink.add((activity, PROV.used, URIRef(self.url)))
+        sink.add((activity, PROV.startedAtTime, Literal(self.started)))
+        sink.add((activity, PROV.endedAtTime, Literal(self.ended)))
+        sink.add((activity, PROV.wasAssociatedWith, agent))
+        sink.add((agent, RDF.type, PROV.SoftwareAgent))
+        sink.add((agent, SDO.name, Literal("gimie")))
+        sink.add((agent, SDO.softwareVersion, Literal(self.version)))
+        total = self.total
+        for triple in _measurements(activity, total):
+            sink.add(triple)
+        sink.add((activity, GIMIE.apiPoints, Literal(total.api_points)))
+        sink.add((activity, GIMIE.cloneSize, Literal(self.clone_size)))
+        for name, stats in sorted(self.stages.items()):
+            node = URIRef(f"{self._id}/{name}")
+            sink.add((activity, GIMIE.stage, node))
+            sink.add((node, SDO.name, Literal(name)))
+            sink.add((node, GIMIE.calls, Literal(stats.calls)))
+            for triple in _measurements(node, stats):
+                sink.add(triple)
+
+
+def _measurements(node: URIRef, stats: StageStats) -> List[Triple]:
+    """Triples of the measurements shared by activities and stages."""
+    return [
+        (node, GIMIE.httpRequests, Literal(stats.requests)),
+        (node, GIMIE.bytesDownloaded, Literal(stats.bytes)),
+        (node, GIMIE.cpuSeconds, Literal(round(stats.cpu_s, 6))),
+        (node, GIMIE.wallSeconds, Literal(round(stats.wall_s, 6))),
+    ]
+
+
+@contextmanager
+def measure_cost(url: str) -> Iterator[List[ExtractionCost]]:
+    """Measure the cost of the enclosed extraction of the repository at
+    url. The context value is a list which receives the cost once the
+    extraction completes.
+
+    Examples
+    --------
+    >>> with measure_cost("https://example.org/repo") as costs:
+    ...     pass
+    >>> costs[0].url
+    'https://example.org/repo'
+    """
+    from gimie import __version__
+
+    costs: List[ExtractionCost] = []
+    started = datetime.now(timezone.utc)
+    with Profiler() as profiler:
+        yield costs
+    costs.append(
+        ExtractionCost(
+            url,
+            started,
+            datetime.now(timezone.utc),
+            profiler.stages,
+            __version__,
+        )
+    )
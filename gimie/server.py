@@ -0,0 +1,384 @@
+# Gimie
+# Copyright 2022 - Swiss Data Science Center (SDSC)
+# A partnership between École Polytechnique Fédérale de Lausanne (EPFL) and
+# Eidgenössische Technische Hochschule Zürich (ETHZ).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Long-running HTTP service extracting metadata on request.
+
+The service keeps the state which makes a cold CLI run slow warm: module
+imports, the license model, HTTP connections and verified tokens. It
+also keeps recent responses, identified by an ETag derived from the
+commit at the repository HEAD, so that clients can revalidate cheaply
+and unchanged repositories are not extracted again.
+
+Endpoints:
+
+- ``GET /extract?url=<repository>&format=<ttl|json-ld|nt|nq>``, with
+  optional ``include_parser`` and ``exclude_parser`` parameters, which
+  can be repeated.
+- ``GET /metrics``: metrics in Prometheus text format.
+- ``GET /health``
+
+Invalid requests are answered with status 400, and failures of the git
+provider (API errors, unreachable hosts) with status 502.
+"""
+
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from hashlib import blake2b
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import io
+import json
+import threading
+from typing import Dict, FrozenSet, Iterable, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from gimie import logger
+from gimie.cache import ResultCache
+from gimie.utils.uri import validate_url
+
+CONTENT_TYPES = {
+    "ttl": "text/turtle",
+    "json-ld": "application/ld+json",
+    "nt": "application/n-triples",
+    "nq": "application/n-quads",
+}
+
+
+class InvalidRequest(ValueError):
+    """The parameters of an extraction request are invalid."""
+
+
+@dataclass(frozen=True)
+class Response:
+    """A serialized extraction result.
+
+    Parameters
+    ----------
+    body:
+        The serialized graph.
+    content_type:
+        Media type of the body.
+    etag:
+        Entity tag of the body, None if the repository HEAD is unknown.
+    not_modified:
+        The client already has the current result, so nothing was
+        extracted and the body is empty.
+    """
+
+    body: bytes
+    content_type: str
+    etag: Optional[str] = None
+    not_modified: bool = False
+
+
+def make_etag(result_key: str) -> str:
+    """Weak entity tag of an extraction result, from its key (see
+    gimie.project.Project.result_key).
+
+    Examples
+    --------
+    >>> make_etag("ttl:https://example.org/repo:abc")[:3]
+    'W/"'
+    """
+    digest = blake2b(result_key.encode(), digest_size=16).hexdigest()
+    return f'W/"{digest}"'
+
+
+class ExtractionService:
+    """Extract and serialize repositories, with bounded concurrency.
+    Simultaneous requests for the same output are coalesced into one
+    extraction, and recent responses are kept by ETag.
+
+    Parameters
+    ----------
+    max_workers:
+        Maximum number of concurrent extractions and HEAD lookups.
+    cache_size:
+        Number of responses kept in memory.
+    result_cache:
+        Persistent cache of extraction results, shared with other
+        processes. If None, only responses in memory are reused.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        cache_size: int = 128,
+        result_cache: Optional[ResultCache] = None,
+    ):
+        self.cache_size = cache_size
+        self.result_cache = result_cache
+        self._slots = threading.BoundedSemaphore(max_workers)
+        self._lock = threading.Lock()
+        self._pending: Dict[Tuple, Future] = {}
+        self._responses: OrderedDict[str, Response] = OrderedDict()
+
+    def warm(self):
+        """Load the license model and serialization plugins ahead of the
+        first request."""
+        from rdflib import Graph
+
+        from gimie.parsers.license import load_license_model
+
+        load_license_model()
+        for format in CONTENT_TYPES:
+            if format not in ("nt", "nq"):
+                Graph().serialize(format=format)
+
+    def extract(
+        self,
+        url: str,
+        format: str = "ttl",
+        parser_names: Optional[Iterable[str]] = None,
+        if_none_match: Optional[str] = None,
+    ) -> Response:
+        """Return the serialized metadata of the repository at url. If
+        if_none_match matches the ETag of the current result, an empty
+        response marked as not modified is returned without extracting.
+
+        Parameters
+        ----------
+        url:
+            URL of the repository.
+        format:
+            Serialization format, one of CONTENT_TYPES.
+        parser_names:
+            Names of file parsers to use. Defaults to the default parsers.
+        if_none_match:
+            Value of the If-None-Match header of the request, if any.
+
+        Raises
+        ------
+        InvalidRequest
+            If the format, URL or parser names are invalid.
+        """
+        from gimie.parsers import PARSERS, list_default_parsers
+        from gimie.project import Project
+        from gimie.utils.metrics import get_registry, record_cache
+
+        if format not in CONTENT_TYPES:
+            raise InvalidRequest(f"Unsupported format: {format}.")
+        if not validate_url(url):
+            raise InvalidRequest(f"Invalid repository URL: {url}.")
+        parsers: FrozenSet[str] = frozenset(
+            list_default_parsers() if parser_names is None else parser_names
+        )
+        unknown = parsers - set(PARSERS)
+        if unknown:
+            raise InvalidRequest(
+                f"Unknown parsers: {', '.join(sorted(unknown))}."
+            )
+        project = Project(url, parser_names=parsers, cache=self.result_cache)
+        # Resolving the HEAD queries the provider too
+        with self._slots:
+            result_key = project.result_key(format)
+        etag = make_etag(result_key) if result_key else None
+        if _etag_matches(if_none_match, etag):
+            return Response(b"", CONTENT_TYPES[format], etag, True)
+        if etag is not None:
+            with self._lock:
+                cached = self._responses.get(etag)
+                if cached is not None:
+                    self._responses.move_to_end(etag)
+            record_cache("responses", cached is not None)
+            if cached is not None:
+                return cached
+
+        key = (url, format, parsers, result_key)
+        with self._lock:
+            future = self._pending.get(key)
+            owner = future is None
+            if owner:
+                future = self._pending[key] = Future()
+        if not owner:
+            get_registry().counter(
+                "gimie_coalesced_requests_total",
+                "Requests served by an extraction already in progress.",
+            ).inc()
+            return future.result()
+
+        try:
+            with self._slots:
+                body = serialize(project, format)
+            response = Response(body, CONTENT_TYPES[format], etag)
+            if etag is not None:
+                self._store(etag, response)
+            future.set_result(response)
+            return response
+        except BaseException as err:
+            future.set_exception(err)
+            raise
+        finally:
+            with self._lock:
+                del self._pending[key]
+
+    def _store(self, etag: str, response: Response):
+        """Keep a response, evicting the least recently used ones."""
+        with self._lock:
+            self._responses[etag] = response
+            while len(self._responses) > self.cache_size:
+                self._responses.popitem(last=False)
+
+
+def serialize(project, format: str) -> bytes:
+    """Extract a project and serialize its metadata."""
+    from gimie.graph.ntriples import NTriplesWriter
+    from gimie.utils.profiling import stage
+
+    if format in ("nt", "nq"):
+        stream = io.StringIO()
+        writer = NTriplesWriter(
+            stream, graph=project.url if format == "nq" else None
+        )
+        project.emit(writer)
+        return stream.getvalue().encode()
+    graph = project.extract()
+    with stage("serialize"):
+        return graph.serialize(format=format).encode()
+
+
+def _etag_matches(header: Optional[str], etag: Optional[str]) -> bool:
+    """Whether an If-None-Match header matches etag, using the weak
+    comparison of RFC 9110.
+
+    Examples
+    --------
+    >>> _etag_matches('"a", W/"b"', 'W/"b"')
+    True
+    >>> _etag_matches('"a"', None)
+    False
+    """
+    if header is None or etag is None:
+        return False
+    if header.strip() == "*":
+        return True
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag.removeprefix("W/") in tags
+
+
+def make_handler(service: ExtractionService):
+    """Build a request handler class serving the extraction service."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            request = urlparse(self.path)
+            if request.path == "/extract":
+                self._extract(parse_qs(request.query))
+            elif request.path == "/metrics":
+                from gimie.utils.metrics import get_registry
+
+                self._send(
+                    200,
+                    get_registry().render().encode(),
+                    "text/plain; version=0.0.4",
+                )
+            elif request.path == "/health":
+                self._send_json(200, {"status": "ok"})
+            else:
+                self._send_json(404, {"error": "Not found."})
+
+        def _extract(self, params: Dict[str, list]):
+            from requests import RequestException
+
+            url = params.get("url", [None])[0]
+            if url is None:
+                self._send_json(400, {"error": "Missing url parameter."})
+                return
+            format = params.get("format", ["ttl"])[0]
+            parser_names = _select_parsers(
+                params.get("include_parser"), params.get("exclude_parser")
+            )
+            try:
+                response = service.extract(
+                    url,
+                    format,
+                    parser_names,
+                    self.headers.get("If-None-Match"),
+                )
+            except InvalidRequest as err:
+                self._send_json(400, {"error": str(err)})
+                return
+            except (ValueError, ConnectionError, RequestException) as err:
+                # Errors reported by or reaching the git provider
+                logger.warning("Extraction of %s failed: %s", url, err)
+                self._send_json(502, {"error": str(err)})
+                return
+            except Exception as err:
+                logger.exception("Extraction of %s failed.", url)
+                self._send_json(500, {"error": str(err)})
+                return
+            headers = {}
+            if response.etag is not None:
+                headers["ETag"] = response.etag
+            if response.not_modified:
+                self._send(304, b"", None, headers)
+                return
+            self._send(200, response.body, response.content_type, headers)
+
+        def _send_json(self, status: int, data: dict):
+            self._send(status, json.dumps(data).encode(), "application/json")
+
+        def _send(
+            self,
+            status: int,
+            body: bytes,
+            content_type: Optional[str],
+            headers: Optional[Dict[str, str]] = None,
+        ):
+            self.send_response(status)
+            if content_type is not None:
+                self.send_header("Content-Type", content_type)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.info("%s - %s", self.address_string(), format % args)
+
+    return Handler
+
+
+def _select_parsers(
+    include: Optional[list], exclude: Optional[list]
+) -> Optional[FrozenSet[str]]:
+    """Parser names selected by include and exclude lists, as in the
+    CLI. None selects the default parsers."""
+    from gimie.parsers import list_default_parsers
+
+    if include:
+        return frozenset(include)
+    if exclude:
+        return frozenset(list_default_parsers() - set(exclude))
+    return None
+
+
+def make_server(
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    service: Optional[ExtractionService] = None,
+) -> ThreadingHTTPServer:
+    """Create an HTTP server for the extraction service. Requests are
+    handled in threads, while the service bounds concurrent extractions.
+    """
+    httpd = ThreadingHTTPServer(
+        (host, port), make_handler(service or ExtractionService())
+    )
+    httpd.daemon_threads = True
+    return httpd
@@ -0,0 +1,322 @@
+# Gimie
+# Copyright 2022 - Swiss Data Science Center (SDSC)
+# A partnership between École Polytechnique Fédérale de Lausanne (EPFL) and
+# Eidgenössische Technische Hochschule Zürich (ETHZ).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Operational metrics (HTTP requests, caches, clones), with a Prometheus
+text exposition.
+
+Instrumented code reports to the active registry, returned by
+get_registry(). The default registry keeps metrics in memory; it can be
+replaced with set_registry(), e.g. by an adapter to another metrics
+backend implementing counter(), gauge() and histogram().
+
+Examples
+--------
+>>> registry = MetricsRegistry()
+>>> requests = registry.counter(
+...     "requests_total", "Requests sent.", ("host",)
+... )
+>>> requests.inc(host="api.github.com")
+>>> print(registry.render(), end="")
+# HELP requests_total Requests sent.
+# TYPE requests_total counter
+requests_total{host="api.github.com"} 1.0
+"""
+
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+import re
+import threading
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+LabelValues = Tuple[str, ...]
+DEFAULT_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class _Metric(ABC):
+    """Base class of metrics with labels."""
+
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(label, "")) for label in self.labels)
+
+    def _format_labels(self, values: LabelValues, **extra: str) -> str:
+        pairs = list(zip(self.labels, values)) + list(extra.items())
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+    @abstractmethod
+    def samples(self) -> List[str]:
+        """Exposition lines of the metric values, without the header."""
+        ...
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.help}",
+            f"# TYPE {self.name} {self.kind}",
+            *self.samples(),
+        ]
+        return "\n".join(lines) + "\n"
+
+
+class Counter(_Metric):
+    """Monotonically increasing value."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self.values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def get(self, **labels: str) -> float:
+        return self.values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{self._format_labels(key)} {value}"
+            for key, value in sorted(self.values.items())
+        ]
+
+
+class Gauge(Counter):
+    """Value which can go up and down."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str):
+        with self._lock:
+            self.values[self._key(labels)] = float(value)
+
+
+class Histogram(_Metric):
+    """Distribution of observed values, in cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label values: count in each bucket (+Inf last), sum
+        self.values: Dict[LabelValues, Tuple[List[int], float]] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self.values.get(
+                key, ([0] * (len(self.buckets) + 1), 0.0)
+            )
+            counts[bisect_left(self.buckets, value)] += 1
+            self.values[key] = (counts, total + value)
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, (counts, total) in sorted(self.values.items()):
+            cumulative = 0
+            bounds = [str(float(b)) for b in self.buckets] + ["+Inf"]
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                labels = self._format_labels(key, le=bound)
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = self._format_labels(key)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """In-memory collection of metrics. Metrics are created on first use
+    and returned as is on later calls with the same name."""
+
+    def __init__(self):
+        self.metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = cls(name, *args, **kwargs)
+            elif type(metric) is not cls:
+                raise ValueError(f"{name} is already a {metric.kind}.")
+            return metric
+
+    def counter(
+        self, name: str, help: str, labels: Sequence[str] = ()
+    ) -> Counter:
+        return self._get(Counter, name, help, labels)
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._get(Gauge, name, help, labels)
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._get(Histogram, name, help, labels, buckets)
+
+    def render(self) -> str:
+        """Prometheus text exposition of all metrics."""
+        return "".join(
+            metric.render() for _, metric in sorted(self.metrics.items())
+        )
+
+    def write(self, path: str):
+        """Write the text exposition to a file."""
+        with open(path, "w", encoding="utf-8") as fp:
+            fp.write(self.render())
+
+
+_REGISTRY = MetricsRegistry()
+
+
+def get_registry() -> MetricsRegistry:
+    """Registry which instrumented code reports to."""
+    return _REGISTRY
+
+
+def set_registry(registry: MetricsRegistry) -> MetricsRegistry:
+    """Replace the active registry and return the previous one."""
+    global _REGISTRY
+    previous, _REGISTRY = _REGISTRY, registry
+    return previous
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Repository owners and names are replaced to keep label cardinality low
+_REPO_PATH = re.compile(r"^(/?(?:api/v\d+/)?(?:repos|projects)/)[^/]+/[^/]+")
+
+
+def endpoint_label(url: str) -> str:
+    """Low-cardinality endpoint name of an API URL.
+
+    Examples
+    --------
+    >>> endpoint_label("https://api.github.com/repos/foo/bar/contributors")
+    '/repos/:owner/:repo/contributors'
+    >>> endpoint_label("https://gitlab.com/api/graphql")
+    '/api/graphql'
+    """
+    path = re.sub("/+", "/", urlparse(url).path)
+    return _REPO_PATH.sub(r"\1:owner/:repo", path)
+
+
+def record_request(
+    url: str,
+    method: str,
+    status: int,
+    seconds: float,
+    headers: Optional[Mapping[str, str]] = None,
+    endpoint: Optional[str] = None,
+):
+    """Report an HTTP request: its count by status, latency and the rate
+    limit budget left, if the response headers announce it.
+
+    Parameters
+    ----------
+    url:
+        Requested URL.
+    method:
+        HTTP method.
+    status:
+        Response status code.
+    seconds:
+        Time until the response headers were received.
+    headers:
+        Response headers.
+    endpoint:
+        Endpoint label. Derived from url by default.
+    """
+    registry = get_registry()
+    host = urlparse(url).netloc
+    endpoint = endpoint or endpoint_label(url)
+    registry.counter(
+        "gimie_http_requests_total",
+        "HTTP requests sent.",
+        ("host", "endpoint", "method", "status"),
+    ).inc(host=host, endpoint=endpoint, method=method, status=str(status))
+    registry.histogram(
+        "gimie_http_request_duration_seconds",
+        "Time until HTTP response headers are received.",
+        ("host", "endpoint"),
+    ).observe(seconds, host=host, endpoint=endpoint)
+    remaining = None
+    for name in ("X-RateLimit-Remaining", "RateLimit-Remaining"):
+        if headers is not None and name in headers:
+            remaining = headers[name]
+            break
+    if remaining is not None:
+        try:
+            registry.gauge(
+                "gimie_rate_limit_remaining",
+                "Requests left in the current rate limit window.",
+                ("host",),
+            ).set(float(remaining), host=host)
+        except ValueError:
+            pass
+
+
+def record_bytes(url: str, count: int, endpoint: Optional[str] = None):
+    """Report bytes received from a URL."""
+    get_registry().counter(
+        "gimie_http_response_bytes_total",
+        "Bytes received in HTTP response bodies.",
+        ("host", "endpoint"),
+    ).inc(
+        count,
+        host=urlparse(url).netloc,
+        endpoint=endpoint or endpoint_label(url),
+    )
+
+
+def record_cache(cache: str, hit: bool):
+    """Report a cache lookup. The hit ratio is hits / (hits + misses)."""
+    get_registry().counter(
+        "gimie_cache_requests_total", "Cache lookups.", ("cache", "result")
+    ).inc(cache=cache, result="hit" if hit else "miss")
+
+
+def record_clone(seconds: float, success: bool):
+    """Report the duration of a git clone."""
+    get_registry().histogram(
+        "gimie_git_clone_duration_seconds",
+        "Duration of git clones.",
+        ("result",),
+    ).observe(seconds, result="success" if success else "failure")
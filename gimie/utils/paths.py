@@ -0,0 +1,40 @@
+# Gimie
+# Copyright 2022 - Swiss Data Science Center (SDSC)
+# A partnership between École Polytechnique Fédérale de Lausanne (EPFL) and
+# Eidgenössische Technische Hochschule Zürich (ETHZ).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Locations of user-level files written by gimie."""
+
+import os
+from pathlib import Path
+
+
+def user_data_dir() -> Path:
+    """Directory for persistent user data, such as custom licenses.
+    Defaults to $XDG_DATA_HOME/gimie and can be overridden with the
+    GIMIE_DATA_DIR environment variable."""
+    if os.environ.get("GIMIE_DATA_DIR"):
+        return Path(os.environ["GIMIE_DATA_DIR"])
+    base = os.environ.get("XDG_DATA_HOME") or Path.home() / ".local" / "share"
+    return Path(base) / "gimie"
+
+
+def user_cache_dir() -> Path:
+    """Directory for cached data which can be safely deleted, such as
+    extraction results. Defaults to $XDG_CACHE_HOME/gimie and can be
+    overridden with the GIMIE_CACHE_DIR environment variable."""
+    if os.environ.get("GIMIE_CACHE_DIR"):
+        return Path(os.environ["GIMIE_CACHE_DIR"])
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "gimie"
@@ -0,0 +1,238 @@
+# Gimie
+# Copyright 2022 - Swiss Data Science Center (SDSC)
+# A partnership between École Polytechnique Fédérale de Lausanne (EPFL) and
+# Eidgenössische Technische Hochschule Zürich (ETHZ).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Per-stage profiling of extractions.
+
+Code is instrumented with the stage() context manager, add_bytes() and
+add_request(). They are no-ops unless a Profiler is active in the current
+context, so that instrumentation costs a context variable lookup when
+disabled. Profilers can be nested, e.g. to account for each repository of
+a profiled batch: stages are then recorded by all active profilers.
+
+Traced memory peaks are process-wide, so peak memory is only measured for
+stages run on the thread that entered a memory profiler. Code that would
+run stages concurrently should run them sequentially when
+tracing_memory() is true.
+
+Examples
+--------
+>>> with Profiler() as profiler:
+...     with stage("download"):
+...         add_bytes(1024)
+>>> profiler.report()["download"]["bytes"]
+1024
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from dataclasses import asdict, dataclass
+import threading
+import time
+import tracemalloc
+from typing import Any, Dict, Iterator, List, Optional
+
+
+@dataclass
+class StageStats:
+    """Accumulated measurements of a stage, over all its calls.
+
+    Parameters
+    ----------
+    calls:
+        Number of times the stage was entered.
+    wall_s:
+        Total wall time, in seconds.
+    cpu_s:
+        Total CPU time of the process, in seconds.
+    bytes:
+        Bytes transferred (downloaded or read) during the stage.
+    requests:
+        Number of HTTP requests sent during the stage.
+    api_points:
+        Rate limit points consumed by API requests during the stage.
+    peak_memory_mb:
+        Largest increase of traced Python memory during one call, if
+        memory is traced on the thread running the stage.
+    """
+
+    calls: int = 0
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    bytes: int = 0
+    requests: int = 0
+    api_points: float = 0.0
+    peak_memory_mb: Optional[float] = None
+
+
+class _Frame:
+    """A running stage, with its stats in each active profiler."""
+
+    __slots__ = ("stats", "parent", "memory_start", "memory_peak")
+
+    def __init__(self, stats: List[StageStats], parent: Optional["_Frame"]):
+        self.stats = stats
+        self.parent = parent
+        self.memory_start = 0
+        self.memory_peak = 0
+
+
+# Stats of all profilers are updated under the same lock
+_LOCK = threading.Lock()
+
+
+_PROFILER: ContextVar[Optional["Profiler"]] = ContextVar(
+    "gimie_profiler", default=None
+)
+_FRAME: ContextVar[Optional[_Frame]] = ContextVar("gimie_stage", default=None)
+
+
+class Profiler:
+    """Collects stage measurements while active, i.e. within its context.
+    Stages are identified by name; nested stages are measured separately
+    and are included in the measurements of their parents.
+
+    Parameters
+    ----------
+    memory:
+        Trace memory allocations with tracemalloc to record peak memory
+        per stage. This slows down execution noticeably.
+    """
+
+    def __init__(self, memory: bool = False):
+        self.memory = memory
+        self.stages: Dict[str, StageStats] = {}
+        self._parent: Optional[Profiler] = None
+        self._token: Optional[Token[Optional[Profiler]]] = None
+        self._thread: Optional[int] = None
+        self._started_tracing = False
+
+    def __enter__(self) -> "Profiler":
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._parent = _PROFILER.get()
+        self._thread = threading.get_ident()
+        self._token = _PROFILER.set(self)
+        return self
+
+    def __exit__(self, *exc):
+        if self._token is not None:
+            _PROFILER.reset(self._token)
+            self._token = None
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def _stats(self, name: str) -> StageStats:
+        with _LOCK:
+            return self.stages.setdefault(name, StageStats())
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """Measurements of each stage, in order of first use."""
+        return {name: asdict(stats) for name, stats in self.stages.items()}
+
+
+def profiling() -> bool:
+    """Whether a profiler is active in the current context."""
+    return _PROFILER.get() is not None
+
+
+def tracing_memory() -> bool:
+    """Whether stages run on the current thread measure peak memory."""
+    return _traces_memory(_active())
+
+
+def _traces_memory(profilers: List[Profiler]) -> bool:
+    thread = threading.get_ident()
+    return tracemalloc.is_tracing() and any(
+        p.memory and p._thread == thread for p in profilers
+    )
+
+
+def _active() -> List[Profiler]:
+    """Active profilers, innermost first."""
+    profilers = []
+    profiler = _PROFILER.get()
+    while profiler is not None:
+        profilers.append(profiler)
+        profiler = profiler._parent
+    return profilers
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Measure the enclosed code as the stage name, if profiling."""
+    if _PROFILER.get() is None:
+        yield
+        return
+    profilers = _active()
+    parent = _FRAME.get()
+    frame = _Frame([p._stats(name) for p in profilers], parent)
+    memory = _traces_memory(profilers)
+    if memory:
+        current, peak = tracemalloc.get_traced_memory()
+        if parent is not None:
+            parent.memory_peak = max(parent.memory_peak, peak)
+        tracemalloc.reset_peak()
+        frame.memory_start = current
+    token = _FRAME.set(frame)
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        yield
+    finally:
+        wall = time.perf_counter() - wall
+        cpu = time.process_time() - cpu
+        _FRAME.reset(token)
+        peak_mb = None
+        if memory:
+            peak = max(frame.memory_peak, tracemalloc.get_traced_memory()[1])
+            if parent is not None:
+                parent.memory_peak = max(parent.memory_peak, peak)
+            peak_mb = (peak - frame.memory_start) / 1e6
+        with _LOCK:
+            for stats in frame.stats:
+                stats.calls += 1
+                stats.wall_s += wall
+                stats.cpu_s += cpu
+                if peak_mb is not None:
+                    stats.peak_memory_mb = max(
+                        stats.peak_memory_mb or 0, peak_mb
+                    )
+
+
+def _add(field: str, amount: float):
+    """Add amount to a field of the current stage and its parents."""
+    frame = _FRAME.get()
+    if frame is None:
+        return
+    with _LOCK:
+        while frame is not None:
+            for stats in frame.stats:
+                setattr(stats, field, getattr(stats, field) + amount)
+            frame = frame.parent
+
+
+def add_bytes(count: int):
+    """Count bytes transferred in the current stage and its parents, if
+    profiling."""
+    _add("bytes", count)
+
+
+def add_request(points: float = 1.0):
+    """Count an HTTP request, and the rate limit points it consumed, in
+    the current stage and its parents, if profiling."""
+    _add("requests", 1)
+    _add("api_points", points)
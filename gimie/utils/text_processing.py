@@ -1,17 +1,29 @@
 from collections import Counter
-from functools import reduce
+from hashlib import blake2b
+import os
 import re
 from typing import (
+    Annotated,
+    Any,
     Dict,
     Iterable,
+    Iterator,
     List,
     Literal,
+    Mapping,
     Optional,
     Tuple,
+    Union,
 )
 
 import numpy as np
-from pydantic import BaseModel, Field
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Field,
+    PlainSerializer,
+    PlainValidator,
+)
 from pydantic.dataclasses import dataclass
 import scipy.sparse as sp
 
@@ -81,6 +93,29 @@ def get_ngram_counts(
     return ngram_counts
 
 
+def hash_ngram(ngram: str, n_features: int) -> int:
+    """Map an ngram to a column index using a stable hash. Unlike the
+    builtin hash(), blake2b does not depend on PYTHONHASHSEED, so the
+    mapping is identical across processes and platforms.
+
+    Parameters
+    ----------
+    ngram:
+        The ngram to hash.
+    n_features:
+        Number of columns to map ngrams into.
+
+    Examples
+    --------
+    >>> hash_ngram("red roses", n_features=2**20)
+    717163
+    >>> 0 <= hash_ngram("red roses", n_features=16) < 16
+    True
+    """
+    digest = blake2b(ngram.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little") % n_features
+
+
 def normalize_csr_rows(X: sp.csr_matrix, norm: str = "l1") -> sp.csr_matrix:
     """Normalize rows of a CSR matrix in place.
 
@@ -114,6 +149,66 @@ def normalize_csr_rows(X: sp.csr_matrix, norm: str = "l1") -> sp.csr_matrix:
     return X
 
 
+class ArrayVocabulary(Mapping[str, int]):
+    """Read-only vocabulary backed by numpy arrays, so that it can be
+    loaded from a memory-mapped buffer without building a dict.
+
+    Parameters
+    ----------
+    ngrams:
+        Sorted array of utf-8 encoded ngrams (fixed-width bytes dtype).
+    columns:
+        Column index of each ngram.
+
+    Examples
+    --------
+    >>> vocab = ArrayVocabulary.from_dict({"this": 1, "is": 0})
+    >>> vocab["this"], "test" in vocab, len(vocab)
+    (1, False, 2)
+    >>> vocab.lookup(["is", "test", "this"]).tolist()
+    [0, -1, 1]
+    """
+
+    def __init__(self, ngrams: np.ndarray, columns: np.ndarray):
+        self.ngrams = ngrams
+        self.columns = columns
+
+    @classmethod
+    def from_dict(cls, vocab: Mapping[str, int]) -> "ArrayVocabulary":
+        """Build an array vocabulary from a mapping of ngrams to columns."""
+        items = sorted((t.encode(), c) for t, c in vocab.items())
+        ngrams = np.array([t for t, _ in items], dtype=bytes)
+        columns = np.array([c for _, c in items], dtype=np.int32)
+        return cls(ngrams, columns)
+
+    def lookup(self, ngrams: List[str]) -> np.ndarray:
+        """Return the column of each ngram, or -1 if it is not in the
+        vocabulary, using a single vectorized binary search."""
+        if not len(self):
+            return np.full(len(ngrams), -1)
+        width = self.ngrams.dtype.itemsize
+        encoded = [t.encode() for t in ngrams]
+        # Longer keys would be truncated by numpy and could match a prefix.
+        fits = np.array([len(t) <= width for t in encoded], dtype=bool)
+        keys = np.array(encoded, dtype=self.ngrams.dtype)
+        pos = np.searchsorted(self.ngrams, keys)
+        pos = np.minimum(pos, len(self.ngrams) - 1)
+        found = fits & (self.ngrams[pos] == keys)
+        return np.where(found, self.columns[pos], -1)
+
+    def __getitem__(self, ngram: str) -> int:
+        col = self.lookup([ngram])[0]
+        if col < 0:
+            raise KeyError(ngram)
+        return int(col)
+
+    def __iter__(self) -> Iterator[str]:
+        return (t.decode() for t in self.ngrams.tolist())
+
+    def __len__(self) -> int:
+        return len(self.ngrams)
+
+
 @dataclass
 class TfidfConfig:
     """Configuration for TfidfVectorizer.
@@ -136,6 +231,10 @@ class TfidfConfig:
         Normalization to use for the tfidf matrix. Either "l1" or "l2".
     sublinear_tf:
         Apply sublinear tf scaling, i.e. replace tf with 1 + log(tf).
+    n_features:
+        If set, ngrams are hashed into this many columns instead of being
+        looked up in a vocabulary (hashing trick). No vocabulary is stored
+        and max_features is ignored. Mutually exclusive with vocabulary.
     """
 
     max_features: Optional[int] = None
@@ -144,6 +243,28 @@ class TfidfConfig:
     vocabulary: Optional[Dict[str, int]] = None
     norm: Optional[Literal["l1", "l2"]] = None
     sublinear_tf: bool = False
+    n_features: Optional[int] = None
+
+    def __post_init__(self):
+        if self.n_features is not None and self.vocabulary is not None:
+            raise ValueError(
+                "vocabulary and n_features are mutually exclusive."
+            )
+
+
+def _as_float_array(value: Any) -> np.ndarray:
+    """Convert a sequence of numbers to a float64 array."""
+    return np.asarray(value, dtype=np.float64)
+
+
+# Idf vectors are numpy arrays in memory and lists of numbers in JSON
+FloatArray = Annotated[
+    np.ndarray,
+    PlainValidator(_as_float_array),
+    PlainSerializer(
+        lambda array: [float(v) for v in array], return_type=List[float]
+    ),
+]
 
 
 class TfidfVectorizer(BaseModel):
@@ -163,6 +284,7 @@ class TfidfVectorizer(BaseModel):
         Precomputed idf vector. If None, it is computed from the data.
     vocabulary:
         Vocabulary to use. If None, the vocabulary is inferred from the data.
+        Always empty when the config uses hashing (n_features).
 
     Examples
     --------
@@ -171,56 +293,112 @@ class TfidfVectorizer(BaseModel):
     >>> tfidf = vectorizer.fit_transform(docs)
     >>> tfidf.shape
     (3, 8)
+    >>> hasher = TfidfVectorizer(config=TfidfConfig(n_features=2**10))
+    >>> hasher.fit_transform(docs).shape
+    (3, 1024)
     """
 
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     config: TfidfConfig
-    idf_vector: List[float] = list()
+    idf_vector: FloatArray = Field(
+        default_factory=lambda: np.zeros(0, dtype=np.float64)
+    )
     vocabulary: Dict[str, int] = Field(default_factory=dict)
 
-    def _get_idf_vector(
-        self, ngram_counts: List[Counter[str]], vocab: Dict[str, int]
-    ) -> List[float]:
-        """Compute the idf vector for the whole corpus from a list of
-        ngram counts from each document.
+    @property
+    def n_features(self) -> int:
+        """Number of columns in the output tfidf matrix."""
+        if self.config.n_features is not None:
+            return self.config.n_features
+        return len(self.vocabulary)
+
+    def _get_columns(
+        self, ngram_counts: Iterable[Counter[str]], vocab: Mapping[str, int]
+    ) -> List[Dict[int, int]]:
+        """Map the ngram counts of each document to column counts. Ngrams
+        are either looked up in the vocabulary (and dropped if missing) or
+        hashed, in which case colliding ngrams have their counts summed.
 
         Parameters
         ----------
         ngram_counts:
-            List of ngram counts for each document.
+            Ngram counts for each document, consumed once.
         vocab:
-            Vocabulary to use. Each ngram key has an integer value used as the
-            column index of the output matrix.
+            Vocabulary to use. Ignored when hashing.
         """
-        idf_vector = np.zeros(len(vocab), dtype=np.float64)
+        n_features = self.config.n_features
+        if n_features is None and isinstance(vocab, ArrayVocabulary):
+            columns = []
+            for record in ngram_counts:
+                cols = vocab.lookup(list(record.keys())).tolist()
+                columns.append(
+                    {
+                        col: c
+                        for col, c in zip(cols, record.values())
+                        if col >= 0
+                    }
+                )
+            return columns
+        if n_features is None:
+            return [
+                {vocab[t]: c for t, c in record.items() if t in vocab}
+                for record in ngram_counts
+            ]
+
+        columns: List[Dict[int, int]] = []
         for record in ngram_counts:
-            idf_vector[[vocab[t] for t in record.keys() if t in vocab]] += 1
-        n_docs = len(ngram_counts) + int(self.config.smooth_idf)
-        idf_vector += int(self.config.smooth_idf)
-        idf_vector = 1 + np.log(n_docs / (idf_vector))
-        return list(idf_vector)
+            cols: Dict[int, int] = {}
+            for t, c in record.items():
+                col = hash_ngram(t, n_features)
+                cols[col] = cols.get(col, 0) + c
+            columns.append(cols)
+        return columns
+
+    def _get_idf_vector(self, doc_freq: np.ndarray, n_docs: int) -> np.ndarray:
+        """Compute the idf vector from the number of documents in which
+        each column appears.
+
+        Parameters
+        ----------
+        doc_freq:
+            Document frequency of each column.
+        n_docs:
+            Number of documents in the corpus.
+        """
+        n_docs += int(self.config.smooth_idf)
+        idf_vector = doc_freq.astype(np.float64) + int(self.config.smooth_idf)
+        return 1 + np.log(n_docs / idf_vector)
 
     def _get_tf_matrix(
-        self, ngram_counts: List[Counter[str]], vocab: Dict[str, int]
+        self, columns: List[Dict[int, int]], n_features: int
     ) -> sp.csr_matrix:
-        """Compute the term frequency matrix for the whole corpus from a
-        list of ngram counts from each document.
+        """Compute the term frequency matrix for the whole corpus from the
+        column counts of each document.
 
         Parameters
         ----------
-        ngram_counts:
-            List of ngram counts for each document (rows of the output matrix).
-        vocab:
-            Vocabulary to use. Each ngram key has an integer value used as the
-            column index of the output matrix.
+        columns:
+            Column counts for each document (rows of the output matrix).
+        n_features:
+            Number of columns of the output matrix.
         """
-        tf_matrix = sp.lil_matrix(
-            (len(ngram_counts), len(vocab)), dtype=np.float64
+        indptr = [0]
+        indices: List[int] = []
+        data: List[int] = []
+        for record in columns:
+            indices.extend(record.keys())
+            data.extend(record.values())
+            indptr.append(len(indices))
+        tf_matrix = sp.csr_matrix(
+            (
+                np.array(data, dtype=np.float64),
+                np.array(indices, dtype=np.int64),
+                np.array(indptr, dtype=np.int64),
+            ),
+            shape=(len(columns), n_features),
         )
-        for idx, record in enumerate(ngram_counts):
-            pairs = record.items()
-            counts = [v for _, v in pairs]
-            tf_matrix[idx, [vocab[t] for t, _ in pairs]] = [c for c in counts]
-        tf_matrix = tf_matrix.tocsr()
+        tf_matrix.sort_indices()
         if self.config.sublinear_tf:
             # applies log in place
             np.log(tf_matrix.data, tf_matrix.data)  # type: ignore
@@ -228,39 +406,35 @@ class TfidfVectorizer(BaseModel):
         return tf_matrix
 
     def _get_tfidf(
-        self, ngram_counts: List[Counter[str]], vocab: Dict[str, int]
+        self, columns: List[Dict[int, int]], n_features: int
     ) -> sp.csr_matrix:
-        """Compute the tfidf matrix over the whole corpus from a list of
-        ngram counts from each document.
+        """Compute the tfidf matrix over the whole corpus from the
+        column counts of each document.
 
         Parameters
         ----------
-        ngram_counts:
-            List of ngram counts for each document.
-        vocab:
-            Vocabulary to use. Each ngram key has an integer value used as the
-            column index of the output matrix.
+        columns:
+            Column counts for each document.
+        n_features:
+            Number of columns of the output matrix.
         """
-        tf_matrix: sp.csr_matrix = self._get_tf_matrix(
-            ngram_counts, vocab=vocab
-        )
+        tf_matrix: sp.csr_matrix = self._get_tf_matrix(columns, n_features)
 
-        tfidf_matrix = tf_matrix.multiply(np.array(self.idf_vector))  # type: ignore
+        tfidf_matrix = tf_matrix.multiply(self.idf_vector)
         return tfidf_matrix.tocsr()  # type: ignore
 
-    def _get_vocabulary(
-        self, ngram_counts: Iterable[Counter[str]]
-    ) -> dict[str, int]:
-        """Get the vocabulary from a list of ngram counts. The vocabulary
-        is a mapping from ngrams to integer used as column indices in the
-        tfidf matrix.
+    def _get_vocabulary(self, max_counts: Counter[str]) -> dict[str, int]:
+        """Get the vocabulary from the highest count of each ngram in any
+        document. The vocabulary is a mapping from ngrams to integer used
+        as column indices in the tfidf matrix.
 
         Parameters
         ----------
-        ngram_counts:
-            List of ngram counts for each document.
+        max_counts:
+            Highest count of each ngram in a single document, in order of
+            first appearance.
         """
-        counts_corpus = reduce(lambda x, y: x | y, ngram_counts).most_common()
+        counts_corpus = max_counts.most_common()
         if self.config.max_features is not None:
             counts_corpus = counts_corpus[: self.config.max_features]
         return {
@@ -275,11 +449,63 @@ class TfidfVectorizer(BaseModel):
         ----------
         data:
             List of documents contents to fit the vectorizer to."""
-        counts_records: List[Counter[str]] = [
+        self.fit_counts(
             get_ngram_counts(doc, self.config.ngram_range) for doc in data
-        ]
-        vocab = self.config.vocabulary or self._get_vocabulary(counts_records)
-        self.idf_vector = self._get_idf_vector(counts_records, vocab=vocab)
+        )
+
+    def fit_counts(self, counts_records: Iterable[Counter[str]]):
+        """Fit the vectorizer to precomputed ngram counts, as returned by
+        :func:`get_ngram_counts` with the configured ngram range. This
+        allows tokenizing documents in parallel.
+
+        Records are consumed in a single pass and not kept, so that large
+        corpora can be streamed from a generator.
+
+        Parameters
+        ----------
+        counts_records:
+            Ngram counts of each document."""
+        vocab: Dict[str, int]
+        if self.config.n_features is not None:
+            vocab = {}
+            n_features = self.config.n_features
+        elif self.config.vocabulary:
+            vocab = self.config.vocabulary
+            n_features = len(vocab)
+        else:
+            self._fit_vocabulary(counts_records)
+            return
+        doc_freq = np.zeros(n_features, dtype=np.int64)
+        n_docs = 0
+        for record in counts_records:
+            (cols,) = self._get_columns([record], vocab=vocab)
+            doc_freq[list(cols.keys())] += 1
+            n_docs += 1
+        self.idf_vector = self._get_idf_vector(doc_freq, n_docs)
+        self.vocabulary = vocab
+
+    def _fit_vocabulary(self, counts_records: Iterable[Counter[str]]):
+        """Learn the vocabulary and idf vector in a single pass, keeping
+        only corpus-wide counts per ngram.
+
+        Parameters
+        ----------
+        counts_records:
+            Ngram counts of each document."""
+        max_counts: Counter[str] = Counter()
+        ngram_docs: Counter[str] = Counter()
+        n_docs = 0
+        for record in counts_records:
+            for ngram, count in record.items():
+                if count > max_counts[ngram]:
+                    max_counts[ngram] = count
+            ngram_docs.update(record.keys())
+            n_docs += 1
+        vocab = self._get_vocabulary(max_counts)
+        doc_freq = np.zeros(len(vocab), dtype=np.int64)
+        for ngram, col in vocab.items():
+            doc_freq[col] = ngram_docs[ngram]
+        self.idf_vector = self._get_idf_vector(doc_freq, n_docs)
         self.vocabulary = vocab
 
     def transform(self, data: Iterable[str]) -> sp.csr_matrix:
@@ -291,16 +517,30 @@ class TfidfVectorizer(BaseModel):
         data:
             List of documents contents to transform.
         """
-        if not self.vocabulary:
-            raise ValueError("Vocabulary is empty. Call `fit` first.")
-        counts_records = [
+        return self.transform_counts(
             get_ngram_counts(doc, self.config.ngram_range) for doc in data
-        ]
-        counts_records = [
-            Counter({k: v for k, v in doc.items() if k in self.vocabulary})
-            for doc in counts_records
-        ]
-        tfidf = self._get_tfidf(counts_records, vocab=self.vocabulary)
+        )
+
+    def transform_counts(
+        self, counts_records: Iterable[Counter[str]]
+    ) -> sp.csr_matrix:
+        """Transform precomputed ngram counts into a tfidf matrix.
+        See :meth:`fit_counts`.
+
+        Parameters
+        ----------
+        counts_records:
+            Ngram counts of each document.
+        """
+        if not self.vocabulary and not (
+            self.config.n_features and len(self.idf_vector)
+        ):
+            raise ValueError(
+                "Neither a vocabulary nor n_features is set. "
+                "Call `fit` first."
+            )
+        columns = self._get_columns(counts_records, vocab=self.vocabulary)
+        tfidf = self._get_tfidf(columns, self.n_features)
         if self.config.norm is not None:
             return normalize_csr_rows(tfidf, norm=self.config.norm)
         return tfidf
@@ -314,5 +554,42 @@ class TfidfVectorizer(BaseModel):
         data:
             List of documents contents to fit the vectorizer to and transform.
         """
-        self.fit(list(data))
+        data = list(data)
+        self.fit(data)
         return self.transform(data)
+
+    def save(self, path: Union[str, os.PathLike]):
+        """Save the vectorizer to a binary .npz file. The idf vector is
+        stored as a float32 array and the vocabulary, if any, as two parallel
+        arrays of ngrams and column indices. This is much more compact than
+        JSON for hashed models, which have no vocabulary.
+
+        Parameters
+        ----------
+        path:
+            Destination file.
+        """
+        np.savez(
+            path,
+            header=np.array(self.model_dump_json(include={"config"})),
+            idf=np.asarray(self.idf_vector, dtype=np.float32),
+            ngrams=np.array(list(self.vocabulary.keys()), dtype=str),
+            columns=np.array(list(self.vocabulary.values()), dtype=np.int64),
+        )
+
+    @classmethod
+    def load(cls, path: Union[str, os.PathLike]) -> "TfidfVectorizer":
+        """Load a vectorizer saved with :meth:`save`.
+
+        Parameters
+        ----------
+        path:
+            File written by :meth:`save`.
+        """
+        with np.load(path) as arrays:
+            vectorizer = cls.model_validate_json(str(arrays["header"]))
+            vectorizer.idf_vector = arrays["idf"].astype(np.float64)
+            vectorizer.vocabulary = dict(
+                zip(arrays["ngrams"].tolist(), arrays["columns"].tolist())
+            )
+        return vectorizer
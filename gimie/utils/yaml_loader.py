@@ -0,0 +1,91 @@
+# Gimie
+# Copyright 2022 - Swiss Data Science Center (SDSC)
+# A partnership between École Polytechnique Fédérale de Lausanne (EPFL) and
+# Eidgenössische Technische Hochschule Zürich (ETHZ).
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Fast loading of YAML metadata files."""
+
+from typing import Any, Collection, Optional
+
+import yaml
+from yaml.nodes import MappingNode, ScalarNode
+
+# libyaml bindings are much faster than the pure Python loader, but are
+# not always available.
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+MERGE_TAG = "tag:yaml.org,2002:merge"
+
+
+def load_yaml(data: str, keys: Optional[Collection[str]] = None) -> Any:
+    """Safely load a YAML document. If keys are given and the document is
+    a mapping, only these top-level keys are constructed and returned,
+    which avoids building Python objects for large unused sections.
+
+    Parameters
+    ----------
+    data:
+        The YAML document.
+    keys:
+        Top-level keys to load. If None, the whole document is loaded.
+
+    Examples
+    --------
+    >>> load_yaml("title: gimie\\nreferences: [a, b]", keys=["title"])
+    {'title': 'gimie'}
+    >>> load_yaml("- a\\n- b", keys=["title"])
+    ['a', 'b']
+    """
+    if keys is None:
+        return yaml.load(data, Loader=SafeLoader)
+    try:
+        return _load_selected(data, keys)
+    except yaml.YAMLError:
+        # Fall back to a full load, which gives the same result for valid
+        # documents and raises the usual error for invalid ones.
+        return select_keys(yaml.load(data, Loader=SafeLoader), keys)
+
+
+def select_keys(document: Any, keys: Collection[str]) -> Any:
+    """Restrict a loaded mapping to the given top-level keys. Other
+    documents are returned unchanged.
+
+    Examples
+    --------
+    >>> select_keys({"a": 1, "b": 2}, keys=["a"])
+    {'a': 1}
+    """
+    if not isinstance(document, dict):
+        return document
+    return {k: v for k, v in document.items() if k in keys}
+
+
+def _load_selected(data: str, keys: Collection[str]) -> Any:
+    """Compose the document into nodes, drop the top-level entries which
+    are not selected, and only construct the remaining nodes."""
+    loader = SafeLoader(data)
+    try:
+        node = loader.get_single_node()
+        if node is None:
+            return None
+        if isinstance(node, MappingNode):
+            node.value = [
+                (key, value)
+                for key, value in node.value
+                if key.tag == MERGE_TAG
+                or (isinstance(key, ScalarNode) and key.value in keys)
+            ]
+        # Merged mappings may bring back unselected keys
+        return select_keys(loader.construct_document(node), keys)
+    finally:
+        loader.dispose()
@@ -1,5 +1,31 @@
 """Avoid _pytest.pathlib.ImportPathMismatchError for pytest"""
 
 import os
+import subprocess
+import sys
+from typing import Callable, Set
+
+import pytest
 
 os.environ["PY_IGNORE_IMPORTMISMATCH"] = "1"
+
+
+@pytest.fixture
+def imported_packages() -> Callable[[str], Set[str]]:
+    """Return a function running code in a new interpreter and returning
+    the top-level packages it imported."""
+
+    def run(code: str) -> Set[str]:
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return {
+            line.split("|")[-1].strip().split(".")[0]
+            for line in result.stderr.splitlines()
+            if line.startswith("import time:")
+        }
+
+    return run
@@ -0,0 +1,90 @@
+"""Tests for the persistent result cache."""
+
+from rdflib.compare import isomorphic
+
+import pytest
+
+from gimie.cache import ResultCache
+from gimie.graph import TripleBuffer
+from gimie.io import LocalResource
+from gimie.models import Repository
+from gimie.project import Project
+
+URL = "https://example.org/group/repo"
+
+
+class FakeExtractor:
+    """Stands in for an extractor, counting extractions."""
+
+    def __init__(self, head):
+        self.head = head
+        self.extractions = 0
+
+    def resolve_head(self):
+        return self.head
+
+    def extract(self):
+        self.extractions += 1
+        return Repository(url=URL, name="group/repo", description="A repo")
+
+    def list_files(self):
+        return [LocalResource("LICENSE")]
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("GIMIE_DATA_DIR", str(tmp_path / "data"))
+    return ResultCache(tmp_path / "results.sqlite")
+
+
+def make_project(cache, head="a" * 40):
+    project = Project(URL, git_provider="git", cache=cache)
+    project.extractor = FakeExtractor(head)
+    return project
+
+
+def test_cache_eviction(tmp_path):
+    """The least recently used entries are evicted beyond the size cap."""
+    cache = ResultCache(tmp_path / "results.sqlite", max_bytes=100)
+    data = bytes(range(40))
+    for key in "abc":
+        cache.put(key, URL, "head", key.encode() + data)
+        # Access "a" so that "b" is the least recently used
+        cache.get("a")
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.size() <= 100
+
+
+def test_cached_graph(cache):
+    """The graph is only extracted once per HEAD."""
+    first = make_project(cache)
+    graph = first.extract()
+    second = make_project(cache)
+    assert isomorphic(second.extract(), graph)
+    assert second.extractor.extractions == 0
+    changed = make_project(cache, head="b" * 40)
+    changed.extract()
+    assert changed.extractor.extractions == 1
+
+
+def test_cached_emit_and_models(cache):
+    """Streamed triples and models are served from the cache."""
+    graph = make_project(cache).extract()
+    buffer = TripleBuffer()
+    project = make_project(cache)
+    project.emit(buffer)
+    assert set(buffer) == set(graph)
+    result = make_project(cache).extract_models()
+    project = make_project(cache)
+    assert project.extract_models() == result
+    assert project.extractor.extractions == 0
+
+
+def test_unknown_head(cache):
+    """Results are not cached when the HEAD cannot be resolved."""
+    make_project(cache, head=None).extract()
+    project = make_project(cache, head=None)
+    project.extract()
+    assert project.extractor.extractions == 1
+    assert cache.size() == 0
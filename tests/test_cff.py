@@ -1,8 +1,10 @@
 from gimie.io import LocalResource
 from gimie.parsers import CffParser
 from gimie.parsers.cff import get_cff_authors
+from gimie.utils import yaml_loader
 from rdflib import URIRef, Literal
 import pytest
+import yaml
 
 
 def test_parse_cff():
@@ -85,3 +87,42 @@ def test_parse_doi():
     # parsed_dois already contains all parsed DOI objects
     for doi in expected_dois:
         assert doi in parsed_dois
+
+
+SELECTIVE_CFF = """
+cff-version: 1.2.0
+title: gimie
+defaults: &defaults
+  affiliation: SDSC
+authors:
+  - <<: *defaults
+    family-names: Doe
+    given-names: John
+    orcid: https://orcid.org/0000-0001-2345-6789
+identifiers:
+  - type: doi
+    value: 10.5281/zenodo.1234
+<<: {title: merged, authors: []}
+references:
+  - type: article
+    title: Some paper
+    authors: [{family-names: Smith}]
+"""
+
+
+@pytest.mark.parametrize(
+    "loader", [yaml_loader.SafeLoader, yaml.SafeLoader], ids=["c", "python"]
+)
+def test_load_yaml_selected_keys(loader, monkeypatch):
+    """Key-selective loading gives the same result as a full load."""
+    monkeypatch.setattr(yaml_loader, "SafeLoader", loader)
+    keys = ("authors", "identifiers")
+    expected = {
+        k: v for k, v in yaml.safe_load(SELECTIVE_CFF).items() if k in keys
+    }
+    assert yaml_loader.load_yaml(SELECTIVE_CFF, keys=keys) == expected
+
+
+def test_load_yaml_invalid():
+    with pytest.raises(yaml.YAMLError):
+        yaml_loader.load_yaml("a: [b", keys=("a",))
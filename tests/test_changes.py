@@ -0,0 +1,119 @@
+"""Tests for change detection."""
+
+import os
+
+import pytest
+
+from gimie.changes import (
+    RepositoryState,
+    check_repositories,
+    find_stale,
+    load_state,
+    save_state,
+)
+from gimie.extractors.common import queries
+from gimie.extractors.github import GithubExtractor
+from gimie.extractors.gitlab import GitlabExtractor
+
+LOCAL_REPOSITORY = f"file://{os.getcwd()}"
+
+
+@pytest.fixture
+def graphql(monkeypatch):
+    """Answer GraphQL queries with the HEAD of each repository, and
+    record the queries."""
+    sent = []
+
+    def send_graphql_query(api, query, data, headers):
+        sent.append(data)
+        if "paths" in data:
+            nodes = [
+                {
+                    "fullPath": path,
+                    "lastActivityAt": "2024-01-01T00:00:00Z",
+                    "repository": {"tree": {"lastCommit": {"sha": path}}},
+                }
+                for path in data["paths"]
+                if path != "group/missing"
+            ]
+            return {"data": {"projects": {"nodes": nodes}}}
+        repos = {}
+        for name in data:
+            if name.startswith("o"):
+                i = name[1:]
+                repos[f"r{i}"] = {
+                    "pushedAt": "2024-01-01T00:00:00Z",
+                    "defaultBranchRef": {
+                        "target": {"oid": f"{data[name]}/{data['n' + i]}"}
+                    },
+                }
+        return {"data": repos}
+
+    monkeypatch.setattr(queries, "send_graphql_query", send_graphql_query)
+    monkeypatch.setattr(GithubExtractor, "_headers", {})
+    monkeypatch.setattr(GitlabExtractor, "_headers", {})
+    return sent
+
+
+def test_check_batches(graphql):
+    """Repositories are checked in batches per provider."""
+    github = [f"https://github.com/org/repo{i}" for i in range(5)]
+    gitlab = [
+        "https://gitlab.com/group/repo",
+        "https://gitlab.com/group/missing",
+    ]
+    states = check_repositories(
+        github + gitlab + [LOCAL_REPOSITORY], batch_size=2
+    )
+    # 3 GitHub batches and 1 GitLab batch
+    assert len(graphql) == 4
+    assert states["https://github.com/org/repo3"].head == "org/repo3"
+    assert states["https://gitlab.com/group/repo"].head == "group/repo"
+    assert states["https://gitlab.com/group/missing"].head is None
+    assert len(states[LOCAL_REPOSITORY].head) == 40
+
+
+def test_check_order(graphql):
+    """States are returned in input order, whatever the provider."""
+    urls = [
+        "https://gitlab.com/group/repo",
+        LOCAL_REPOSITORY,
+        "https://github.com/org/repo",
+        "https://gitlab.com/group/repo",
+    ]
+    assert list(check_repositories(urls)) == urls[:3]
+
+
+def test_check_failed_batch(graphql, monkeypatch):
+    """A failed batch marks its repositories as unknown instead of
+    aborting the other batches."""
+    send = queries.send_graphql_query
+
+    def send_graphql_query(api, query, data, headers):
+        if data.get("n0") == "repo2":
+            return {"errors": [{"message": "API rate limit exceeded"}]}
+        if "paths" in data:
+            raise ConnectionError("unreachable")
+        return send(api, query, data, headers)
+
+    monkeypatch.setattr(queries, "send_graphql_query", send_graphql_query)
+    github = [f"https://github.com/org/repo{i}" for i in range(4)]
+    gitlab = ["https://gitlab.com/group/repo"]
+    states = check_repositories(github + gitlab, batch_size=2)
+    assert states["https://github.com/org/repo0"].head == "org/repo0"
+    assert states["https://github.com/org/repo2"].head is None
+    assert states["https://github.com/org/repo3"].head is None
+    assert states["https://gitlab.com/group/repo"].head is None
+    assert find_stale(states, {}) == github + gitlab
+
+
+def test_state_roundtrip(tmp_path):
+    """States are saved and loaded, and only changed repositories are
+    stale."""
+    path = tmp_path / "state.json"
+    assert load_state(path) == {}
+    previous = {"a": RepositoryState("1", "2024-01-01T00:00:00Z")}
+    save_state(path, previous)
+    assert load_state(path) == previous
+    current = {"a": RepositoryState("1"), "b": RepositoryState("3")}
+    assert find_stale(current, load_state(path)) == ["b"]
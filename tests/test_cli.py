@@ -1,5 +1,7 @@
 """Tests for the Gimie command line interface."""
 
+import os
+
 from gimie import cli
 from typer.testing import CliRunner
 
@@ -22,3 +24,34 @@ def test_parsers_help():
     """Checks if the 'gimie parsers --help' command exits successfully."""
     result = runner.invoke(cli.app, ["parsers", "--help"])
     assert result.exit_code == 0
+
+
+def test_changed(tmp_path):
+    """Repositories are stale until their state is recorded."""
+    url = f"file://{os.getcwd()}"
+    args = ["changed", url, "--state", str(tmp_path / "state.json")]
+    result = runner.invoke(cli.app, args + ["--update"])
+    assert result.exit_code == 0
+    assert result.output.split() == [url]
+    result = runner.invoke(cli.app, args)
+    assert result.exit_code == 0
+    assert result.output == ""
+
+
+def test_cli_lazy_imports(imported_packages):
+    """Importing the CLI must not load heavy dependencies, which are only
+    needed to extract metadata."""
+    heavy = {
+        "rdflib",
+        "calamus",
+        "numpy",
+        "scipy",
+        "git",
+        "pydriller",
+        "requests",
+        "dotenv",
+        "yaml",
+    }
+    imported = imported_packages("import gimie.cli")
+    assert "gimie" in imported
+    assert not heavy & imported
@@ -72,3 +72,14 @@ def test_clone_unsupported():
 def test_git_list_files():
     files = GitExtractor(UNSUPPORTED_PROV).list_files()
     assert all(isinstance(f, LocalResource) for f in files)
+
+
+def test_git_resolve_head():
+    """HEAD is resolved from the local repository or with ls-remote."""
+    local = GitExtractor(
+        "https://github.com/sdsc-ordes/gimie", local_path=LOCAL_REPOSITORY
+    )
+    remote = GitExtractor(f"file://{LOCAL_REPOSITORY}")
+    head = local.resolve_head()
+    assert len(head) == 40
+    assert remote.resolve_head() == head
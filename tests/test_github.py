@@ -22,3 +22,11 @@ def test_github_extract(repo):
 def test_github_list_files(repo):
     files = GithubExtractor(repo).list_files()
     assert all(isinstance(f, RemoteResource) for f in files)
+
+
+def test_github_api_url(monkeypatch):
+    """The API root can be pointed at another server."""
+    extractor = GithubExtractor(TEST_REPOS[0])
+    assert extractor.api_url == "https://api.github.com"
+    monkeypatch.setenv("GITHUB_API_URL", "http://127.0.0.1:8080/")
+    assert extractor.api_url == "http://127.0.0.1:8080"
@@ -0,0 +1,111 @@
+"""Tests for custom licenses registered in the user overlay."""
+
+import hashlib
+
+import pytest
+from typer.testing import CliRunner
+
+from gimie import cli
+from gimie.parsers.license import MODEL_FILE, match_license
+from gimie.parsers.license.custom import (
+    OVERLAY_FILE,
+    _load_overlay,
+    add_custom_license,
+    custom_licenses_dir,
+    load_custom_licenses,
+    remove_custom_license,
+)
+import gimie.parsers.license as license_module
+
+ACME_LICENSE = """ACME Corporation Internal Software License
+
+Copyright (c) 2024 ACME Corporation
+
+This software is the confidential and proprietary property of ACME
+Corporation. Employees and contractors of ACME Corporation may use, copy
+and modify the software for internal purposes only. The software must not
+be distributed outside of ACME Corporation, in source or binary form,
+without prior written approval of the ACME legal department.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND.
+"""
+
+runner = CliRunner()
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    """Store custom licenses in a temporary directory."""
+    monkeypatch.setenv("GIMIE_DATA_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _model_digest() -> str:
+    path = license_module.resources.files(license_module).joinpath(MODEL_FILE)
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def test_add_custom_license():
+    before = _model_digest()
+    add_custom_license("LicenseRef-Acme", ACME_LICENSE)
+    url = "https://sdsc-ordes.github.io/gimie/licenses/LicenseRef-Acme"
+    # Exact text, other copyright line, and a small edit
+    assert match_license(ACME_LICENSE.encode()) == url
+    modified = ACME_LICENSE.replace("2024", "2025").replace("must", "shall")
+    assert match_license(modified.encode()) == url
+    assert match_license(b"SPDX-License-Identifier: LicenseRef-Acme") == url
+    # SPDX licenses are still recognized, and the shipped model unchanged
+    assert match_license(open("LICENSE", "rb").read()).endswith(
+        "Apache-2.0.html"
+    )
+    assert _model_digest() == before
+
+
+def test_custom_license_url():
+    add_custom_license(
+        "LicenseRef-Acme", ACME_LICENSE, url="https://acme.test/license"
+    )
+    assert match_license(ACME_LICENSE.encode()) == "https://acme.test/license"
+
+
+def test_remove_custom_license():
+    add_custom_license("LicenseRef-Acme", ACME_LICENSE)
+    assert remove_custom_license("LicenseRef-Acme")
+    assert not remove_custom_license("LicenseRef-Acme")
+    assert load_custom_licenses().license_ids == []
+    assert match_license(ACME_LICENSE.encode()) is None
+
+
+def test_reject_spdx_id():
+    with pytest.raises(ValueError):
+        add_custom_license("mit", ACME_LICENSE)
+
+
+def test_overlay_rebuilt_on_model_change(data_dir, monkeypatch):
+    add_custom_license("LicenseRef-Acme", ACME_LICENSE)
+    monkeypatch.setattr(
+        "gimie.parsers.license.custom.model_fingerprint",
+        lambda model: "changed",
+    )
+    _load_overlay.cache_clear()
+    stored = (custom_licenses_dir() / OVERLAY_FILE).read_bytes()
+    custom = load_custom_licenses()
+    assert custom.license_ids == ["LicenseRef-Acme"]
+    assert custom.matrix.shape[0] == 1
+    # The read path recomputes in memory and leaves the file alone.
+    assert (custom_licenses_dir() / OVERLAY_FILE).read_bytes() == stored
+
+
+def test_licenses_cli(data_dir):
+    path = data_dir / "acme.txt"
+    path.write_text(ACME_LICENSE)
+    result = runner.invoke(
+        cli.app, ["licenses", "add", "LicenseRef-Acme", str(path)]
+    )
+    assert result.exit_code == 0
+    result = runner.invoke(cli.app, ["licenses", "list"])
+    assert "LicenseRef-Acme" in result.stdout
+    result = runner.invoke(cli.app, ["licenses", "remove", "LicenseRef-Acme"])
+    assert result.exit_code == 0
+    result = runner.invoke(cli.app, ["licenses", "remove", "LicenseRef-Acme"])
+    assert result.exit_code == 1
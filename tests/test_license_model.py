@@ -0,0 +1,225 @@
+"""Tests for the binary license model artifact."""
+
+import csv
+import hashlib
+from importlib import resources
+import json
+import tarfile
+
+import numpy as np
+import pytest
+import scipy.sparse as sp
+
+from gimie.parsers.license import load_license_model
+from gimie.parsers.license.artifact import (
+    convert_legacy_model,
+    read_arrays,
+    read_model,
+    write_arrays,
+    write_model,
+)
+from gimie.parsers.license.build import build_license_model
+from gimie.parsers.license.index import LicenseIndex
+from gimie.utils.text_processing import TfidfConfig, TfidfVectorizer
+
+CORPUS = {
+    "A": "Permission is hereby granted, free of charge.",
+    "B": "Licensed under the terms of the license, you may not use this file.",
+    "C": "Redistribution and use in source and binary forms are permitted.",
+}
+
+
+@pytest.fixture(params=[None, 256])
+def fitted(request):
+    """A vectorizer fitted on a small corpus, with and without hashing."""
+    config = TfidfConfig(
+        ngram_range=(1, 2),
+        norm="l2",
+        sublinear_tf=True,
+        n_features=request.param,
+    )
+    vectorizer = TfidfVectorizer(config=config)
+    matrix = vectorizer.fit_transform(list(CORPUS.values()))
+    return vectorizer, matrix
+
+
+def test_model_round_trip(tmp_path, fitted):
+    vectorizer, matrix = fitted
+    path = tmp_path / "model.bin"
+    write_model(path, vectorizer, matrix, list(CORPUS), metadata={"v": 1})
+    model = read_model(path)
+
+    assert model.metadata == {"v": 1}
+    assert [i.decode() for i in model.license_ids] == list(CORPUS)
+    assert np.allclose(model.matrix.toarray(), matrix.toarray())
+    doc = ["Permission is hereby granted to use this file."]
+    assert np.allclose(
+        model.vectorizer.transform(doc).toarray(),
+        vectorizer.transform(doc).toarray(),
+        atol=1e-6,
+    )
+
+
+def test_arrays_are_aligned(tmp_path):
+    path = tmp_path / "arrays.bin"
+    arrays = {
+        "a": np.arange(3, dtype=np.int8),
+        "empty": np.array([], dtype=np.float32),
+        "b": np.ones((2, 3), dtype=np.float64),
+    }
+    write_arrays(path, {"name": "test"}, arrays)
+    header, loaded = read_arrays(path.read_bytes())
+    assert header == {"name": "test"}
+    for name, arr in arrays.items():
+        assert np.array_equal(loaded[name], arr)
+        assert loaded[name].dtype == arr.dtype
+
+
+def test_bad_magic(tmp_path):
+    path = tmp_path / "bad.bin"
+    path.write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError):
+        read_model(path)
+
+
+def test_convert_legacy_model(tmp_path):
+    vectorizer = TfidfVectorizer(config=TfidfConfig(norm="l2"))
+    matrix = vectorizer.fit_transform(list(CORPUS.values()))
+    (tmp_path / "vec.json").write_text(vectorizer.model_dump_json())
+    sp.save_npz(tmp_path / "matrix.npz", matrix)
+    with open(tmp_path / "ids.csv", "w", newline="") as fp:
+        csv.writer(fp).writerows([(i, len(t)) for i, t in CORPUS.items()])
+
+    convert_legacy_model(
+        tmp_path / "vec.json",
+        tmp_path / "matrix.npz",
+        tmp_path / "ids.csv",
+        tmp_path / "model.bin",
+    )
+    model = read_model(tmp_path / "model.bin")
+    assert dict(model.vectorizer.vocabulary) == vectorizer.vocabulary
+    assert np.allclose(model.matrix.toarray(), matrix.toarray())
+
+
+def test_shipped_model():
+    model = load_license_model()
+    assert model.matrix.shape[0] == len(model.license_ids)
+    assert model.matrix.shape[1] == model.vectorizer.n_features
+
+
+def test_shipped_manifest():
+    """The shipped model is described by the manifest of its build."""
+    data = resources.files("gimie.parsers.license") / "data"
+    manifest = json.loads((data / "license_model.json").read_text())
+    artifact = (data / manifest["artifact"]["file"]).read_bytes()
+    assert hashlib.sha256(artifact).hexdigest() == (
+        manifest["artifact"]["sha256"]
+    )
+    model = load_license_model()
+    assert model.metadata["spdx"] == manifest["spdx"]
+    assert len(model.license_ids) == manifest["n_licenses"]
+
+
+def test_index_matches_exhaustive_search():
+    """Each shipped license must be retrieved by the shortlist."""
+    model = load_license_model()
+    index = LicenseIndex.from_arrays(model.matrix, model.arrays)
+    query_matrix = model.matrix.astype(np.float64)
+    for row in range(model.matrix.shape[0]):
+        query = query_matrix[row]
+        match = index.search(query)
+        assert match.row == index.search_exhaustive(query).row
+
+
+def test_index_scores_half_precision():
+    """The index scores the mapped half precision matrix without
+    converting it, with the precision of a float32 product."""
+    model = load_license_model()
+    index = LicenseIndex.from_arrays(model.matrix, model.arrays)
+    assert index.matrix.data is model.matrix.data
+    query = model.vectorizer.transform([open("LICENSE").read()])
+    expected = (model.matrix.astype(np.float32) @ query.T).toarray().ravel()
+    rows = np.arange(model.matrix.shape[0])
+    assert np.allclose(index.scores(rows, query), expected, atol=1e-6)
+
+
+@pytest.fixture
+def license_list_data(tmp_path):
+    """A minimal copy of the SPDX license-list-data repository."""
+    root = tmp_path / "license-list-data-3.99"
+    (root / "json" / "details").mkdir(parents=True)
+    entries = []
+    for idx, (license_id, text) in enumerate(CORPUS.items()):
+        entries.append(
+            {
+                "licenseId": license_id,
+                "isOsiApproved": idx != 2,
+                "isDeprecatedLicenseId": False,
+            }
+        )
+        details = root / "json" / "details" / f"{license_id}.json"
+        details.write_text(json.dumps({"licenseText": text}))
+    (root / "json" / "licenses.json").write_text(
+        json.dumps({"licenseListVersion": "3.99", "licenses": entries})
+    )
+    (root / "json" / "exceptions").mkdir()
+    (root / "json" / "exceptions" / "E.json").write_text(
+        json.dumps(
+            {"licenseExceptionText": "As a special exception, linking."}
+        )
+    )
+    (root / "json" / "exceptions.json").write_text(
+        json.dumps(
+            {
+                "licenseListVersion": "3.99",
+                "exceptions": [
+                    {"licenseExceptionId": "E", "isDeprecatedLicenseId": False}
+                ],
+            }
+        )
+    )
+    return root
+
+
+def test_build_license_model(tmp_path, license_list_data):
+    manifest = build_license_model(license_list_data, tmp_path / "a", jobs=1)
+    assert manifest["spdx"]["licenseListVersion"] == "3.99"
+    assert manifest["n_licenses"] == 2
+    assert manifest["n_hashes"] == 3
+
+    model = read_model(tmp_path / "a" / "license_model.bin")
+    assert [i.decode() for i in model.license_ids] == ["A", "B"]
+    assert model.metadata["spdx"]["licenseListVersion"] == "3.99"
+    assert "postings_indptr" in model.arrays
+    saved = json.loads((tmp_path / "a" / "license_model.json").read_text())
+    assert saved == manifest
+
+
+def test_build_license_model_exceptions(tmp_path, license_list_data):
+    """Exceptions are only part of the model when requested."""
+    manifest = build_license_model(
+        license_list_data,
+        tmp_path,
+        osi_only=False,
+        include_exceptions=True,
+        jobs=1,
+    )
+    assert manifest["selection"]["include_exceptions"]
+    assert manifest["n_licenses"] == 4
+    assert manifest["n_hashes"] == 4
+    model = read_model(tmp_path / "license_model.bin")
+    assert [i.decode() for i in model.license_ids] == ["A", "B", "C", "E"]
+
+
+def test_build_license_model_reproducible(tmp_path, license_list_data):
+    """Builds are identical across runs, worker counts and input formats."""
+    tarball = tmp_path / "data.tar.gz"
+    with tarfile.open(tarball, "w:gz") as tar:
+        tar.add(license_list_data, arcname=license_list_data.name)
+
+    build_license_model(license_list_data, tmp_path / "a", jobs=1)
+    build_license_model(tarball, tmp_path / "b", jobs=2)
+    for name in ("license_model.bin", "license_model.json"):
+        assert (tmp_path / "a" / name).read_bytes() == (
+            tmp_path / "b" / name
+        ).read_bytes()
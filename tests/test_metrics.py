@@ -0,0 +1,84 @@
+"""Tests for the metrics registry and HTTP instrumentation."""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+
+import pytest
+
+from gimie.io import RemoteResource
+from gimie.utils.metrics import (
+    MetricsRegistry,
+    record_cache,
+    set_registry,
+)
+
+
+@pytest.fixture
+def registry():
+    registry = MetricsRegistry()
+    previous = set_registry(registry)
+    yield registry
+    set_registry(previous)
+
+
+@pytest.fixture
+def server():
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("X-RateLimit-Remaining", "41")
+            self.send_header("Content-Length", "5")
+            self.end_headers()
+            self.wfile.write(b"hello")
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_histogram_exposition(registry):
+    hist = registry.histogram("latency_seconds", "Latency.", buckets=(1, 2))
+    hist.observe(0.5)
+    hist.observe(1.5)
+    hist.observe(3)
+    lines = registry.render().splitlines()
+    assert 'latency_seconds_bucket{le="1.0"} 1' in lines
+    assert 'latency_seconds_bucket{le="2.0"} 2' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in lines
+    assert "latency_seconds_sum 5.0" in lines
+    assert "latency_seconds_count 3" in lines
+
+
+def test_metric_type_conflict(registry):
+    registry.counter("things", "Things.")
+    with pytest.raises(ValueError):
+        registry.gauge("things", "Things.")
+
+
+def test_remote_resource_metrics(registry, server):
+    """Requests, bytes and the rate limit budget are reported."""
+    assert RemoteResource("x", f"{server}/file").open().read() == b"hello"
+    host = server.split("//")[1]
+    requests = registry.metrics["gimie_http_requests_total"]
+    assert (
+        requests.get(host=host, endpoint="raw", method="GET", status="200")
+        == 1
+    )
+    sizes = registry.metrics["gimie_http_response_bytes_total"]
+    assert sizes.get(host=host, endpoint="raw") == 5
+    budget = registry.metrics["gimie_rate_limit_remaining"]
+    assert budget.get(host=host) == 41
+
+
+def test_cache_metrics(registry):
+    record_cache("results", hit=True)
+    record_cache("results", hit=False)
+    record_cache("results", hit=True)
+    lookups = registry.metrics["gimie_cache_requests_total"]
+    assert lookups.get(cache="results", result="hit") == 2
+    assert 'result="miss"} 1.0' in registry.render()
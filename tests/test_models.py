@@ -0,0 +1,72 @@
+"""Tests for the data models and their RDF representation."""
+
+from datetime import datetime, timezone
+
+import pytest
+from rdflib import Graph
+from rdflib.compare import isomorphic
+
+from gimie.models import (
+    Organization,
+    Person,
+    Repository,
+    RepositorySchema,
+)
+
+ORG = Organization(
+    _id="https://github.com/sdsc-ordes",
+    name="SDSC",
+    legal_name="Swiss Data Science Center",
+    email="contact@datascience.ch",
+    description='Data science "for" science\nand more.',
+    logo="https://example.org/logo.png",
+)
+PERSON = Person(
+    _id="https://github.com/jane",
+    identifier="jane",
+    name="Jane Dœ",
+    email="jane@example.org",
+    affiliations=[ORG],
+)
+REPOSITORIES = [
+    Repository(url="https://github.com/sdsc-ordes/empty", name="empty"),
+    Repository(
+        url="https://github.com/sdsc-ordes/gimie",
+        name="sdsc-ordes/gimie",
+        authors=[ORG, PERSON],
+        contributors=[
+            PERSON,
+            Person(_id="https://github.com/bob", identifier="bob"),
+        ],
+        date_created=datetime(2022, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+        date_modified=datetime(2023, 1, 2),
+        date_published=datetime(2023, 12, 31, 23, 59, 59),
+        description="",
+        download_url="https://github.com/sdsc-ordes/gimie/archive/main.zip",
+        identifier="gimie",
+        keywords=["metadata", "rdf"],
+        licenses=["https://spdx.org/licenses/Apache-2.0.html"],
+        parent_repository="https://github.com/foo/gimie",
+        prog_langs=["Python", "Shell"],
+        version="0.7.2",
+    ),
+]
+
+
+@pytest.mark.parametrize("repo", REPOSITORIES)
+def test_to_graph_matches_jsonld_schema(repo):
+    """Direct triple emission must give the same graph as the calamus
+    JSON-LD schema."""
+    expected = Graph().parse(
+        format="json-ld", data=str(RepositorySchema().dumps(repo))
+    )
+    assert isomorphic(repo.to_graph(), expected)
+
+
+@pytest.mark.parametrize("repo", REPOSITORIES)
+def test_jsonld_matches_graph(repo):
+    """Native JSON-LD output must describe the same graph as rdflib's
+    json-ld serialization."""
+    native = Graph().parse(format="json-ld", data=repo.jsonld())
+    expected = Graph().parse(format="json-ld", data=repo.serialize("json-ld"))
+    assert isomorphic(native, expected)
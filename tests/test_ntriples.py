@@ -0,0 +1,62 @@
+"""Tests for the streaming N-Triples / N-Quads writer."""
+
+import gzip
+import io
+
+from rdflib import Dataset, Graph, Literal, URIRef
+from rdflib.compare import isomorphic
+
+from gimie.graph.ntriples import NTriplesWriter, open_output
+from gimie.graph.namespaces import SDO
+
+from test_models import REPOSITORIES
+
+SUBJECT = URIRef("https://example.org/repo")
+
+
+def test_ntriples_round_trip():
+    """Written triples are parsed back into the same graph by rdflib."""
+    repo = REPOSITORIES[1]
+    out = io.StringIO()
+    repo.emit(NTriplesWriter(out))
+    parsed = Graph().parse(data=out.getvalue(), format="nt")
+    assert isomorphic(parsed, repo.to_graph())
+
+
+def test_ntriples_escaping():
+    out = io.StringIO()
+    writer = NTriplesWriter(out)
+    values = ['quote " and \\ backslash', "line\nbreak\r", "naïve ✓", ""]
+    for value in values:
+        writer.add((SUBJECT, SDO.description, Literal(value)))
+    writer.add((SUBJECT, SDO.url, URIRef("https://example.org/a b<c>")))
+    parsed = Graph().parse(data=out.getvalue(), format="nt")
+    assert {str(o) for o in parsed.objects(SUBJECT, SDO.description)} == set(
+        values
+    )
+    assert len(out.getvalue().splitlines()) == len(values) + 1
+
+
+def test_nquads_named_graphs():
+    out = io.StringIO()
+    writer = NTriplesWriter(out)
+    for repo in REPOSITORIES:
+        writer.start_graph(repo.url)
+        repo.emit(writer)
+        # Duplicates within a graph are skipped
+        repo.emit(writer)
+    assert writer.count == sum(len(r.to_graph()) for r in REPOSITORIES)
+
+    dataset = Dataset()
+    dataset.parse(data=out.getvalue(), format="nquads")
+    for repo in REPOSITORIES:
+        graph = dataset.graph(URIRef(repo.url))
+        assert isomorphic(graph, repo.to_graph())
+
+
+def test_gzip_output(tmp_path):
+    path = str(tmp_path / "out.nt.gz")
+    with open_output(path) as stream:
+        NTriplesWriter(stream).add((SUBJECT, SDO.name, Literal("repo")))
+    with gzip.open(path, "rt") as fp:
+        assert fp.read() == f'<{SUBJECT}> <{SDO.name}> "repo" .\n'
@@ -1,7 +1,30 @@
 import pytest
 
-from gimie.io import LocalResource
-from gimie.parsers import get_parser, list_parsers, parse_files
+from gimie.io import LocalResource, Resource
+import io
+from pathlib import Path
+import time
+
+from gimie.graph import TripleBuffer
+
+from gimie.parsers import (
+    build_parser_index,
+    get_parser,
+    list_parsers,
+    parse_files,
+    select_parser,
+)
+from gimie.parsers import license
+from gimie.parsers.license import (
+    match_license,
+    match_license_hash,
+    match_licenses,
+    match_spdx_identifiers,
+)
+from gimie.parsers.license.custom import (
+    custom_licenses_dir,
+    load_custom_licenses,
+)
 from rdflib import URIRef
 from rdflib import Graph, URIRef, Literal
 
@@ -18,6 +41,50 @@ def test_get_bad_parser():
         get_parser("bad_parser")
 
 
+PATHS = [
+    "LICENSE",
+    "LICENSES.md",
+    "COPYING",
+    ".license",
+    "CITATION.cff",
+    "publiccode.yaml",
+    "docs/LICENSE",
+    "src/CITATION.cff",
+    "README.md",
+    "",
+]
+
+
+def test_parser_index_matches_select_parser():
+    """The index gives the same result as select_parser for str and
+    Path inputs."""
+    index = build_parser_index()
+    names = index.classify(PATHS)
+    assert names == index.classify([Path(p) for p in PATHS])
+    assert names == [
+        "license",
+        "license",
+        "license",
+        None,
+        "cff",
+        "publiccode",
+        None,
+        None,
+        None,
+        None,
+    ]
+    for path, name in zip(PATHS, names):
+        parser = select_parser(Path(path))
+        assert parser == (get_parser(name) if name else None)
+
+
+def test_parser_index_selection():
+    """Unselected parsers are ignored."""
+    index = build_parser_index({"cff"})
+    assert index.classify(["LICENSE", "CITATION.cff"]) == [None, "cff"]
+    assert select_parser(Path("LICENSE"), {"cff"}) is None
+
+
 def test_parse_license():
     license_file = LocalResource("LICENSE")
     graph = parse_files(
@@ -26,7 +93,128 @@ def test_parse_license():
     assert "https://spdx.org" in graph.serialize(format="ttl")
 
 
+def test_parse_files_in_place():
+    """Parsed triples are added to the given graph without copies."""
+    subject = URIRef("https://example.org/")
+    graph = Graph()
+    graph.add((subject, URIRef("https://schema.org/name"), Literal("x")))
+    out = parse_files(
+        subject=subject, files=[LocalResource("LICENSE")], graph=graph
+    )
+    assert out is graph
+    assert len(graph) == 2
+
+
+class SlowResource(Resource):
+    """Local file which takes some time to open."""
+
+    def __init__(self, path, name, delay):
+        self.source = path
+        self.path = Path(name)
+        self.delay = delay
+
+    def open(self):
+        time.sleep(self.delay)
+        return io.BytesIO(Path(self.source).read_bytes())
+
+
+def test_parse_files_concurrent_order():
+    """Triples are added in file order, whichever file finishes first."""
+    subject = URIRef("https://example.org/")
+    files = [
+        SlowResource("LICENSE", "LICENSE", 0.2),
+        SlowResource("CITATION.cff", "CITATION.cff", 0.0),
+        SlowResource("LICENSE", "COPYING", 0.1),
+    ]
+    sequential = parse_files(
+        subject, files, graph=TripleBuffer(), max_workers=1
+    )
+    concurrent = parse_files(subject, files, graph=TripleBuffer())
+    assert len(sequential) > 2
+    assert concurrent == sequential
+
+
+def test_parse_all():
+    parser = get_parser("license")(URIRef("https://example.org/"))
+    graph = parser.parse_all(
+        [
+            b"SPDX-License-Identifier: MIT",
+            b"SPDX-License-Identifier: BSD-3-Clause",
+        ]
+    )
+    assert len(graph) == 2
+
+
 def test_parse_nothing():
     folder = LocalResource("tests")
     graph = parse_files(subject=URIRef("https://example.org/"), files=[folder])
     assert len(graph) == 0
+
+
+@pytest.mark.parametrize(
+    "header",
+    [
+        b"SPDX-License-Identifier: MIT\n",
+        b"// SPDX-License-Identifier: MIT OR Apache-2.0\n",
+        b"# spdx-license-identifier: mit\n\nSome other text",
+    ],
+)
+def test_match_license_spdx_identifier(header, monkeypatch):
+    # Explicit identifiers never reach the tf-idf tier
+    monkeypatch.setattr(license, "match_license_tfidf", None)
+    assert match_license(header) == "https://spdx.org/licenses/MIT.html"
+
+
+@pytest.mark.parametrize(
+    "header,license_ids",
+    [
+        (
+            b"SPDX-License-Identifier: MIT AND Apache-2.0\n",
+            ["MIT", "Apache-2.0"],
+        ),
+        (b"<!-- SPDX-License-Identifier: (MIT OR 0BSD) -->", ["MIT"]),
+        (
+            b"SPDX-License-Identifier: GPL-2.0+ AND (unknown OR MIT)",
+            ["GPL-2.0", "MIT"],
+        ),
+    ],
+)
+def test_match_licenses_compound(header, license_ids):
+    """All licenses of a conjunction are matched."""
+    assert match_licenses(header) == [
+        f"https://spdx.org/licenses/{i}.html" for i in license_ids
+    ]
+
+
+def test_no_custom_licenses(tmp_path):
+    """Tests do not see the custom licenses of the developer."""
+    assert load_custom_licenses() is None
+    assert custom_licenses_dir().is_relative_to(tmp_path)
+
+
+def test_match_license_exception():
+    """Licenses with exceptions report both the license and exception."""
+    header = (
+        b"SPDX-License-Identifier: GPL-2.0-only WITH Classpath-exception-2.0"
+    )
+    assert match_licenses(header) == [
+        "https://spdx.org/licenses/GPL-2.0-only.html",
+        "https://spdx.org/licenses/Classpath-exception-2.0.html",
+    ]
+    unknown = b"SPDX-License-Identifier: GPL-2.0-only WITH not-an-exception"
+    assert match_spdx_identifiers(unknown.decode()) == []
+
+
+def test_match_license_hash(monkeypatch):
+    # Whitespace, copyright lines and years do not prevent exact matches
+    text = open("LICENSE").read().replace("\n", "  \n")
+    text = "Copyright (c) 2024 Someone\n" + text
+    monkeypatch.setattr(license, "match_license_tfidf", None)
+    assert match_license_hash(text) == "Apache-2.0"
+    assert match_license(text.encode()).endswith("/Apache-2.0.html")
+
+
+def test_match_license_fallback():
+    text = open("LICENSE").read().replace("Apache", "Apachee")
+    assert match_license_hash(text) is None
+    assert match_license(text.encode()).endswith("/Apache-2.0.html")
@@ -0,0 +1,88 @@
+"""Tests for the plugin registries of parsers and git providers."""
+
+from importlib.metadata import EntryPoint
+
+import pytest
+
+from gimie.extractors import GIT_PROVIDERS
+from gimie.parsers import (
+    PARSERS,
+    build_parser_index,
+    get_parser,
+    list_default_parsers,
+    list_parsers,
+)
+from gimie.parsers.abstract import Parser
+from gimie.parsers.filenames import FileRule
+from gimie.plugins import PluginRegistry
+
+
+class DummyParser(Parser):
+    """Parser registered through an entry point in tests."""
+
+    files = FileRule(filenames=("dummy.txt",))
+
+    def parse(self, data, graph=None):
+        return graph
+
+
+@pytest.fixture
+def entry_points(monkeypatch):
+    """Pretend that an installed package declares a dummy parser."""
+    eps = [
+        EntryPoint(
+            name="dummy",
+            value=f"{__name__}:DummyParser",
+            group="gimie.parsers",
+        )
+    ]
+
+    def fake_entry_points(group):
+        return [ep for ep in eps if ep.group == group]
+
+    monkeypatch.setattr("importlib.metadata.entry_points", fake_entry_points)
+    monkeypatch.setattr(PARSERS, "_specs", dict(PARSERS._specs))
+    monkeypatch.setattr(PARSERS, "_discovered", False)
+
+
+def test_entry_point_parser(entry_points):
+    """Parsers from entry points are listed, but not used by default."""
+    assert "dummy" in list_parsers()
+    assert "dummy" not in list_default_parsers()
+    assert get_parser("dummy") is DummyParser
+    index = build_parser_index({"dummy", "cff"})
+    assert index.classify(["dummy.txt", "CITATION.cff"]) == ["dummy", "cff"]
+    assert build_parser_index().select("dummy.txt") is None
+
+
+def test_registry_unknown_name():
+    registry = PluginRegistry("gimie.tests", {})
+    with pytest.raises(KeyError):
+        registry["missing"]
+    assert "missing" not in registry
+
+
+def test_git_providers_mapping():
+    """Git providers behave as a mapping of extractor classes."""
+    assert set(GIT_PROVIDERS) >= {"git", "github", "gitlab"}
+    assert GIT_PROVIDERS["github"].__name__ == "GithubExtractor"
+
+
+@pytest.mark.parametrize(
+    "code,unused",
+    [
+        (
+            "from gimie.extractors import get_extractor;"
+            "get_extractor('https://github.com/a/b', 'github')",
+            {"pydriller", "git"},
+        ),
+        (
+            "from gimie.parsers import build_parser_index;"
+            "build_parser_index({'cff', 'publiccode'})",
+            {"numpy", "scipy"},
+        ),
+    ],
+)
+def test_unused_plugins_not_imported(imported_packages, code, unused):
+    """Only the modules of selected plugins are imported."""
+    assert not unused & imported_packages(code)
@@ -0,0 +1,98 @@
+"""Tests for per-stage profiling."""
+
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+
+from gimie.io import LocalResource
+from gimie.parsers import parse_files
+from gimie.utils.profiling import (
+    Profiler,
+    add_bytes,
+    add_request,
+    profiling,
+    stage,
+    tracing_memory,
+)
+
+
+def test_stages_disabled():
+    """Without a profiler, stages do nothing."""
+    assert not profiling()
+    with stage("noop"):
+        add_bytes(10)
+
+
+def test_nested_stages():
+    """Nested stages are reported separately and bytes count towards
+    their parents."""
+    with Profiler(memory=True) as profiler:
+        with stage("outer"):
+            with stage("inner"):
+                add_bytes(10)
+                data = [0] * 100_000
+            with stage("inner"):
+                pass
+    del data
+    report = profiler.report()
+    assert list(report) == ["outer", "inner"]
+    assert report["inner"]["calls"] == 2
+    assert report["outer"]["bytes"] == report["inner"]["bytes"] == 10
+    assert report["outer"]["wall_s"] >= report["inner"]["wall_s"]
+    assert report["inner"]["peak_memory_mb"] > 0.5
+
+
+def test_parse_files_stages():
+    """Files parsed on worker threads are profiled."""
+    files = [LocalResource("LICENSE"), LocalResource("CITATION.cff")]
+    with Profiler() as profiler:
+        parse_files("https://example.org/", files)
+    report = profiler.report()
+    assert report["fetch"]["calls"] == 2
+    assert report["parse_files"]["bytes"] > 0
+    assert {"parse.license", "parse.cff"} <= set(report)
+
+
+def test_nested_profilers():
+    """Stages are recorded by all active profilers, but stages entered
+    before the inner profiler are not attributed to it."""
+    with Profiler() as outer:
+        with stage("batch"):
+            with Profiler() as inner:
+                with stage("repo"):
+                    add_request(points=2)
+    assert set(outer.report()) == {"batch", "repo"}
+    assert list(inner.report()) == ["repo"]
+    assert outer.report()["batch"]["api_points"] == 2
+    assert inner.report()["repo"]["requests"] == 1
+
+
+def test_memory_concurrent_stages():
+    """Stages on other threads do not measure memory, so that they cannot
+    reset the process-wide peak of the profiling thread."""
+
+    def allocate():
+        with stage("worker"):
+            data = [0] * 100_000
+            del data
+
+    with Profiler(memory=True) as profiler:
+        assert tracing_memory()
+        with stage("main"):
+            contexts = [copy_context() for _ in range(8)]
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                list(executor.map(lambda ctx: ctx.run(allocate), contexts))
+    report = profiler.report()
+    assert report["worker"]["calls"] == 8
+    assert report["worker"]["peak_memory_mb"] is None
+    assert report["main"]["peak_memory_mb"] >= 0
+
+
+def test_parse_files_memory():
+    """Files are parsed sequentially when memory is profiled, so that
+    per-file stages are measured."""
+    files = [LocalResource("LICENSE"), LocalResource("CITATION.cff")]
+    with Profiler(memory=True) as profiler:
+        parse_files("https://example.org/", files)
+    report = profiler.report()
+    for name in ("fetch", "parse.license", "parse.cff"):
+        assert report[name]["peak_memory_mb"] >= 0
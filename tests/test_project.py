@@ -1,9 +1,15 @@
 """Test the project module."""
 
 import pytest
+from rdflib import Graph, URIRef
+from rdflib.compare import isomorphic
 
 from gimie.extractors import GIT_PROVIDERS
-from gimie.project import get_extractor
+from gimie.io import LocalResource
+from gimie.models import Repository
+from gimie.parsers import parse_files, parse_files_models
+from gimie.parsers.findings import Author, License
+from gimie.project import ExtractionResult, Project, get_extractor
 
 
 def test_get_extractor():
@@ -13,3 +19,81 @@ def test_get_extractor():
 
     with pytest.raises(ValueError):
         get_extractor(repo, "bad_provider")
+
+
+def test_extraction_result_to_graph():
+    """Converting models and findings to RDF as a last step gives the same
+    graph as parsing files to triples directly."""
+    url = "https://github.com/sdsc-ordes/gimie"
+    files = [LocalResource("LICENSE"), LocalResource("CITATION.cff")]
+    repo = Repository(url=url, name="sdsc-ordes/gimie")
+    findings = parse_files_models(url, files)
+    assert License("https://spdx.org/licenses/Apache-2.0.html") in findings
+    assert any(isinstance(f, Author) for f in findings)
+
+    result = ExtractionResult(repository=repo, findings=findings)
+    expected = parse_files(url, files, graph=repo.to_graph())
+    assert isomorphic(result.to_graph(), expected)
+
+
+def test_failed_extraction_cost(monkeypatch):
+    """A failed extraction does not keep the cost of the previous one."""
+    url = "https://github.com/sdsc-ordes/gimie"
+    proj = Project(url, track_cost=True)
+    monkeypatch.setattr(
+        proj, "_extract_repository", lambda: Repository(url=url, name="gimie")
+    )
+    monkeypatch.setattr(proj, "_list_files", lambda: [])
+    proj.extract_models()
+    assert proj.cost is not None
+
+    def fail():
+        raise ConnectionError("unreachable")
+
+    monkeypatch.setattr(proj, "_extract_repository", fail)
+    with pytest.raises(ConnectionError):
+        proj.extract_models()
+    assert proj.cost is None
+
+
+@pytest.fixture
+def rdflib_terms(monkeypatch):
+    """Count the rdflib graphs and URIs created."""
+    created = []
+    new_uri = URIRef.__new__
+    init_graph = Graph.__init__
+
+    def count_uri(cls, *args, **kwargs):
+        created.append(cls)
+        return new_uri(cls, *args, **kwargs)
+
+    def count_graph(self, *args, **kwargs):
+        created.append(type(self))
+        init_graph(self, *args, **kwargs)
+
+    monkeypatch.setattr(URIRef, "__new__", count_uri)
+    monkeypatch.setattr(Graph, "__init__", count_graph)
+    return created
+
+
+def test_extract_models_without_rdflib(monkeypatch, rdflib_terms):
+    """Findings and models are extracted without creating rdflib terms."""
+    url = "https://github.com/sdsc-ordes/gimie"
+    files = [
+        LocalResource(path)
+        for path in ("LICENSE", "CITATION.cff", "publiccode.yml")
+    ]
+    findings = parse_files_models(url, files, max_workers=1)
+    assert findings
+
+    proj = Project(url)
+    monkeypatch.setattr(
+        proj, "_extract_repository", lambda: Repository(url=url, name="gimie")
+    )
+    monkeypatch.setattr(proj, "_list_files", lambda: files)
+    result = proj.extract_models()
+    assert result.findings == findings
+    assert rdflib_terms == []
+
+    result.to_graph()
+    assert rdflib_terms
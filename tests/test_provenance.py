@@ -0,0 +1,51 @@
+"""Tests for the provenance of extractions."""
+
+from rdflib import Graph
+from rdflib.namespace import PROV, RDF, XSD
+from rdflib.term import Literal, URIRef
+
+from gimie.graph.namespaces import GIMIE, SDO
+from gimie.io import LocalResource
+from gimie.parsers import parse_files
+from gimie.provenance import measure_cost
+from gimie.utils.profiling import stage
+
+URL = "https://example.org/repo"
+
+
+def test_measure_cost():
+    """Stages run during the extraction are included in its cost."""
+    files = [LocalResource("LICENSE")]
+    with measure_cost(URL) as costs:
+        with stage("extract"):
+            parse_files(URL, files)
+    cost = costs[0]
+    assert cost.started <= cost.ended
+    assert cost.total.bytes > 0
+    assert cost.clone_size == 0
+    assert {"extract", "parse_files", "fetch"} <= set(cost.stages)
+
+
+def test_cost_triples():
+    """The cost is an activity using the repository, with its totals
+    and a node per stage."""
+    with measure_cost(URL) as costs:
+        with stage("extract"):
+            with stage("git.clone"):
+                pass
+    graph = Graph()
+    costs[0].emit(graph)
+    activity = URIRef(costs[0]._id)
+    assert activity.startswith(str(GIMIE))
+    assert (activity, RDF.type, PROV.Activity) in graph
+    assert (activity, PROV.used, URIRef(URL)) in graph
+    started = graph.value(activity, PROV.startedAtTime)
+    assert started.datatype == XSD.dateTime
+    assert graph.value(activity, GIMIE.cloneSize) == Literal(0)
+    agent = graph.value(activity, PROV.wasAssociatedWith)
+    assert (agent, RDF.type, PROV.SoftwareAgent) in graph
+    stages = {
+        str(graph.value(node, SDO.name))
+        for node in graph.objects(activity, GIMIE.stage)
+    }
+    assert stages == {"extract", "git.clone"}
@@ -0,0 +1,164 @@
+"""Tests for the extraction HTTP service."""
+
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+import requests
+from rdflib import SDO, Graph
+from rdflib.term import Literal, URIRef
+
+import gimie.project
+from gimie.server import ExtractionService, make_server
+
+URL = "https://example.org/group/repo"
+
+
+class FakeProject:
+    """Stands in for Project, counting extractions."""
+
+    extractions = 0
+    head = "0" * 40
+
+    def __init__(self, url, parser_names=None, cache=None):
+        self.url = url
+        self.parsers = parser_names
+
+    result_key = gimie.project.Project.result_key
+
+    def emit(self, sink):
+        FakeProject.extractions += 1
+        # Give concurrent requests time to arrive
+        time.sleep(0.2)
+        sink.add((URIRef(self.url), SDO.name, Literal("repo")))
+
+    def extract(self):
+        graph = Graph()
+        self.emit(graph)
+        return graph
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(gimie.project, "Project", FakeProject)
+    monkeypatch.setattr(FakeProject, "head", "0" * 40)
+    FakeProject.extractions = 0
+    httpd = make_server(port=0, service=ExtractionService(max_workers=2))
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def get(url, headers=None):
+    request = urllib.request.Request(url, headers=headers or {})
+    try:
+        with urllib.request.urlopen(request) as resp:
+            return resp.status, resp.headers, resp.read()
+    except urllib.error.HTTPError as err:
+        return err.code, err.headers, err.read()
+
+
+def test_extract_etag(server):
+    """Responses carry an ETag, which changes with the repository HEAD
+    and allows revalidation."""
+    status, headers, body = get(f"{server}/extract?url={URL}&format=nt")
+    assert status == 200
+    assert headers["Content-Type"] == "application/n-triples"
+    assert body.startswith(f"<{URL}>".encode())
+    etag = headers["ETag"]
+    status, _, body = get(
+        f"{server}/extract?url={URL}&format=nt", {"If-None-Match": etag}
+    )
+    assert status == 304 and body == b""
+    assert FakeProject.extractions == 1
+    FakeProject.head = "1" * 40
+    _, headers, _ = get(f"{server}/extract?url={URL}&format=nt")
+    assert headers["ETag"] != etag
+    assert FakeProject.extractions == 2
+
+
+def test_revalidate_without_extracting(monkeypatch):
+    """A valid ETag is answered without extracting, even when the
+    response is no longer kept in memory."""
+    monkeypatch.setattr(gimie.project, "Project", FakeProject)
+    monkeypatch.setattr(FakeProject, "head", "0" * 40)
+    FakeProject.extractions = 0
+    service = ExtractionService(cache_size=0)
+    etag = service.extract(URL, "nt").etag
+    response = service.extract(URL, "nt", if_none_match=etag)
+    assert response.not_modified and response.body == b""
+    assert FakeProject.extractions == 1
+    assert not service.extract(URL, "nt", if_none_match='"other"').not_modified
+    assert FakeProject.extractions == 2
+
+
+def test_etag_custom_licenses(server, tmp_path, monkeypatch):
+    """Adding a custom license changes the ETag, since it can change
+    license matches."""
+    from gimie.parsers.license.custom import add_custom_license
+
+    monkeypatch.setenv("GIMIE_DATA_DIR", str(tmp_path))
+    _, headers, _ = get(f"{server}/extract?url={URL}")
+    etag = headers["ETag"]
+    add_custom_license("LicenseRef-Acme", "ACME internal use only license.")
+    status, headers, _ = get(
+        f"{server}/extract?url={URL}", {"If-None-Match": etag}
+    )
+    assert status == 200
+    assert headers["ETag"] != etag
+    assert FakeProject.extractions == 2
+
+
+def test_coalesce_requests(server):
+    """Simultaneous requests for the same output share one extraction."""
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(get(f"{server}/extract?url={URL}"))
+        )
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert [status for status, _, _ in results] == [200] * 4
+    assert FakeProject.extractions == 1
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "",
+        "?url=not-a-url",
+        f"?url={URL}&format=xml",
+        f"?url={URL}&include_parser=not-a-parser",
+    ],
+)
+def test_bad_request(server, query):
+    status, _, _ = get(f"{server}/extract{query}")
+    assert status == 400
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        ValueError("Bad credentials"),
+        requests.ConnectionError("Connection refused"),
+        requests.Timeout("Read timed out"),
+    ],
+)
+def test_provider_error(server, monkeypatch, error):
+    """Failures of the git provider are reported as a bad gateway."""
+
+    def emit(self, sink):
+        raise error
+
+    monkeypatch.setattr(FakeProject, "emit", emit)
+    status, _, body = get(f"{server}/extract?url={URL}")
+    assert status == 502
+    assert str(error).encode() in body
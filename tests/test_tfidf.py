@@ -1,5 +1,4 @@
 import json
-from typing import List
 
 import numpy as np
 import pytest
@@ -44,7 +43,7 @@ def test_tfidf_fit_transform(tfidf_vectorizer: TfidfVectorizer):
     assert all(
         [v == target_voc[t] for t, v in tfidf_vectorizer.vocabulary.items()]
     )
-    pred_idf: List[float] = tfidf_vectorizer.idf_vector
+    pred_idf: np.ndarray = tfidf_vectorizer.idf_vector
     assert all([pred == target for pred, target in zip(pred_idf, target_idf)])
 
 
@@ -61,9 +60,57 @@ def test_tfidf_fit_transform(tfidf_vectorizer: TfidfVectorizer):
         TfidfConfig(norm="l2"),
         TfidfConfig(sublinear_tf=True),
         TfidfConfig(vocabulary={"this": 0, "is": 1, "test": 2}),
+        TfidfConfig(n_features=16),
+        TfidfConfig(n_features=16, ngram_range=(1, 2), norm="l2"),
     ],
 )
 def test_tfidf_configs(config):
     """Test fitting different configurations."""
     vectorizer = TfidfVectorizer(config=config)
     _ = vectorizer.fit_transform(CORPUS)
+
+
+@pytest.mark.parametrize(
+    "config", [TfidfConfig(max_features=4), TfidfConfig(n_features=16)]
+)
+def test_tfidf_fit_generator(config):
+    """Fitting streams documents: a generator gives the same model."""
+    expected = TfidfVectorizer(config=config).fit_transform(CORPUS)
+    vectorizer = TfidfVectorizer(config=config)
+    result = vectorizer.fit_transform(doc for doc in CORPUS)
+    assert np.array_equal(result.toarray(), expected.toarray())
+
+
+def test_tfidf_hashing():
+    """Hashed vectorizers have a fixed width and no vocabulary."""
+    vectorizer = TfidfVectorizer(config=TfidfConfig(n_features=2**12))
+    tfidf = vectorizer.fit_transform(CORPUS)
+    assert tfidf.shape == (len(CORPUS), 2**12)
+    assert vectorizer.vocabulary == {}
+    # Unseen tokens are hashed too, so every document has non-zero entries
+    assert vectorizer.transform(["unseen words"]).nnz == 2
+
+
+def test_tfidf_hashing_exclusive_vocabulary():
+    with pytest.raises(ValueError):
+        TfidfConfig(n_features=16, vocabulary={"this": 0})
+
+
+def test_tfidf_transform_unfitted():
+    with pytest.raises(ValueError, match="Neither a vocabulary"):
+        TfidfVectorizer(config=TfidfConfig()).transform(CORPUS)
+
+
+@pytest.mark.parametrize(
+    "config", [TfidfConfig(norm="l2"), TfidfConfig(n_features=64, norm="l2")]
+)
+def test_tfidf_save_load(tmp_path, config):
+    """Test binary serialization round trip of TfidfVectorizer."""
+    vectorizer = TfidfVectorizer(config=config)
+    expected = vectorizer.fit_transform(CORPUS).toarray()
+    vectorizer.save(tmp_path / "model.npz")
+    loaded = TfidfVectorizer.load(tmp_path / "model.npz")
+    assert loaded.config == vectorizer.config
+    assert loaded.vocabulary == vectorizer.vocabulary
+    # idf is stored in single precision
+    assert np.allclose(loaded.transform(CORPUS).toarray(), expected, atol=1e-6)